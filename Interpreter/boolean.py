@@ -3,45 +3,58 @@ from Interpreter.mytype import Type
 
 
 class Boolean(Type):
-    def __init__(self, value, position_start=None, position_end=None, context=None):
-        super().__init__(value, position_start, position_end, context)
-
-    def search_binary_operation(self, operation_token):
+    __slots__ = ()
+
+    # The shared true or false Boolean for 1 or 0, a new Boolean for any other value
+    @staticmethod
+    def of(value):
+        if value.__class__ is int:
+            if value == 1:
+                return Boolean.true
+            if value == 0:
+                return Boolean.false
+        return Boolean(value)
+
+    def search_binary_operation(self, operation_token, context):
         return self.search_operation(operation_token, {
             Tokens.EQUAL: self.equal_to,
             Tokens.NOT_EQUAL: self.not_equal_to,
             Tokens.AND: self.and_to,
             Tokens.OR: self.or_to,
             Tokens.NOT: self.not_to,
-        })
+        }, context)
 
-    def search_unary_operation(self, operation_token):
+    def search_unary_operation(self, operation_token, context):
         return self.search_operation(operation_token, {
             Tokens.NOT: self.not_to,
-        })
+        }, context)
 
     def equal_to(self, other):
         if isinstance(other, Boolean):
-            return Boolean(int(self.value == other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value == other.value)), None
 
     def not_equal_to(self, other):
         if isinstance(other, Boolean):
-            return Boolean(int(self.value != other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value != other.value)), None
 
     def and_to(self, other):
         if isinstance(other, Boolean):
-            return Boolean(int(self.value and other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value and other.value)), None
 
     def or_to(self, other):
         from number import Number
         if isinstance(other, Boolean):
-            return Boolean(self.value or other.value).set_context(self.context), None
+            return Boolean(self.value or other.value), None
         elif isinstance(other, Number):
-            return Boolean(self.value or other.value).set_context(self.context), None
+            return Boolean(self.value or other.value), None
         return None, "Invalid operand"
 
     def not_to(self):
-        return Boolean(int(not self.value)).set_context(self.context), None
+        return Boolean.of(int(not self.value)), None
 
     def __repr__(self):
         return "True" if self.value else "False"
+
+
+Boolean.true = Boolean(1)
+Boolean.false = Boolean(0)
@@ -0,0 +1,234 @@
+from Interpreter.boolean import Boolean
+from Interpreter.number import Number
+from Lexer.mytoken import Tokens
+
+# Opcodes. Every instruction is two ints, the opcode and its argument (a constant index, a jump target or unused)
+LOAD_CONSTANT = 0     # push the constant object itself (the shared value of a literal, Number.null, None)
+LOAD_LOCAL = 1        # push a parameter of the running function, read from its slot in the frame (by name if None)
+LOAD_NAME = 2         # push the value of a name looked up through the context chain (dynamic scope)
+BINARY = 3            # pop right and left, push left.binary_opr(operator, right); errors are at the right operand
+UNARY = 4             # pop a value, push its unary operation
+AND_JUMP = 5          # '&&': if the top value is 0 keep it as the result and jump, else fall through to the right side
+OR_JUMP = 6           # '||': if the top value is 1 keep it as the result and jump, else fall through to the right side
+JUMP = 7              # jump to the argument
+JUMP_IF_FALSE = 8     # pop a condition and jump when its value is falsy
+POP = 9               # discard the top value
+MAKE_FUNCTION = 10    # push a Function whose body is a nested Code, binding it when it has a name
+MAKE_LAMBDA = 11      # push a Lambda whose body is a nested Code, binding it when it has a name
+CALL = 12             # pop the arguments and the callee, call it at the call's positions and push the result
+RETURN_VALUE = 13     # pop the result of the running Code and return it to the caller
+
+OPCODE_NAMES = ['LOAD_CONSTANT', 'LOAD_LOCAL', 'LOAD_NAME', 'BINARY', 'UNARY', 'AND_JUMP', 'OR_JUMP', 'JUMP',
+                'JUMP_IF_FALSE', 'POP', 'MAKE_FUNCTION', 'MAKE_LAMBDA', 'CALL', 'RETURN_VALUE']
+JUMP_OPCODES = (AND_JUMP, OR_JUMP, JUMP, JUMP_IF_FALSE)
+
+
+# Bytecode of one top-level statement or one function body. constants holds the values, slots, operators and the
+# (name or count, position_start, position_end) tuples the instructions refer to; locals are the parameter names and
+# node is the statement or body the code was compiled from
+class Code:
+    __slots__ = ('name', 'instructions', 'constants', 'locals', 'node', 'position_start', 'position_end')
+
+    def __init__(self, name, local_names=()):
+        self.name = name
+        self.instructions = []
+        self.constants = []
+        self.locals = frozenset(local_names)
+        self.node = None
+        self.position_start = None
+        self.position_end = None
+
+    # Append an instruction and return its offset
+    def emit(self, opcode, argument=0):
+        self.instructions.append(opcode)
+        self.instructions.append(argument)
+        return len(self.instructions) - 2
+
+    def add_constant(self, constant):
+        self.constants.append(constant)
+        return len(self.constants) - 1
+
+    # Point the jump emitted at offset to the next instruction
+    def patch(self, offset):
+        self.instructions[offset + 1] = len(self.instructions)
+
+    def __repr__(self):
+        return f"<code {self.name}>"
+
+
+# Compiles the Parser AST into Code objects for Interpreter.vm.VirtualMachine
+class BytecodeCompiler:
+    def __init__(self):
+        self.loops = []
+
+    # Compile a top-level statement
+    def compile_statement(self, node):
+        code = Code('<program>')
+        self.compile(code, node)
+        code.emit(RETURN_VALUE)
+        code.node = node
+        code.position_start, code.position_end = node.position_start, node.position_end
+        return code
+
+    # Compile a function or lambda body; a multi-line body yields the value of its last statement
+    def compile_function(self, name, arg_names, body):
+        code = Code(name, arg_names)
+        outer_loops, self.loops = self.loops, []
+        statements = body if isinstance(body, list) else [body]
+        for index, statement in enumerate(statements):
+            if index:
+                code.emit(POP)
+            self.compile(code, statement)
+        code.emit(RETURN_VALUE)
+        self.loops = outer_loops
+        code.node = body
+        code.position_start, code.position_end = statements[0].position_start, statements[-1].position_end
+        return code
+
+    # Dynamically find and call the appropriate compile method for the given node
+    def compile(self, code, node):
+        method_name = f'compile_{type(node).__name__}'
+        compiler = getattr(self, method_name, self.no_compile_method)
+        compiler(code, node)
+
+    @staticmethod
+    def no_compile_method(code, node):
+        raise TypeError(f"No compile_{type(node).__name__} method defined")
+
+    # A literal's value is made once, when it is compiled, and shared by every evaluation
+    @staticmethod
+    def compile_NumberNode(code, node):
+        code.emit(LOAD_CONSTANT, code.add_constant(Number.of(node.token_value.value)))
+
+    @staticmethod
+    def compile_BooleanNode(code, node):
+        code.emit(LOAD_CONSTANT, code.add_constant(Boolean.of(node.value)))
+
+    @staticmethod
+    def compile_ConstantNode(code, node):
+        code.emit(LOAD_CONSTANT, code.add_constant(node.value_class.of(node.value)))
+
+    @staticmethod
+    def compile_AccessNode(code, node):
+        code.emit(LOAD_NAME, code.add_constant((node.token_name.value, node.position_start, node.position_end)))
+
+    # Parameters resolved by Interpreter.resolver
+    @staticmethod
+    def compile_SlotAccessNode(code, node):
+        code.emit(LOAD_LOCAL, code.add_constant((node.slot, node.token_name.value, node.position_start,
+                                                 node.position_end)))
+
+    def compile_BinaryOperationNode(self, code, node):
+        constant = code.add_constant((node.operator, node.right.position_start, node.right.position_end))
+        self.compile(code, node.left)
+        if node.operator.type == Tokens.AND or node.operator.type == Tokens.OR:
+            jump = code.emit(AND_JUMP if node.operator.type == Tokens.AND else OR_JUMP)
+            self.compile(code, node.right)
+            code.emit(BINARY, constant)
+            code.patch(jump)
+        else:
+            self.compile(code, node.right)
+            code.emit(BINARY, constant)
+
+    def compile_UnaryOperationNode(self, code, node):
+        self.compile(code, node.operand)
+        code.emit(UNARY, code.add_constant(node.operator))
+
+    # while: test the condition, run the body statements discarding their values, loop; the loop's value is None
+    def compile_WhileNode(self, code, node):
+        start = len(code.instructions)
+        self.compile(code, node.condition)
+        exit_jump = code.emit(JUMP_IF_FALSE)
+        breaks = []
+        self.loops.append((start, breaks))
+        for statement in node.body:
+            self.compile(code, statement)
+            code.emit(POP)
+        self.loops.pop()
+        code.emit(JUMP, start)
+        code.patch(exit_jump)
+        for jump in breaks:
+            code.patch(jump)
+        code.emit(LOAD_CONSTANT, code.add_constant(None))
+
+    def compile_FunctionDefinitionNode(self, code, node):
+        function_name = node.token_name.value if node.token_name else None
+        arg_names = [arg_name.value for arg_name in node.arg_name]
+        body = self.compile_function(function_name or '<anonymous>', arg_names, node.body)
+        code.emit(MAKE_FUNCTION, code.add_constant((function_name, arg_names, body, node.should_auto_return)))
+
+    def compile_LambdaNode(self, code, node):
+        lambda_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        body = self.compile_function(lambda_name or '<anonymous>', arg_names, node.body_node)
+        code.emit(MAKE_LAMBDA, code.add_constant((lambda_name, arg_names, body)))
+
+    def compile_FunctionCallNode(self, code, node):
+        self.compile(code, node.node_call)
+        for arg_node in node.arg_node:
+            self.compile(code, arg_node)
+        code.emit(CALL, code.add_constant((len(node.arg_node), node.position_start, node.position_end)))
+
+    # 'continue' and 'break' jump within the innermost loop of the same Code; outside a loop they are the
+    # no-op statement the tree-walker makes of them, whose value is None
+    def compile_ContinueNode(self, code, node):
+        if not self.loops:
+            code.emit(LOAD_CONSTANT, code.add_constant(None))
+            return
+        code.emit(JUMP, self.loops[-1][0])
+
+    def compile_BreakNode(self, code, node):
+        if not self.loops:
+            code.emit(LOAD_CONSTANT, code.add_constant(None))
+            return
+        self.loops[-1][1].append(code.emit(JUMP))
+
+    def compile_ReturnNode(self, code, node):
+        if node.node_to_return:
+            self.compile(code, node.node_to_return)
+        else:
+            code.emit(LOAD_CONSTANT, code.add_constant(Number.null))
+        code.emit(RETURN_VALUE)
+
+    # Views over a FlatAST (see Parser.flatast) compile like the node classes they stand for
+    compile_FlatNumberNode = compile_NumberNode
+    compile_FlatBooleanNode = compile_BooleanNode
+    compile_FlatAccessNode = compile_AccessNode
+    compile_FlatUnaryOperationNode = compile_UnaryOperationNode
+    compile_FlatBinaryOperationNode = compile_BinaryOperationNode
+    compile_FlatWhileNode = compile_WhileNode
+    compile_FlatFunctionDefinitionNode = compile_FunctionDefinitionNode
+    compile_FlatFunctionCallNode = compile_FunctionCallNode
+    compile_FlatLambdaNode = compile_LambdaNode
+    compile_FlatContinueNode = compile_ContinueNode
+    compile_FlatBreakNode = compile_BreakNode
+    compile_FlatReturnNode = compile_ReturnNode
+
+
+# Readable listing of a Code and, after it, of every function body it contains
+def disassemble(code):
+    lines = [f"Disassembly of {code!r} (locals: {', '.join(sorted(code.locals)) or '-'}):"]
+    nested = []
+    instructions = code.instructions
+    for offset in range(0, len(instructions), 2):
+        opcode, argument = instructions[offset], instructions[offset + 1]
+        if opcode in JUMP_OPCODES:
+            argument, detail = '', f"(to {argument})"
+        elif opcode in (POP, RETURN_VALUE):
+            argument, detail = '', ''
+        else:
+            constant = code.constants[argument]
+            if opcode in (MAKE_FUNCTION, MAKE_LAMBDA):
+                nested.append(constant[2])
+                detail = f"({constant[2]!r})"
+            elif opcode == CALL:
+                detail = f"({constant[0]} arguments)"
+            elif isinstance(constant, tuple):
+                detail = f"({constant[0]!r})"
+            else:
+                detail = f"({constant!r})"
+        lines.append(f"{offset:>6} {OPCODE_NAMES[opcode]:<14} {argument!s:>4} {detail}".rstrip())
+    for nested_code in nested:
+        lines.append('')
+        lines.append(disassemble(nested_code))
+    return '\n'.join(lines)
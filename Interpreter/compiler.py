@@ -0,0 +1,292 @@
+from Interpreter.boolean import Boolean
+from Interpreter.interpreter import Interpreter
+from Interpreter.myfunction import Function
+from Interpreter.mylambda import Lambda
+from Interpreter.number import Number
+from Lexer.mytoken import Tokens
+from Interpreter.runtimeresult import TailCall, ContinueSignal, BreakSignal, ReturnSignal
+from error import ErrorException, RunTimeError
+
+# Compile methods that take a tail flag, like the Interpreter's TAIL_VISITORS: a call, or the right side of '||', in
+# tail position evaluates to a TailCall
+TAIL_COMPILERS = {'compile_FunctionCallNode', 'compile_BinaryOperationNode', 'compile_FlatFunctionCallNode',
+                  'compile_FlatBinaryOperationNode'}
+
+
+# A compiled subtree: evaluate(context) returns the value or raises ErrorException. The Interpreter visits it like
+# a node (visit_CompiledNode), so compiled function bodies run through the unchanged Function/Lambda.execute
+class CompiledNode:
+    __slots__ = ('evaluate', 'node', 'position_start', 'position_end')
+
+    def __init__(self, evaluate, node):
+        self.evaluate = evaluate
+        self.node = node
+        nodes = node if isinstance(node, list) else [node]
+        self.position_start = nodes[0].position_start if nodes else None
+        self.position_end = nodes[-1].position_end if nodes else None
+
+
+# Turns an AST into nested closures once, so that evaluating it again does no per-node method lookup. Every closure
+# behaves like the matching Interpreter.visit_* method.
+class Compiler:
+    # Compile a top-level statement into a node for Interpreter.visit
+    def compile_statement(self, node):
+        return CompiledNode(self.compile(node), node)
+
+    # Dynamically find and call the appropriate compile method for the given node
+    def compile(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        compiler = getattr(self, method_name, self.no_compile_method)
+        return compiler(node)
+
+    # Compile a node whose value is the value of the enclosing function: the body of a '->' function or a lambda,
+    # the last statement of a body or the value of a return
+    def compile_tail(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        if method_name in TAIL_COMPILERS:
+            return getattr(self, method_name)(node, True)
+        return self.compile(node)
+
+    # Nodes without a compile method are evaluated by the tree-walking Interpreter
+    @staticmethod
+    def no_compile_method(node):
+        interpreter = Interpreter()
+
+        def evaluate(context):
+            return interpreter.visit(node, context)
+        return evaluate
+
+    # A literal's value is made once, when it is compiled, and shared by every evaluation
+    @staticmethod
+    def compile_NumberNode(node):
+        value = Number.of(node.token_value.value)
+
+        def evaluate(context):
+            return value
+        return evaluate
+
+    @staticmethod
+    def compile_BooleanNode(node):
+        value = Boolean.of(node.value)
+
+        def evaluate(context):
+            return value
+        return evaluate
+
+    @staticmethod
+    def compile_ConstantNode(node):
+        value = node.value_class.of(node.value)
+
+        def evaluate(context):
+            return value
+        return evaluate
+
+    @staticmethod
+    def compile_AccessNode(node):
+        name = node.token_name.value
+        position_start, position_end = node.position_start, node.position_end
+
+        def evaluate(context):
+            value = context.symbol_table.get(name)
+            if value is None:
+                raise ErrorException(RunTimeError(position_start, position_end, f"'{name}' is not defined", context))
+            return value
+        return evaluate
+
+    @staticmethod
+    def compile_SlotAccessNode(node):
+        slot = node.slot
+        read = Compiler.compile_AccessNode(node)
+
+        def evaluate(context):
+            value = context.symbol_table.slots[slot]
+            if value is None:
+                return read(context)
+            return value
+        return evaluate
+
+    def compile_BinaryOperationNode(self, node, tail=False):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        operator = node.operator
+        right_start, right_end = node.right.position_start, node.right.position_end
+
+        # '&&' and '||' skip the right operand when the left one decides the result. A false left side makes the
+        # right side the result of '||', so in tail position the right side is one too
+        if operator.type == Tokens.OR and tail:
+            tail_right = self.compile_tail(node.right)
+
+            def evaluate(context):
+                left_value = left(context)
+                if left_value.value == 1:
+                    return left_value
+                if not left_value.value:
+                    right_value = tail_right(context)
+                    if right_value.__class__ is TailCall:
+                        return right_value
+                else:
+                    right_value = right(context)
+                value, error = left_value.binary_opr(operator, right_value, context, right_start, right_end)
+                if error:
+                    raise ErrorException(error)
+                return value
+        elif operator.type == Tokens.AND:
+            def evaluate(context):
+                left_value = left(context)
+                if left_value.value == 0:
+                    return left_value
+                right_value = right(context)
+                value, error = left_value.binary_opr(operator, right_value, context, right_start, right_end)
+                if error:
+                    raise ErrorException(error)
+                return value
+        elif operator.type == Tokens.OR:
+            def evaluate(context):
+                left_value = left(context)
+                if left_value.value == 1:
+                    return left_value
+                right_value = right(context)
+                value, error = left_value.binary_opr(operator, right_value, context, right_start, right_end)
+                if error:
+                    raise ErrorException(error)
+                return value
+        else:
+            def evaluate(context):
+                left_value = left(context)
+                right_value = right(context)
+                value, error = left_value.binary_opr(operator, right_value, context, right_start, right_end)
+                if error:
+                    raise ErrorException(error)
+                return value
+        return evaluate
+
+    def compile_UnaryOperationNode(self, node):
+        operand = self.compile(node.operand)
+        operator = node.operator
+
+        def evaluate(context):
+            value = operand(context)
+            handler, error = value.unary_opr(operator, context)
+            if error:
+                raise ErrorException(error)
+            value, error = handler(value)
+            if error:
+                raise ErrorException(error)
+            return value
+        return evaluate
+
+    def compile_WhileNode(self, node):
+        condition = self.compile(node.condition)
+        body = [self.compile(statement) for statement in node.body]
+
+        def evaluate(context):
+            while condition(context).value:
+                try:
+                    for statement in body:
+                        statement(context)
+                except ContinueSignal:
+                    continue
+                except BreakSignal:
+                    break
+            return None
+        return evaluate
+
+    # Compile a function body into a CompiledNode; a multi-line body yields the value of its last statement. As in
+    # myfunction.evaluate_body, a 'continue' or 'break' outside a loop is a statement whose value is None, and a
+    # call in tail position is returned as a TailCall for execute_tail_calls to make
+    def compile_body(self, body):
+        if not isinstance(body, list):
+            return CompiledNode(self.compile_tail(body), body)
+        statements = [self.compile(statement) for statement in body[:-1]] + \
+            [self.compile_tail(statement) for statement in body[-1:]]
+
+        def evaluate(context):
+            value = Number.null
+            try:
+                for statement in statements:
+                    try:
+                        value = statement(context)
+                    except (ContinueSignal, BreakSignal):
+                        value = None
+            except ReturnSignal as signal:
+                value = signal.value
+            return value
+        return CompiledNode(evaluate, body)
+
+    def compile_FunctionDefinitionNode(self, node):
+        function_name = node.token_name.value if node.token_name else None
+        arg_names = [arg_name.value for arg_name in node.arg_name]
+        body = self.compile_body(node.body)
+        should_auto_return = node.should_auto_return
+
+        def evaluate(context):
+            function_value = Function(function_name, arg_names, body, should_auto_return)
+            if function_name:
+                context.symbol_table.add(function_name, function_value)
+            return function_value
+        return evaluate
+
+    def compile_FunctionCallNode(self, node, tail=False):
+        callee = self.compile(node.node_call)
+        arguments = [self.compile(arg_node) for arg_node in node.arg_node]
+        position_start, position_end = node.position_start, node.position_end
+
+        if tail:
+            def evaluate(context):
+                value_call = callee(context)
+                args = [argument(context) for argument in arguments]
+                if value_call.__class__ is Function or value_call.__class__ is Lambda:
+                    return TailCall(value_call, args, context, position_start, position_end)
+                return value_call.execute(args, context, position_start, position_end)
+            return evaluate
+
+        def evaluate(context):
+            value_call = callee(context)
+            args = [argument(context) for argument in arguments]
+            return value_call.execute(args, context, position_start, position_end)
+        return evaluate
+
+    def compile_LambdaNode(self, node):
+        lambda_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        body = self.compile_body(node.body_node)
+
+        def evaluate(context):
+            lambda_value = Lambda(lambda_name, arg_names, body)
+            if lambda_name:
+                context.symbol_table.add(lambda_name, lambda_value)
+            return lambda_value
+        return evaluate
+
+    @staticmethod
+    def compile_ContinueNode(node):
+        def evaluate(context):
+            raise ContinueSignal()
+        return evaluate
+
+    @staticmethod
+    def compile_BreakNode(node):
+        def evaluate(context):
+            raise BreakSignal()
+        return evaluate
+
+    def compile_ReturnNode(self, node):
+        value = self.compile_tail(node.node_to_return) if node.node_to_return else None
+
+        def evaluate(context):
+            raise ReturnSignal(value(context) if value else Number.null)
+        return evaluate
+
+    # Views over a FlatAST (see Parser.flatast) compile like the node classes they stand for
+    compile_FlatNumberNode = compile_NumberNode
+    compile_FlatBooleanNode = compile_BooleanNode
+    compile_FlatAccessNode = compile_AccessNode
+    compile_FlatUnaryOperationNode = compile_UnaryOperationNode
+    compile_FlatBinaryOperationNode = compile_BinaryOperationNode
+    compile_FlatWhileNode = compile_WhileNode
+    compile_FlatFunctionDefinitionNode = compile_FunctionDefinitionNode
+    compile_FlatFunctionCallNode = compile_FunctionCallNode
+    compile_FlatLambdaNode = compile_LambdaNode
+    compile_FlatContinueNode = compile_ContinueNode
+    compile_FlatBreakNode = compile_BreakNode
+    compile_FlatReturnNode = compile_ReturnNode
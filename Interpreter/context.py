@@ -2,8 +2,18 @@ from Interpreter.symboltable import SymbolTable
 
 
 class Context:
+    __slots__ = ('display_name', 'parent', 'symbol_table', 'parent_entry_pos')
+
     def __init__(self, display_name, parent=None, parent_entry_pos=None):
         self.display_name = display_name
         self.parent = parent
         self.symbol_table = SymbolTable(parent.symbol_table if parent else None)
         self.parent_entry_pos = parent_entry_pos
+
+    # Make the frame of a call that returned the frame of a new call, keeping its SymbolTable
+    def reuse(self, display_name, parent, parent_entry_pos):
+        self.display_name = display_name
+        self.parent = parent
+        self.symbol_table.reset(parent.symbol_table if parent else None)
+        self.parent_entry_pos = parent_entry_pos
+        return self
@@ -1,241 +1,258 @@
 from Interpreter.boolean import Boolean
 from Interpreter.context import Context
-from error import RunTimeError
+from error import ErrorException, RunTimeError
 from Interpreter.myfunction import Function
 from Interpreter.mylambda import Lambda
 from Lexer.mytoken import Tokens
 from Interpreter.number import Number
+from Interpreter.runtimeresult import TailCall, ContinueSignal, BreakSignal, ReturnSignal
+
+
+# Visitors that take a tail flag: a call, or the right side of '||', in tail position becomes a TailCall
+TAIL_VISITORS = {'visit_FunctionCallNode', 'visit_BinaryOperationNode', 'visit_FlatFunctionCallNode',
+                 'visit_FlatBinaryOperationNode'}
+
+
+# Frames of returned calls an Interpreter keeps for the next calls; deeper recursion allocates the rest
+MAX_FREE_FRAMES = 4096
 
 
 class Interpreter:
-    # Dynamically find and call the appropriate visit method for the given node
+    def __init__(self):
+        self.frames = []
+
+    # Check the arguments of a call to a Function or Lambda, made in context at position_start..position_end, and
+    # bind them in its frame: a Context below parent, entered at position entry (below context at position_start
+    # unless the call takes its caller's place), taken from the free-list when a returned call left one there.
+    # Returns (frame, error), the error being a RunTimeError for too many or too few arguments
+    def enter(self, function, args, context, position_start, position_end, parent=None, entry=None):
+        if parent is None:
+            parent, entry = context, position_start
+        arg_names = function.arg_names
+        if len(args) != len(arg_names):
+            if len(args) > len(arg_names):
+                details = f"{len(args) - len(arg_names)} too many arguments passed into '{function.name}'"
+            else:
+                details = f"{len(arg_names) - len(args)} too few arguments passed into '{function.name}'"
+            # A callee entered in its caller's place reports the error below the frame the caller was entered from
+            if parent is not context:
+                context = Context(function.name, parent, entry)
+            return None, RunTimeError(position_start, position_end, details, context)
+        frames = self.frames
+        if frames:
+            frame = frames.pop().reuse(function.name, parent, entry)
+        else:
+            frame = Context(function.name, parent, entry)
+        frame.symbol_table.bind(function.frame_layout(), args)
+        return frame, None
+
+    # Put the frame of a call that returned back on the free-list. Only frames nothing refers to any more may be
+    # left: values do not keep the context they were made in, and no error holds the frame
+    def leave(self, frame):
+        if len(self.frames) < MAX_FREE_FRAMES:
+            self.frames.append(frame)
+
+    # Evaluate a top-level statement in context and return (value, error), the error being the Error raised as
+    # ErrorException. A 'return', 'continue' or 'break' outside any function or loop ends the statement with no value.
+    # Recursion deeper than the Python stack allows is reported as a RunTimeError at the statement
+    def run_statement(self, node, context):
+        try:
+            return self.visit(node, context), None
+        except ErrorException as exception:
+            return None, exception.error
+        except (ReturnSignal, ContinueSignal, BreakSignal):
+            return None, None
+        except RecursionError:
+            return None, RunTimeError(node.position_start, node.position_end, "Maximum recursion depth exceeded",
+                                      context)
+
+    # Dynamically find and call the appropriate visit method for the given node. It returns the node's value; an
+    # error is raised as ErrorException and 'continue', 'break' and 'return' as the signals of
+    # Interpreter.runtimeresult
     def visit(self, node, context):
         method_name = f'visit_{type(node).__name__}'
         visitor = getattr(self, method_name, self.no_generic_visit)
         return visitor(node, context)
 
+    # Visit a node whose value is the value of the enclosing function: the body of a '->' function or a lambda, the
+    # last statement of a body or the value of a return
+    def visit_tail(self, node, context):
+        method_name = f'visit_{type(node).__name__}'
+        if method_name in TAIL_VISITORS:
+            return getattr(self, method_name)(node, context, True)
+        return self.visit(node, context)
+
     # Handle cases where a visit method is not defined for the node type
     @staticmethod
     def no_generic_visit(node, context):
-        result = RunTimeResult()
-        return result.failure(RunTimeError(node.position_start, node.position_end,
-                                           f"No visit_{type(node).__name__}"f" method defined", context))
+        raise ErrorException(RunTimeError(node.position_start, node.position_end,
+                                          f"No visit_{type(node).__name__}"f" method defined", context))
 
-    # Visit a number node and return its value
+    # Visit a number node and return its value (a shared Number for a small int)
     @staticmethod
     def visit_NumberNode(node, context):
-        result = RunTimeResult()
-        return result.success(Number(node.token_value.value).set_position(node.position_start,
-                                                                          node.position_end).set_context(context))
+        return Number.of(node.token_value.value)
+
+    # Visit a constant computed by Interpreter.optimizer and return its value
+    @staticmethod
+    def visit_ConstantNode(node, context):
+        return node.value_class.of(node.value)
 
     # Visit a boolean node and return its value
     @staticmethod
     def visit_BooleanNode(node, context):
-        result = RunTimeResult()
-        return result.success(Boolean(node.value).set_position(node.position_start, node.position_end)
-                              .set_context(context))
+        return Boolean.of(node.value)
 
     # Visit a while loop node and execute its body while the condition is true
     def visit_WhileNode(self, node, context):
-        result = RunTimeResult()
-        while True:
-            condition = result.register(self.visit(node.condition, context))
-            if result.error:
-                return None, result.error
-            if not condition.value:
+        visit = self.visit
+        while visit(node.condition, context).value:
+            try:
+                for statement in node.body:
+                    visit(statement, context)
+            except ContinueSignal:
+                continue
+            except BreakSignal:
                 break
-            continue_loop = False
-            for i in node.body:
-                value = result.register(self.visit(i, context))
-                if result.error:
-                    return result
-                if result.should_return():
-                    return result
-                elif result.loop_should_continue:
-                    continue_loop = False
-                    break
-                elif result.loop_should_break:
-                    return result.success(None)
-        return result.success(None)
+        return None
 
     # Visit a binary operation node and execute the operation on its operands
-    def visit_BinaryOperationNode(self, node, context):
-        result = RunTimeResult()
-        left = result.register(self.visit(node.left, context))
-        if result.error:
-            return result
-        if result.should_return():
-            return result
+    def visit_BinaryOperationNode(self, node, context, tail=False):
+        left = self.visit(node.left, context)
+        visit_right = self.visit
         if node.operator.type == Tokens.AND:
             if left.value == 0:
-                return result.success(left)
+                return left
         elif node.operator.type == Tokens.OR:
             if left.value == 1:
-                return result.success(left)
+                return left
+            # A false left side makes the right side the result, so in tail position the right side is one too
+            if tail and not left.value:
+                visit_right = self.visit_tail
 
-        right = result.register(self.visit(node.right, context))
-        if result.error:
-            return result
-        obj, error = left.binary_opr(node.operator, right)
+        right = visit_right(node.right, context)
+        if right.__class__ is TailCall:
+            return right
+        obj, error = left.binary_opr(node.operator, right, context, node.right.position_start, node.right.position_end)
         if error:
-            return result.failure(error)
-        else:
-            return result.success(obj.set_position(node.position_start, node.position_end))
+            raise ErrorException(error)
+        return obj
 
     # Visit a unary operation node and execute the operation on its operand
     def visit_UnaryOperationNode(self, node, context):
-        result = RunTimeResult()
-        obj = result.register(self.visit(node.operand, context))
-        if result.error:
-            return result
-        if result.should_return():
-            return result
-        handler, error = obj.unary_opr(node.operator)
+        obj = self.visit(node.operand, context)
+        handler, error = obj.unary_opr(node.operator, context)
         if error:
-            return result.failure(error)
+            raise ErrorException(error)
         obj, error = handler(obj)
         if error:
-            return result.failure(error)
-        else:
-            return result.success(obj.set_position(node.position_start, node.position_end))
+            raise ErrorException(error)
+        return obj
 
-    # Visit a node that accesses a variable and return its value from the symbol table
+    # Visit a node that accesses a variable and return its value from the symbol table. Values are immutable, so
+    # the value bound to the name is returned itself; an error in using it is reported at the node
     @staticmethod
     def visit_AccessNode(node, context):
-        result = RunTimeResult()
-        name_ = node.token_name.value
-        value = context.symbol_table.get(name_)
+        value = context.symbol_table.get(node.token_name.value)
+        if value is None:
+            raise ErrorException(RunTimeError(node.position_start, node.position_end,
+                                              f"'{node.token_name.value}' is not defined", context))
+        return value
+
+    # Visit a parameter read resolved by Interpreter.resolver: its value is in a slot of the function's frame. A slot
+    # holding None (an argument without a value) is looked up by name, as an AccessNode is without the resolver
+    @staticmethod
+    def visit_SlotAccessNode(node, context):
+        value = context.symbol_table.slots[node.slot]
         if value is None:
-            return result.failure(RunTimeError(node.position_start, node.position_end,
-                                               f"'{node.token_name.value}' is not defined", context))
-        value = value.copy().set_position(node.position_start, node.position_end).set_context(context)
-        return result.success(value)
+            return Interpreter.visit_AccessNode(node, context)
+        return value
 
     # Visit a function definition node and create a function object
     @staticmethod
     def visit_FunctionDefinitionNode(node, context):
-        result = RunTimeResult()
         function_name = node.token_name.value if node.token_name else None
         body_node = node.body
         arg_names = [arg_name.value for arg_name in node.arg_name]
-        function_value = Function(function_name, arg_names, body_node, node.should_auto_return).set_context(context).set_position(node.position_start, node.position_end)
+        function_value = Function(function_name, arg_names, body_node, node.should_auto_return)
 
         if node.token_name:
             context.symbol_table.add(function_name, function_value)
-        return result.success(function_value)
+        return function_value
 
     # Visit a function call node, execute the function, and return the result
-    def visit_FunctionCallNode(self, node, context):
-        result = RunTimeResult()
-        args = []
-        value_call = result.register(self.visit(node.node_call, context))
-        if result.error:
-            return result
-        value_call = value_call.copy().set_position(node.position_start, node.position_end)
-        new_context = Context(value_call.name, value_call.context, value_call.position_start)
-        value_call.set_context(new_context)
-        for arg_node in node.arg_node:
-            args.append(result.register(self.visit(arg_node, context)))
-            if result.error:
-                return result
-        return_value = result.register(value_call.execute(args))
-        if result.error:
-            return result
-        return result.success(return_value.set_position(node.position_start, node.position_end).set_context(context))
+    def visit_FunctionCallNode(self, node, context, tail=False):
+        value_call = self.visit(node.node_call, context)
+        args = [self.visit(arg_node, context) for arg_node in node.arg_node]
+        if tail and isinstance(value_call, (Function, Lambda)):
+            return TailCall(value_call, args, context, node.position_start, node.position_end)
+        return value_call.execute(args, context, node.position_start, node.position_end)
 
     # Visit a lambda function node and create a lambda object
     @staticmethod
     def visit_LambdaNode(node, context):
-        result = RunTimeResult()
         lambda_name = node.var_name_tok.value if node.var_name_tok else None
         body_node = node.body_node
         arg_names = [arg_name.value for arg_name in node.arg_name_toks]
-        lambda_value = Lambda(lambda_name, arg_names, body_node).set_context(context).set_position(node.position_start, node.position_end)
+        lambda_value = Lambda(lambda_name, arg_names, body_node)
         if node.var_name_tok:
             context.symbol_table.add(lambda_name, lambda_value)
 
-        return result.success(lambda_value)
+        return lambda_value
 
     # Visit a continue node, signaling the loop to continue
     @staticmethod
     def visit_ContinueNode(node, context):
-        result = RunTimeResult()
-        return result.success_continue()
+        raise ContinueSignal()
 
     # Visit a return node and return the value from the function
     def visit_ReturnNode(self, node, context):
-        result = RunTimeResult()
         if node.node_to_return:
-            value = result.register(self.visit(node.node_to_return, context))
-            if result.error:
-                return result
-        else:
-            value = Number.null
-
-        return result.success_return(value)
+            raise ReturnSignal(self.visit_tail(node.node_to_return, context))
+        raise ReturnSignal(Number.null)
 
     # Visit a break node, signaling the loop to break
     @staticmethod
     def visit_BreakNode(node, context):
-        result = RunTimeResult()
-        return result.success_break()
+        raise BreakSignal()
+
+    # Evaluate a subtree compiled by Interpreter.compiler
+    @staticmethod
+    def visit_CompiledNode(node, context):
+        return node.evaluate(context)
 
+    # Run bytecode compiled by Interpreter.bytecode on the virtual machine
+    @staticmethod
+    def visit_Code(node, context):
+        from Interpreter.vm import VirtualMachine
+        return VirtualMachine.run(node, context)
 
-class RunTimeResult:
-    def __init__(self):
-        self.value = None
-        self.error = None
-
-    # Register a result from another operation
-    def register(self, res):
-        if res.error:
-            self.error = res.error
-        self.function_return_value = res.function_return_value
-        self.function_should_return = res.function_should_return
-        self.loop_should_continue = res.loop_should_continue
-        self.loop_should_break = res.loop_should_break
-        return res.value
-
-    # Reset the runtime result to its initial state
-    def reset(self):
-        self.value = None
-        self.error = None
-        self.function_return_value = None
-        self.function_should_return = False
-        self.loop_should_continue = False
-        self.loop_should_break = False
-
-    # Set a successful result
-    def success(self, value):
-        self.reset()
-        self.value = value
-        return self
-
-    # Set a successful result
-    def success_continue(self):
-        self.reset()
-        self.loop_should_continue = True
-        return self
-
-    # Indicate a loop should break
-    def success_break(self):
-        self.reset()
-        self.loop_should_break = True
-        return self
-
-    # Set a successful return value from a function
-    def success_return(self, value):
-        self.reset()
-        self.function_return_value = value
-        self.function_should_return = True
-        return self
-
-    # Check if the function should return
-    def should_return(self):
-        return self.function_should_return
-
-    # Set an error result
-    def failure(self, error):
-        self.reset()
-        self.error = error
-        return self
+    # Run Python code generated by Interpreter.transpiler; a Python exception escaping it, other than the errors and
+    # signals of the language, is annotated with the .lambda line it was raised for
+    @staticmethod
+    def visit_TranspiledNode(node, context):
+        from Interpreter.transpiler import annotate
+        try:
+            return node.evaluate(context)
+        except (ErrorException, ReturnSignal, ContinueSignal, BreakSignal):
+            raise
+        except Exception as exception:
+            annotate(exception)
+            raise
+
+    # Views over a FlatAST (see Parser.flatast) have the attributes of the node classes they stand for
+    visit_FlatNumberNode = visit_NumberNode
+    visit_FlatBooleanNode = visit_BooleanNode
+    visit_FlatAccessNode = visit_AccessNode
+    visit_FlatUnaryOperationNode = visit_UnaryOperationNode
+    visit_FlatBinaryOperationNode = visit_BinaryOperationNode
+    visit_FlatWhileNode = visit_WhileNode
+    visit_FlatFunctionDefinitionNode = visit_FunctionDefinitionNode
+    visit_FlatFunctionCallNode = visit_FunctionCallNode
+    visit_FlatLambdaNode = visit_LambdaNode
+    visit_FlatContinueNode = visit_ContinueNode
+    visit_FlatReturnNode = visit_ReturnNode
+    visit_FlatBreakNode = visit_BreakNode
+
+
+Function.interpreter = Interpreter()
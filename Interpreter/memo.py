@@ -0,0 +1,232 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+from Interpreter.boolean import Boolean
+from Interpreter.bytecode import Code
+from Interpreter.compiler import CompiledNode
+from Interpreter.myfunction import Function, BuiltInFunction, execute_tail_calls
+from Interpreter.mylambda import Lambda
+from Interpreter.number import Number
+
+# Built-in functions with side effects; a call whose body can reach one of them is never memoized
+IMPURE_BUILTINS = frozenset({'print', 'clear', 'input_int'})
+
+# Node kinds analyse_body() walks, by the name of the Parser.astNode class (a FlatAST view has the same name after
+# 'Flat'), mapped to the attributes holding their children
+CHILDREN = {
+    'NumberNode': (),
+    'BooleanNode': (),
+    'ContinueNode': (),
+    'BreakNode': (),
+    'UnaryOperationNode': ('operand',),
+    'BinaryOperationNode': ('left', 'right'),
+    'WhileNode': ('condition', 'body'),
+    'FunctionCallNode': ('node_call', 'arg_node'),
+    'ReturnNode': ('node_to_return',),
+}
+
+
+# Names a function body reads that its parameters do not bind (the bodies of nested functions and lambdas
+# included) and a digest of the body's structure: node kinds, names, literals and operators but not positions, so
+# the same source gives the same digest in every run and any edit to the body changes it. A body compiled by another
+# engine is analysed through the node it was compiled from. None when the body holds a node that cannot be analysed
+def analyse_body(body, parameters):
+    names = set()
+    digest = hashlib.sha256()
+    pending = [(body, frozenset(parameters))]
+    while pending:
+        node, bound = pending.pop()
+        if node is None:
+            digest.update(b'None;')
+            continue
+        if isinstance(node, list):
+            digest.update(f'list {len(node)};'.encode())
+            pending.extend((statement, bound) for statement in reversed(node))
+            continue
+        if isinstance(node, (CompiledNode, Code)) or type(node).__name__ == 'TranspiledNode':
+            pending.append((node.node, bound))
+            continue
+        kind = type(node).__name__
+        if kind.startswith('Flat'):
+            kind = kind[4:]
+        if kind == 'NumberNode':
+            value = node.token_value.value
+            details = type(value).__name__, value
+            children = ()
+        elif kind == 'ConstantNode':
+            details = node.value_class.__name__, type(node.value).__name__, node.value
+            children = ()
+        elif kind == 'BooleanNode':
+            details = node.value.value,
+            children = ()
+        elif kind == 'AccessNode' or kind == 'SlotAccessNode':
+            details = node.token_name.value,
+            children = ()
+            if node.token_name.value not in bound:
+                names.add(node.token_name.value)
+        elif kind == 'FunctionDefinitionNode':
+            arg_names = tuple(arg_name.value for arg_name in node.arg_name)
+            details = node.token_name.value if node.token_name else None, arg_names, node.should_auto_return
+            pending.append((node.body, bound | set(arg_names)))
+            children = ()
+        elif kind == 'LambdaNode':
+            arg_names = tuple(arg_name.value for arg_name in node.arg_name_toks)
+            details = node.var_name_tok.value if node.var_name_tok else None, arg_names
+            pending.append((node.body_node, bound | set(arg_names)))
+            children = ()
+        elif kind in CHILDREN:
+            details = (node.operator.type,) if 'Operation' in kind else ()
+            children = CHILDREN[kind]
+        else:
+            return None
+        digest.update(f'{(kind,) + details!r};'.encode())
+        pending.extend((getattr(node, child), bound) for child in reversed(children))
+    return frozenset(names), digest.hexdigest()
+
+
+# Memo table of Function and Lambda calls. Values are immutable and there is no assignment, so a call whose body
+# cannot reach print, clear or input_int returns the same value whenever it gets the same arguments and its body
+# reads the same bindings. Scoping is dynamic, so those bindings are part of the key: the callee's body, the
+# values of the arguments and the values, seen from the caller, of every name the callee and the functions it
+# can reach read. Functions are keyed by the digest of their body, so keys are the same in every run and a
+# Interpreter.memostore.MemoStore can keep the results of slow calls across runs. Only Number and Boolean results
+# are kept, and errors never are; the least recently used entry is dropped when the table holds `size` entries
+class MemoTable:
+    def __init__(self, size=4096, store=None):
+        self.size = size
+        self.store = store
+        self.entries = OrderedDict()
+        self.analyses = {}
+        self.hits = 0
+        self.misses = 0
+        self.impure = 0
+        self.evictions = 0
+
+    # Run a call made in context at position_start..position_end through the table: a hit returns the stored value,
+    # a miss executes the call and stores its value (in the store as well when it took at least store.min_time
+    # seconds). An error raised by the call passes through and is not stored
+    def call(self, function, args, context, position_start, position_end):
+        key, value = self.lookup(function, args, context)
+        if value is not None:
+            return value
+        if key is None:
+            return execute_tail_calls(function, args, context, position_start, position_end)
+        start = time.perf_counter()
+        value = execute_tail_calls(function, args, context, position_start, position_end)
+        self.record(key, value, start)
+        return value
+
+    # The first half of call(), for engines that make the call themselves: (key, value) of a call made in context,
+    # the value being the stored one on a hit and None on a miss, and the key None when the call cannot be memoized
+    def lookup(self, function, args, context):
+        key = self.key(function, args, context)
+        if key is None:
+            self.impure += 1
+            return None, None
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        elif self.store is not None:
+            entry = self.store.load(key)
+            if entry is not None:
+                self.remember(key, entry)
+        if entry is not None:
+            self.hits += 1
+            value_class, value = entry
+            return key, value_class.of(value)
+        self.misses += 1
+        return key, None
+
+    # The second half of call(): store the value a missed call returned, the call having started at perf_counter()
+    # time start
+    def record(self, key, value, start):
+        if (value.__class__ is Number or value.__class__ is Boolean) and type(value.value) in (int, float, bool):
+            entry = (value.__class__, value.value)
+            self.remember(key, entry)
+            if self.store is not None and time.perf_counter() - start >= self.store.min_time:
+                self.store.save(key, entry)
+
+    def remember(self, key, entry):
+        self.entries[key] = entry
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    # Key of a call made in context, or None when the call may have side effects or reads a value the key cannot
+    # hold
+    def key(self, function, args, context):
+        arg_keys = []
+        pending = [function]
+        for arg in args:
+            arg_key = self.value_key(arg)
+            if arg_key is None:
+                return None
+            arg_keys.append(arg_key)
+            if arg.__class__ is Function or arg.__class__ is Lambda:
+                pending.append(arg)
+
+        symbol_table = context.symbol_table
+        bindings = {}
+        seen = set()
+        while pending:
+            callee = pending.pop()
+            body = callee.body_node
+            if id(body) in seen:
+                continue
+            seen.add(id(body))
+            analysis = self.analyse(body, callee.arg_names)
+            if analysis is None:
+                return None
+            for name in analysis[0]:
+                if name in bindings:
+                    continue
+                value = symbol_table.get(name)
+                if value is None:
+                    bindings[name] = None
+                    continue
+                value_key = self.value_key(value)
+                if value_key is None:
+                    return None
+                bindings[name] = value_key
+                if value.__class__ is Function or value.__class__ is Lambda:
+                    pending.append(value)
+        function_key = self.value_key(function)
+        if function_key is None:
+            return None
+        return function_key, tuple(arg_keys), tuple(sorted(bindings.items()))
+
+    # analyse_body() of a body, computed once per body object. The table keeps the bodies it analysed so that their
+    # id() is not reused by another body, and starts over when it holds more than `size` of them
+    def analyse(self, body, parameters):
+        analysis = self.analyses.get(id(body))
+        if analysis is None:
+            if len(self.analyses) >= self.size:
+                self.analyses.clear()
+            analysis = (body, analyse_body(body, parameters))
+            self.analyses[id(body)] = analysis
+        return analysis[1]
+
+    # Hashable stand-in for a value, the same in every run, or None for a value a memoized call must not depend on
+    def value_key(self, value):
+        value_class = value.__class__
+        if value_class is Number or value_class is Boolean:
+            if type(value.value) not in (int, float, bool):
+                return None
+            return value_class.__name__, type(value.value).__name__, value.value
+        if value_class is Function or value_class is Lambda:
+            analysis = self.analyse(value.body_node, value.arg_names)
+            if analysis is None:
+                return None
+            return value_class.__name__, value.name, tuple(value.arg_names), analysis[1], \
+                getattr(value, 'should_auto_return', None)
+        if value_class is BuiltInFunction and value.name not in IMPURE_BUILTINS:
+            return 'BuiltInFunction', value.name
+        return None
+
+    def stats(self):
+        stats = f"memo table: {self.hits} hits, {self.misses} misses, {self.impure} impure calls, " \
+                f"{self.evictions} evictions, {len(self.entries)}/{self.size} entries"
+        if self.store is not None:
+            stats += f"; {self.store.stats()}"
+        return stats
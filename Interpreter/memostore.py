@@ -0,0 +1,133 @@
+import hashlib
+import sqlite3
+
+from Interpreter.boolean import Boolean
+from Interpreter.number import Number
+
+# Bump whenever MemoTable keys or the digest of function bodies change shape, so that stale entries are never loaded
+FORMAT_VERSION = 1
+
+# Seconds a store waits for another process's write lock before the access counts as a miss
+TIMEOUT = 0.1
+# Hits whose recency is queued before it is written; a save and close() write the queue as well
+USED_BATCH = 256
+
+VALUE_CLASSES = {'Number': Number, 'Boolean': Boolean}
+VALUE_TYPES = {'int': int, 'float': float, 'bool': lambda text: text == 'True'}
+
+
+# SQLite file of MemoTable entries that outlives the process, so a program run again with the same inputs reuses
+# the results of its slow pure calls. Rows are keyed by a hash of the MemoTable key, which holds the digest of the
+# called function's body, of every function it can reach and the values of the arguments and of the names they
+# read: editing a function changes its keys, and the entries of the old source are never hit again and age out.
+# The store holds at most `size` entries and drops the least recently used tenth when it is full. A file that
+# cannot be read or written counts as a miss, like a bad ASTCache file; one that cannot be opened as a database
+# leaves the store disabled. Every save is committed at once, so other processes sharing the file wait for the
+# write lock for one statement at most and a killed run keeps what it saved
+class MemoStore:
+    def __init__(self, path, size=100_000, min_time=0.001):
+        self.path = path
+        self.size = size
+        self.min_time = min_time
+        self.used = {}
+        self.clock, self.count = 0, 0
+        try:
+            self.connection = sqlite3.connect(path, timeout=TIMEOUT)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS memo "
+                                    "(key TEXT PRIMARY KEY, class TEXT, type TEXT, value TEXT, used INTEGER)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS memo_used ON memo (used)")
+            self.connection.commit()
+            self.clock, self.count = self.connection.execute("SELECT COALESCE(MAX(used), 0), COUNT(*) FROM memo") \
+                .fetchone()
+        except sqlite3.Error:
+            self.connection = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    # Row key of a MemoTable key; the repr of a key is made of names, digests and numbers only
+    @staticmethod
+    def digest(key):
+        return hashlib.sha256(f"lambda-memo-{FORMAT_VERSION}\0{key!r}".encode('utf-8')).hexdigest()
+
+    # Return the (value class, value) stored for key, or None on a miss. The hit's recency is queued, not written
+    def load(self, key):
+        if self.connection is None:
+            self.misses += 1
+            return None
+        digest = self.digest(key)
+        try:
+            row = self.connection.execute("SELECT class, type, value FROM memo WHERE key = ?", (digest,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is not None:
+            self.clock += 1
+            self.used[digest] = self.clock
+            if len(self.used) >= USED_BATCH:
+                self.flush()
+        if row is None or row[0] not in VALUE_CLASSES or row[1] not in VALUE_TYPES:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return VALUE_CLASSES[row[0]], VALUE_TYPES[row[1]](row[2])
+
+    # Store the (value class, value) of key, evicting the least recently used entries when the store is full
+    def save(self, key, entry):
+        if self.connection is None:
+            return
+        value_class, value = entry
+        digest = self.digest(key)
+        self.clock += 1
+        self.used.pop(digest, None)
+        try:
+            self.write_used()
+            stored = self.connection.execute("SELECT 1 FROM memo WHERE key = ?", (digest,)).fetchone()
+            self.connection.execute("INSERT OR REPLACE INTO memo VALUES (?, ?, ?, ?, ?)",
+                                    (digest, value_class.__name__, type(value).__name__, repr(value), self.clock))
+            self.writes += 1
+            if stored is None:
+                self.count += 1
+            if self.count > self.size:
+                evicted = self.count - self.size + self.size // 10
+                self.connection.execute("DELETE FROM memo WHERE key IN "
+                                        "(SELECT key FROM memo ORDER BY used LIMIT ?)", (evicted,))
+                self.count, = self.connection.execute("SELECT COUNT(*) FROM memo").fetchone()
+                self.evictions += evicted
+            self.connection.commit()
+        except sqlite3.Error:
+            self.rollback()
+
+    # Write the queued recency of hits
+    def write_used(self):
+        if self.used:
+            self.connection.executemany("UPDATE memo SET used = ? WHERE key = ?",
+                                        [(used, digest) for digest, used in self.used.items()])
+            self.used.clear()
+
+    # Write and commit the queued recency of hits; when the file is locked or unwritable it is dropped
+    def flush(self):
+        try:
+            self.write_used()
+            self.connection.commit()
+        except sqlite3.Error:
+            self.rollback()
+
+    def rollback(self):
+        self.used.clear()
+        try:
+            self.connection.rollback()
+        except sqlite3.Error:
+            pass
+
+    # Write the queued recency of hits and close the file
+    def close(self):
+        if self.connection is None:
+            return
+        self.flush()
+        self.connection.close()
+        self.connection = None
+
+    def stats(self):
+        return f"memo store: {self.hits} hits, {self.misses} misses, {self.writes} writes, " \
+               f"{self.evictions} evictions, {self.count}/{self.size} entries"
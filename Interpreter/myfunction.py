@@ -1,80 +1,137 @@
 import os
 
 from Interpreter.context import Context
-from error import RunTimeError
+from error import ErrorException, RunTimeError
 from Interpreter.number import Number
 from Interpreter.mytype import Type
+from Interpreter.runtimeresult import TailCall, ContinueSignal, BreakSignal, ReturnSignal
+from Interpreter.symboltable import make_layout
+
+
+# Run a call to a Function or Lambda made in context at position_start..position_end, then each call its body
+# returns as a TailCall, in one loop instead of nested execute() calls, so tail recursion takes constant Python
+# stack. When the caller's frame holds nothing but names the callee rebinds, the callee is entered in the caller's
+# place and the context chain does not grow either. The frames of the loop go back to the interpreter's free-list
+# once it returns a value; after an error they are left to the raised RunTimeError, whose traceback walks them
+def execute_tail_calls(function, args, context, position_start, position_end):
+    interpreter = Function.interpreter
+    parent, entry = context, position_start
+    frames = []
+    replaced = None
+    while True:
+        frame, error = interpreter.enter(function, args, context, position_start, position_end, parent, entry)
+        if error:
+            raise ErrorException(error)
+        if replaced is not None:
+            interpreter.leave(replaced)
+        frames.append(frame)
+        value = function.evaluate(interpreter, frame)
+        if value.__class__ is not TailCall:
+            for frame in frames:
+                interpreter.leave(frame)
+            return value
+        tail_call = value
+        function, args, context = tail_call.function, tail_call.args, tail_call.context
+        position_start, position_end = tail_call.position_start, tail_call.position_end
+        if context is frame and context.symbol_table.symbols.keys() <= set(function.arg_names) \
+                and context.symbol_table.layout.keys() <= set(function.arg_names):
+            parent, entry = context.parent, context.parent_entry_pos
+            replaced = frames.pop()
+        else:
+            parent, entry = context, position_start
+            replaced = None
+
+
+# Evaluate the body of a Function or Lambda in the frame its arguments are bound in and return its value. A '->' body
+# is one expression, a multi-line body is the list of its statements and yields the value of the last one or of the
+# 'return' that ends it; a 'continue' or 'break' outside a loop is a statement whose value is None
+def evaluate_body(interpreter, body, exec_ctx):
+    statements = body if isinstance(body, list) else [body]
+    value = Number.null
+    last = len(statements) - 1
+    try:
+        for index, statement in enumerate(statements):
+            try:
+                if index == last:
+                    value = interpreter.visit_tail(statement, exec_ctx)
+                else:
+                    value = interpreter.visit(statement, exec_ctx)
+            except (ContinueSignal, BreakSignal):
+                value = None
+    except ReturnSignal as signal:
+        value = signal.value
+    return value
 
 
 class RegularFunction(Type):
-    def __init__(self, value, arg_names, body_node, position_start=None, position_end=None, context=None):
-        super().__init__(value, position_start, position_end, context)
+    __slots__ = ('name', 'arg_names', 'body_node')
+
+    def __init__(self, value, arg_names, body_node):
+        super().__init__(value)
         self.name = value or "<anonymous>"
         self.arg_names = arg_names
         self.body_node = body_node
 
-    # Generate a new context for the function execution
-    def generate_new_context(self):
-        new_context = Context(self.name, self.context, self.position_start)
+    # Generate a new context for the function execution, called in context at position_start
+    def generate_new_context(self, context, position_start):
+        new_context = Context(self.name, context, position_start)
         return new_context
 
-    # Check if the number of arguments passed matches the expected number of arguments
-    def check_args(self, arg_names, args):
-        from Interpreter.interpreter import RunTimeResult
-        result = RunTimeResult()
+    # Check if the number of arguments passed matches the expected number of arguments; an error is reported at
+    # the span of the call, in the context of the caller
+    def check_args(self, arg_names, args, context, position_start, position_end):
         if len(args) > len(arg_names):
-            return result.failure(RunTimeError(self.position_start, self.position_end, f"{len(args) - len(arg_names)} "f"too "f"many arguments passed into "f"'{self.name}'", self.context))
+            raise ErrorException(RunTimeError(position_start, position_end, f"{len(args) - len(arg_names)} "f"too "f"many arguments passed into "f"'{self.name}'", context))
         if len(args) < len(arg_names):
-            return result.failure(RunTimeError(self.position_start,
-                                               self.position_end, f"{len(arg_names) - len(args)} "f"too few arguments passed into "f"'{self.name}'", self.context))
-        return result.success(None)
+            raise ErrorException(RunTimeError(position_start,
+                                              position_end, f"{len(arg_names) - len(args)} "f"too few arguments passed into "f"'{self.name}'", context))
 
     # Populate the arguments in the function's execution context
     @staticmethod
     def populate_args(args_names, args, exec_ctx):
         for i in range(len(args)):
-            arg_name = args_names[i]
-            arg_value = args[i]
-            arg_value.set_context(exec_ctx).set_position(arg_value.position_start, arg_value.position_end)
-            exec_ctx.symbol_table.add(arg_name, arg_value)
+            exec_ctx.symbol_table.add(args_names[i], args[i])
 
     # Check arguments and populate them in the context if valid
-    def check_and_populate_args(self, arg_names, args, exec_ctx):
-        from Interpreter.interpreter import RunTimeResult
-        result = RunTimeResult()
-        result.register(self.check_args(arg_names, args))
-        if result.error:
-            return result
+    def check_and_populate_args(self, arg_names, args, exec_ctx, context, position_start, position_end):
+        self.check_args(arg_names, args, context, position_start, position_end)
         self.populate_args(arg_names, args, exec_ctx)
-        return result
 
 
 class Function(RegularFunction):
-    def __init__(self, value, arg_names, body_node, should_auto_return, position_start=None, position_end=None, context=None):
-        super().__init__(value, position_start, position_end, context)
-        self.name = value or "<anonymous>"
-        self.arg_names = arg_names
-        self.body_node = body_node
-        self.should_auto_return = should_auto_return
+    __slots__ = ('should_auto_return', 'layout')
 
-    # Execute the function with the provided arguments
-    def execute(self, args):
-        from Interpreter.interpreter import Interpreter, RunTimeResult
-        result = RunTimeResult()
-        interpreter = Interpreter()
-        exec_ctx = self.generate_new_context()
-        result.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
-        if result.error:
-            return result
-        value = result.register(interpreter.visit(self.body_node, exec_ctx))
-        if result.error:
-            return result
-        return result.success(value)
+    def __init__(self, value, arg_names, body_node, should_auto_return):
+        super().__init__(value, arg_names, body_node)
+        self.should_auto_return = should_auto_return
+        self.layout = None
+
+    # Slots of the parameters in the argument list of the function's frames, shared by its copies
+    def frame_layout(self):
+        if self.layout is None:
+            self.layout = make_layout(self.arg_names)
+        return self.layout
+
+    # Interpreter.memo.MemoTable that calls to Functions and Lambdas go through, e.g.
+    # Function.memo = MemoTable(4096); None disables memoization
+    memo = None
+    # The Interpreter that runs the bodies of all Function and Lambda calls and keeps the free-list of their frames;
+    # Interpreter.interpreter sets it once the class is defined
+    interpreter = None
+
+    # Execute the function with the provided arguments, called in context at position_start..position_end
+    def execute(self, args, context, position_start, position_end):
+        if Function.memo is not None:
+            return Function.memo.call(self, args, context, position_start, position_end)
+        return execute_tail_calls(self, args, context, position_start, position_end)
+
+    # Evaluate the body in the frame its arguments are bound in; a call in tail position is returned as a TailCall
+    def evaluate(self, interpreter, exec_ctx):
+        return evaluate_body(interpreter, self.body_node, exec_ctx)
 
     def copy(self):
-        copy = Function(self.name, self.arg_names, self.body_node, self.should_auto_return, self.position_start, self.position_end, self.context)
-        copy.set_context(self.context)
-        copy.set_position(self.position_start, self.position_end)
+        copy = Function(self.name, self.arg_names, self.body_node, self.should_auto_return)
+        copy.layout = self.layout
         return copy
 
     def __repr__(self):
@@ -82,56 +139,42 @@ class Function(RegularFunction):
 
 
 class BuiltInFunction(RegularFunction):
-    def __init__(self, value, arg_names=None, body_node=None, position_start=None, position_end=None, context=None):
-        super().__init__(value, arg_names, body_node, position_start, position_end, context)
-        self.name = value or "<anonymous>"
+    __slots__ = ()
+
+    def __init__(self, value, arg_names=None, body_node=None):
+        super().__init__(value, arg_names, body_node)
 
-    # Execute the built-in function with the provided arguments
-    def execute(self, args):
-        from Interpreter.interpreter import RunTimeResult
-        result = RunTimeResult()
-        exec_ctx = self.generate_new_context()
+    # Execute the built-in function with the provided arguments, called in context at position_start..position_end
+    def execute(self, args, context, position_start, position_end):
+        exec_ctx = self.generate_new_context(context, position_start)
         method_name = f'execute_{self.name}'
-        method = getattr(self, method_name, self.no_visit_method)
-
-        result.register(self.check_and_populate_args(self.arg_names, args, exec_ctx))
-        if result.error:
-            return result
-        return_value = result.register(method(exec_ctx))
-        if result.error:
-            return result
-        return result.success(return_value)
-
-    # Handle the case where the function is not defined
-    def no_visit_method(self):
-        from Interpreter.interpreter import RunTimeResult
-        result = RunTimeResult()
-        return result.failure(RunTimeError(self.position_start, self.position_end, f"'{self.name}' is not defined", self.context))
+        method = getattr(self, method_name, None)
+
+        self.check_and_populate_args(self.arg_names, args, exec_ctx, context, position_start, position_end)
+        if method is None:
+            raise ErrorException(RunTimeError(position_start, position_end, f"'{self.name}' is not defined",
+                                              context))
+        return method(exec_ctx)
 
     def copy(self):
-        copy = BuiltInFunction(self.name, self.arg_names, self.body_node, self.position_start, self.position_end, self.context)
-        copy.set_position(self.position_start, self.position_end)
-        return copy
+        return BuiltInFunction(self.name, self.arg_names, self.body_node)
 
     # Built-in print function: prints the value passed to it
     def execute_print(self, exec_ctx):
-        from Interpreter.interpreter import RunTimeResult
         print(str(exec_ctx.symbol_table.get('value')))
-        return RunTimeResult().success(Number.null)
+        return Number.null
 
     execute_print.arg_names = ['value']
 
     # Built-in clear function: clears the console screen
     def execute_clear(self):
-        from Interpreter.interpreter import RunTimeResult
         os.system('cls' if os.name == 'nt' else 'clear')
-        return RunTimeResult().success(Number.null)
+        return Number.null
 
     execute_clear.arg_names = []
 
     # Built-in input function: takes an integer input from the user
     def execute_input_int(self):
-        from Interpreter.interpreter import RunTimeResult
         while True:
             txt = input()
             try:
@@ -139,20 +182,18 @@ class BuiltInFunction(RegularFunction):
                 break
             except ValueError:
                 print("Invalid input. Please enter a number.")
-        return RunTimeResult().success(Number(number))
+        return Number.of(number)
     execute_input_int.arg_names = []
 
     @staticmethod
     def execute_is_number(exec_ctx):
-        from Interpreter.interpreter import RunTimeResult
         is_number = isinstance(exec_ctx.symbol_table.get('value'), Number)
-        return RunTimeResult().success(Number.true if is_number else Number.false)
+        return Number.true if is_number else Number.false
 
     @staticmethod
     def execute_is_function(exec_ctx):
-        from Interpreter.interpreter import RunTimeResult
         is_function = isinstance(exec_ctx.symbol_table.get('value'), RegularFunction)
-        return RunTimeResult().success(Number.true if is_function else Number.false)
+        return Number.true if is_function else Number.false
 
     def __repr__(self):
         return f"<built-in function {self.name}>"
@@ -1,35 +1,35 @@
 from error import RunTimeError
 
 
-class Type:
-    def __init__(self, value, position_start=None, position_end=None, context=None):
-        self.value = value
-        self.position_start = position_start
-        self.position_end = position_end
-        self.context = context
+# Error a binary operation handler returns when its right operand is invalid (such as a zero divisor); binary_opr()
+# reports it as a RunTimeError at the span of the right operand
+class OperationError:
+    __slots__ = ('details',)
+
+    def __init__(self, details):
+        self.details = details
 
-    # Set the position of the value (used for error reporting and tracing)
-    def set_position(self, position_start=None, position_end=None):
-        self.position_start = position_start
-        self.position_end = position_end
-        return self
 
-    # Set the context of the value (used to track where in the code the value originated)
-    def set_context(self, context=None):
-        self.context = context
-        return self
+# A value holds its payload only: no position and no context. Errors are built from the span of the AST node being
+# evaluated and the context it is evaluated in, so a value can be shared and does not keep a chain of frames alive
+class Type:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
 
     def __repr__(self):
         return f"{self}"
 
-    # Perform a binary operation between self and another object
-    def binary_opr(self, operation_token, other):
+    # Perform a binary operation between self and another object. Values are shared and carry no position, so an
+    # error is reported in the context the operation is evaluated in, at the operator or at the right operand's span
+    def binary_opr(self, operation_token, other, context, position_start, position_end):
         if operation_token.type == '||':
             if self.value:
                 return self, None
             else:
                 return other, None
-        handler, error = self.search_binary_operation(operation_token)
+        handler, error = self.search_binary_operation(operation_token, context)
         if error:
             return None, error
         if handler is None:
@@ -40,20 +40,19 @@ class Type:
             return None, f"Handler for '{operation_token}' returned None"
         obj, error = result
         if error:
+            if error.__class__ is OperationError:
+                error = RunTimeError(position_start, position_end, error.details, context)
             return None, error
-        obj.set_context(self.context)
-        obj.set_position(self.position_start, other.position_end)
         return obj, None
 
     # Perform a unary operation on self
-    def unary_opr(self, operation_token):
-        handler, error = self.search_unary_operation(operation_token)
+    def unary_opr(self, operation_token, context):
+        handler, error = self.search_unary_operation(operation_token, context)
         if error:
             return None, error
         obj, error = handler(self)
         if error:
             return None, error
-        obj.set_context(self.context)
         return obj, None
 
     # Evaluate the current object (used for constant evaluation or simple values)
@@ -61,19 +60,20 @@ class Type:
         return self, None
 
     # Search for a handler for the binary operation (to be implemented in subclasses)
-    def search_binary_operation(self, operation_token):
+    def search_binary_operation(self, operation_token, context):
         pass
 
     # Search for a handler for the unary operation (to be implemented in subclasses)
-    def search_unary_operation(self, operation_token):
+    def search_unary_operation(self, operation_token, context):
         pass
 
     # Search for the operation in the provided operations dictionary
-    def search_operation(self, operation_token, operations):
+    @staticmethod
+    def search_operation(operation_token, operations, context):
         operation = operations.get(operation_token.type, None)
         if operation is None:
             return None, RunTimeError(operation_token.position_start, operation_token.position_end,
-                                      f"Operation not supported", self.context)
+                                      f"Operation not supported", context)
         else:
             return operation, None
 
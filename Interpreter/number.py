@@ -1,15 +1,26 @@
 
 from Interpreter.boolean import Boolean
-from error import RunTimeError
 from Lexer.mytoken import Tokens
-from Interpreter.mytype import Type
+from Interpreter.mytype import OperationError, Type
+
+# The ints whose Number is allocated once and shared: loop counters, indexes and most literals
+SMALL_INT_MIN = -128
+SMALL_INT_MAX = 1024
+DIVISION_BY_ZERO = OperationError("Division by zero")
 
 
 class Number(Type):
-    def __init__(self, value, position_start=None, position_end=None, context=None):
-        super().__init__(value, position_start, position_end, context)
+    __slots__ = ()
+
+    # The Number holding value: a shared one for a small int, a new one otherwise. Numbers are never changed once
+    # made, so one instance can be the value of any number of reads, literals and results
+    @staticmethod
+    def of(value):
+        if value.__class__ is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+            return SMALL_INTS[value - SMALL_INT_MIN]
+        return Number(value)
 
-    def search_binary_operation(self, operation_token):
+    def search_binary_operation(self, operation_token, context):
         return self.search_operation(operation_token, {
             Tokens.ADD: self.add_to,
             Tokens.SUB: self.sub_to,
@@ -23,86 +34,83 @@ class Number(Type):
             Tokens.LESS_EQUAL: self.less_than_equal,
             Tokens.GREATER: self.greater_than,
             Tokens.GREATER_EQUAL: self.greater_than_equal,
-        })
+        }, context)
 
-    def search_unary_operation(self, operation_token):
+    def search_unary_operation(self, operation_token, context):
         return self.search_operation(operation_token, {
             Tokens.ADD: self.sign_to,
             Tokens.SUB: self.neg_to,
-        })
+        }, context)
 
     def add_to(self, other):
         if isinstance(other, Number):
-            return Number(self.value + other.value).set_context(self.context), None
+            return Number.of(self.value + other.value), None
 
     def sign_to(self):
-        return Number(self.value).set_context(self.context), None
+        return Number.of(self.value), None
 
     def sub_to(self, other):
         if isinstance(other, Number):
-            return Number(self.value - other.value).set_context(self.context), None
+            return Number.of(self.value - other.value), None
 
     def neg_to(self):
-        return Number(-self.value).set_context(self.context), None
+        return Number.of(-self.value), None
 
     def mul_to(self, other):
         if isinstance(other, Boolean):
-            other = Number(1 if other.value else 0)
+            other = Number.of(1 if other.value else 0)
         elif not isinstance(other, Number):
             return None, "Invalid operand"
-        return Number(self.value * other.value).set_context(self.context), None
+        return Number.of(self.value * other.value), None
 
     def div_to(self, other):
         if isinstance(other, Number):
             if other.value == 0:
-                return None, RunTimeError(other.position_start, other.position_end, "Division by zero", self.context)
-            return Number(self.value / other.value).set_context(self.context), None
+                return None, DIVISION_BY_ZERO
+            return Number.of(self.value / other.value), None
 
     def int_div_to(self, other):
         if isinstance(other, Number):
             if other.value == 0:
-                return None, RunTimeError(other.position_start, other.position_end, "Division by zero", self.context)
-            return Number(self.value // other.value).set_context(self.context), None
+                return None, DIVISION_BY_ZERO
+            return Number.of(self.value // other.value), None
 
     def mod_to(self, other):
         if isinstance(other, Number):
-            return Number(self.value % other.value).set_context(self.context), None
+            return Number.of(self.value % other.value), None
 
     def equal_to(self, other):
         if isinstance(other, Number):
-            return Boolean(int(self.value == other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value == other.value)), None
 
     def not_equal_to(self, other):
         if isinstance(other, Number):
-            return Boolean(int(self.value != other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value != other.value)), None
 
     def less_than(self, other):
         if isinstance(other, Number):
-            return Boolean(int(self.value < other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value < other.value)), None
 
     def less_than_equal(self, other):
         if isinstance(other, Number):
-            return Boolean(int(self.value <= other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value <= other.value)), None
 
     def greater_than(self, other):
         if isinstance(other, Number):
-            return Boolean(int(self.value > other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value > other.value)), None
 
     def greater_than_equal(self, other):
         if isinstance(other, Number):
-            return Boolean(int(self.value >= other.value)).set_context(self.context), None
+            return Boolean.of(int(self.value >= other.value)), None
 
     def copy(self):
-        return Number(self.value).set_context(self.context).set_position(self.position_start, self.position_end)
-
-    def set_value(self, value):
-        self.value = value
-        return self
+        return Number(self.value)
 
     def __repr__(self):
         return f"{self.value}"
 
 
-Number.null = Number(0)
-Number.true = Number(1)
-Number.false = Number(0)
+SMALL_INTS = [Number(value) for value in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+Number.null = Number.of(0)
+Number.true = Number.of(1)
+Number.false = Number.of(0)
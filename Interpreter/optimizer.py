@@ -0,0 +1,184 @@
+import copy
+
+from Interpreter.boolean import Boolean
+from Interpreter.context import Context
+from Interpreter.interpreter import Interpreter
+from Interpreter.number import Number
+from Lexer.mytoken import Tokens
+from Parser.astNode import NumberNode, BinaryOperationNode, ConstantNode
+
+# Operators whose result, when there is no error, is always a Number
+ARITHMETIC_OPERATORS = {Tokens.ADD, Tokens.SUB, Tokens.MUL, Tokens.DIV, Tokens.INTEGER_DIV, Tokens.MOD}
+# Arithmetic operators whose result is an int when both operands are ints
+INTEGER_OPERATORS = {Tokens.ADD, Tokens.SUB, Tokens.MUL, Tokens.INTEGER_DIV, Tokens.MOD}
+COMPARISON_OPERATORS = {Tokens.EQUAL, Tokens.NOT_EQUAL, Tokens.LESS, Tokens.LESS_EQUAL, Tokens.GREATER,
+                        Tokens.GREATER_EQUAL}
+
+
+# Rewrites the AST of a top-level statement before it is evaluated, without changing what any program prints or
+# which error it stops with:
+#   - a binary operation on literals is evaluated once, by the Interpreter itself, and replaced by a ConstantNode
+#     holding the value, at the span of the operation; one that fails is left for run time, so errors such as
+#     division by zero are still raised, at the same positions
+#   - '&&' with a constant 0 on the left and '||' with a constant 1 on the left become that constant, and '||' with
+#     a constant falsy left side becomes its right side
+#   - e * 1, 1 * e and e - 0 become e when e is a Number, e + 0, 0 + e and e // 1 when e is an int
+# A kept operand takes the span of the operation it replaces, since an error in using the value is reported there.
+# Names such as 'true' are not folded: scoping is dynamic and any function may bind them. Unary operations are not
+# folded either, as evaluating one raises a TypeError in every engine. Views over a FlatAST are left as they are
+class Optimizer:
+    def __init__(self):
+        self.interpreter = Interpreter()
+        self.context = Context('<optimizer>')
+
+    # Optimize a top-level statement; a statement nested too deeply to walk is evaluated as parsed
+    def optimize_statement(self, node):
+        try:
+            return self.optimize(node)
+        except RecursionError:
+            return node
+
+    # Dynamically find and call the appropriate optimize method for the given node
+    def optimize(self, node):
+        method_name = f'optimize_{type(node).__name__}'
+        optimizer = getattr(self, method_name, self.no_optimize_method)
+        return optimizer(node)
+
+    # Leaves (numbers, names, 'continue', 'break', constants) and nodes the optimizer does not know stay as they are
+    @staticmethod
+    def no_optimize_method(node):
+        return node
+
+    def optimize_list(self, nodes):
+        optimized = [self.optimize(node) for node in nodes]
+        return nodes if all(new is old for new, old in zip(optimized, nodes)) else optimized
+
+    def optimize_UnaryOperationNode(self, node):
+        return self.rebuilt(node, operand=self.optimize(node.operand))
+
+    def optimize_WhileNode(self, node):
+        return self.rebuilt(node, condition=self.optimize(node.condition), body=self.optimize_list(node.body))
+
+    def optimize_FunctionDefinitionNode(self, node):
+        return self.rebuilt(node, body=self.optimize(node.body))
+
+    def optimize_LambdaNode(self, node):
+        return self.rebuilt(node, body_node=self.optimize(node.body_node))
+
+    def optimize_FunctionCallNode(self, node):
+        return self.rebuilt(node, node_call=self.optimize(node.node_call), arg_node=self.optimize_list(node.arg_node))
+
+    def optimize_ReturnNode(self, node):
+        if node.node_to_return is None:
+            return node
+        return self.rebuilt(node, node_to_return=self.optimize(node.node_to_return))
+
+    def optimize_BinaryOperationNode(self, node):
+        node = self.rebuilt(node, left=self.optimize(node.left), right=self.optimize(node.right))
+        left, right, operator = node.left, node.right, node.operator.type
+        if self.is_literal(left) and self.is_literal(right):
+            return self.folded(node)
+
+        if self.is_literal(left) and operator in (Tokens.AND, Tokens.OR):
+            value = self.evaluate(left)
+            if value is not None:
+                if operator == Tokens.AND and value.value == 0 or operator == Tokens.OR and value.value == 1:
+                    return self.constant(value, left)
+                if operator == Tokens.OR and not value.value and self.keeps_span(right):
+                    return self.respanned(right, node)
+            return node
+
+        if operator == Tokens.MUL:
+            if self.is_int(right, 1) and self.is_number(left):
+                return self.respanned(left, node)
+            if self.is_int(left, 1) and self.is_number(right):
+                return self.respanned(right, node)
+        elif operator == Tokens.SUB:
+            if self.is_int(right, 0) and self.is_number(left):
+                return self.respanned(left, node)
+        elif operator == Tokens.ADD:
+            if self.is_int(right, 0) and self.is_integer(left):
+                return self.respanned(left, node)
+            if self.is_int(left, 0) and self.is_integer(right):
+                return self.respanned(right, node)
+        elif operator == Tokens.INTEGER_DIV:
+            if self.is_int(right, 1) and self.is_integer(left):
+                return self.respanned(left, node)
+        return node
+
+    # Copy of node with the given children, or node itself when none of them changed
+    @staticmethod
+    def rebuilt(node, **children):
+        if all(getattr(node, name) is child for name, child in children.items()):
+            return node
+        node = copy.copy(node)
+        for name, child in children.items():
+            setattr(node, name, child)
+        return node
+
+    # Copy of node that gives its value the span of replaced
+    @staticmethod
+    def respanned(node, replaced):
+        node = copy.copy(node)
+        node.position_start, node.position_end = replaced.position_start, replaced.position_end
+        return node
+
+    @staticmethod
+    def is_literal(node):
+        return isinstance(node, (NumberNode, ConstantNode))
+
+    # Whether node is the int literal or constant `value`
+    @staticmethod
+    def is_int(node, value):
+        if isinstance(node, NumberNode):
+            node_value = node.token_value.value
+        elif isinstance(node, ConstantNode) and node.value_class is Number:
+            node_value = node.value
+        else:
+            return False
+        return type(node_value) is int and node_value == value
+
+    # Whether a copy of node with another span evaluates the same, reporting any error of its own at its operator or
+    # its operands rather than at its span
+    @staticmethod
+    def keeps_span(node):
+        if isinstance(node, (NumberNode, ConstantNode)):
+            return True
+        return isinstance(node, BinaryOperationNode) and \
+            (node.operator.type in ARITHMETIC_OPERATORS or node.operator.type in COMPARISON_OPERATORS)
+
+    # Whether node, when it has a value, has a Number
+    def is_number(self, node):
+        if isinstance(node, NumberNode):
+            return True
+        if isinstance(node, ConstantNode):
+            return node.value_class is Number
+        return isinstance(node, BinaryOperationNode) and node.operator.type in ARITHMETIC_OPERATORS
+
+    # Whether node, when it has a value, has a Number holding an int
+    def is_integer(self, node):
+        if isinstance(node, NumberNode):
+            return type(node.token_value.value) is int
+        if isinstance(node, ConstantNode):
+            return node.value_class is Number and type(node.value) is int
+        return isinstance(node, BinaryOperationNode) and node.operator.type in INTEGER_OPERATORS and \
+            self.is_integer(node.left) and self.is_integer(node.right)
+
+    # Value of a subtree of literals as the Interpreter computes it, or None when that fails
+    def evaluate(self, node):
+        try:
+            value = self.interpreter.visit(node, self.context)
+        except Exception:
+            return None
+        if value.__class__ not in (Number, Boolean) or type(value.value) not in (int, float, bool):
+            return None
+        return value
+
+    # ConstantNode of value at the span of node
+    @staticmethod
+    def constant(value, node):
+        return ConstantNode(value.__class__, value.value, node.position_start, node.position_end)
+
+    def folded(self, node):
+        value = self.evaluate(node)
+        return node if value is None else self.constant(value, node)
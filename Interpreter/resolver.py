@@ -0,0 +1,98 @@
+from Interpreter.optimizer import Optimizer
+from Interpreter.symboltable import make_layout
+from Parser.astNode import SlotAccessNode
+
+# Attributes holding the children of the nodes frame_bindings() walks
+CHILD_ATTRIBUTES = ('left', 'right', 'operand', 'condition', 'body', 'node_call', 'arg_node', 'node_to_return')
+
+
+# Names a function body binds in its own frame: the named functions and lambdas it defines outside of nested bodies
+def frame_bindings(body):
+    names = set()
+    pending = [body]
+    while pending:
+        node = pending.pop()
+        if node is None:
+            continue
+        if isinstance(node, list):
+            pending.extend(node)
+            continue
+        kind = type(node).__name__
+        if kind == 'FunctionDefinitionNode':
+            if node.token_name:
+                names.add(node.token_name.value)
+        elif kind == 'LambdaNode':
+            if node.var_name_tok:
+                names.add(node.var_name_tok.value)
+        else:
+            pending.extend(getattr(node, attribute) for attribute in CHILD_ATTRIBUTES if hasattr(node, attribute))
+    return names
+
+
+# Replaces every read of a parameter in the body of the function or lambda that declares it by a SlotAccessNode,
+# which indexes the argument list of the frame instead of looking the name up. The language is dynamically scoped:
+# a name a body does not declare is found in the frames of its callers, at a depth that changes from call to call,
+# and a global can be shadowed by any caller's parameter, so those reads (and the "'x' is not defined" error)
+# stay with the SymbolTable lookup. So does a parameter the body rebinds by defining a function of the same name.
+# Views over a FlatAST are left as they are
+class Resolver:
+    # Resolve a top-level statement; one nested too deeply to walk is evaluated as parsed
+    def resolve_statement(self, node):
+        try:
+            return self.resolve(node, None)
+        except RecursionError:
+            return node
+
+    # Dynamically find and call the appropriate resolve method for the given node; scope maps the parameters of the
+    # innermost function to their slots (None at the top level)
+    def resolve(self, node, scope):
+        method_name = f'resolve_{type(node).__name__}'
+        resolver = getattr(self, method_name, self.no_resolve_method)
+        return resolver(node, scope)
+
+    @staticmethod
+    def no_resolve_method(node, scope):
+        return node
+
+    # Parameters of a function with the given body that are always read from their slot
+    @staticmethod
+    def scope(arg_names, body):
+        rebound = frame_bindings(body)
+        return {name: slot for name, slot in make_layout(arg_names).items() if name not in rebound}
+
+    def resolve_list(self, nodes, scope):
+        resolved = [self.resolve(node, scope) for node in nodes]
+        return nodes if all(new is old for new, old in zip(resolved, nodes)) else resolved
+
+    @staticmethod
+    def resolve_AccessNode(node, scope):
+        if scope is not None and node.token_name.value in scope:
+            return SlotAccessNode(node.token_name, scope[node.token_name.value])
+        return node
+
+    def resolve_UnaryOperationNode(self, node, scope):
+        return Optimizer.rebuilt(node, operand=self.resolve(node.operand, scope))
+
+    def resolve_BinaryOperationNode(self, node, scope):
+        return Optimizer.rebuilt(node, left=self.resolve(node.left, scope), right=self.resolve(node.right, scope))
+
+    def resolve_WhileNode(self, node, scope):
+        return Optimizer.rebuilt(node, condition=self.resolve(node.condition, scope),
+                                 body=self.resolve_list(node.body, scope))
+
+    def resolve_FunctionDefinitionNode(self, node, scope):
+        arg_names = [arg_name.value for arg_name in node.arg_name]
+        return Optimizer.rebuilt(node, body=self.resolve(node.body, self.scope(arg_names, node.body)))
+
+    def resolve_LambdaNode(self, node, scope):
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        return Optimizer.rebuilt(node, body_node=self.resolve(node.body_node, self.scope(arg_names, node.body_node)))
+
+    def resolve_FunctionCallNode(self, node, scope):
+        return Optimizer.rebuilt(node, node_call=self.resolve(node.node_call, scope),
+                                 arg_node=self.resolve_list(node.arg_node, scope))
+
+    def resolve_ReturnNode(self, node, scope):
+        if node.node_to_return is None:
+            return node
+        return Optimizer.rebuilt(node, node_to_return=self.resolve(node.node_to_return, scope))
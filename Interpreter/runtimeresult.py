@@ -0,0 +1,32 @@
+# A call in tail position of a Function or Lambda body, made in context at the span of the call. It is returned as
+# the body's value instead of being made, and the function's execute() makes it in the same loop (see
+# myfunction.execute_tail_calls)
+class TailCall:
+    __slots__ = ('function', 'args', 'context', 'position_start', 'position_end')
+
+    def __init__(self, function, args, context, position_start, position_end):
+        self.function = function
+        self.args = args
+        self.context = context
+        self.position_start = position_start
+        self.position_end = position_end
+
+
+# Evaluation returns values and raises an error as error.ErrorException; 'continue', 'break' and 'return' are
+# raised as the signals below and caught by the statement list they end, so evaluating a node writes no flags
+
+# Raised by 'continue' and caught by the enclosing while loop
+class ContinueSignal(Exception):
+    pass
+
+
+# Raised by 'break' and caught by the enclosing while loop
+class BreakSignal(Exception):
+    pass
+
+
+# Raised by 'return' and caught by the enclosing function or lambda body
+class ReturnSignal(Exception):
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
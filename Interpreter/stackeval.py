@@ -0,0 +1,262 @@
+import time
+
+from Interpreter.boolean import Boolean
+from Interpreter.compiler import CompiledNode
+from Interpreter.interpreter import Interpreter
+from Interpreter.myfunction import Function
+from Interpreter.mylambda import Lambda
+from Interpreter.number import Number
+from Interpreter.vm import VirtualMachine
+from Lexer.mytoken import Tokens
+from error import ErrorException, RunTimeError
+
+# Calls a StackEvaluator lets a program nest before it stops it with a RunTimeError
+MAX_DEPTH = 1_000_000
+
+
+# The value of a 'return' statement on its way to the body of the function it returns from
+class ReturnValue:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+# The values of 'continue' and 'break' on their way to the enclosing while loop
+CONTINUE = object()
+BREAK = object()
+
+
+# Evaluates the AST without recursing in Python. A node with children is evaluated by a generator (an eval_*
+# method) that yields (child, context) for each child it needs and receives the child's value back; the
+# generators waiting for a value are kept in a list on the heap, so the depth of a program's recursion is bounded by
+# max_depth and memory instead of sys.getrecursionlimit(). Leaves are evaluated directly by value_* methods. Values,
+# contexts and errors are the ones the tree-walking Interpreter makes
+class StackEvaluator:
+    def __init__(self, max_depth=MAX_DEPTH):
+        self.max_depth = max_depth
+        self.depth = 0
+        self.methods = {}
+
+    # Wrap a top-level statement into a node for Interpreter.visit
+    def prepare_statement(self, node):
+        return CompiledNode(lambda context: self.evaluate(node, context), node)
+
+    # Find the eval_* generator or the value_* method for a node type: (is_generator, method)
+    def method(self, node):
+        node_type = type(node)
+        entry = self.methods.get(node_type)
+        if entry is None:
+            generator = getattr(self, f'eval_{node_type.__name__}', None)
+            if generator is not None:
+                entry = (True, generator)
+            else:
+                entry = (False, getattr(self, f'value_{node_type.__name__}', self.no_eval_method))
+            self.methods[node_type] = entry
+        return entry
+
+    # Evaluate node in context and return its value; errors are raised as ErrorException
+    def evaluate(self, node, context):
+        self.depth = 0
+        is_generator, method = self.method(node)
+        if not is_generator:
+            return method(node, context)
+        waiting = []
+        routine = method(node, context)
+        value = None
+        while True:
+            try:
+                child, child_context = routine.send(value)
+            except StopIteration as stop:
+                value = stop.value
+                if not waiting:
+                    return value
+                routine = waiting.pop()
+                continue
+            is_generator, method = self.method(child)
+            if is_generator:
+                waiting.append(routine)
+                routine = method(child, child_context)
+                value = None
+            else:
+                value = method(child, child_context)
+
+    # Nodes without an eval or value method (such as the bodies other engines compile) are left to the Interpreter
+    @staticmethod
+    def no_eval_method(node, context):
+        return Interpreter().visit(node, context)
+
+    @staticmethod
+    def value_NumberNode(node, context):
+        return Number.of(node.token_value.value)
+
+    @staticmethod
+    def value_BooleanNode(node, context):
+        return Boolean.of(node.value)
+
+    @staticmethod
+    def value_ConstantNode(node, context):
+        return node.value_class.of(node.value)
+
+    @staticmethod
+    def value_AccessNode(node, context):
+        name = node.token_name.value
+        value = context.symbol_table.get(name)
+        if value is None:
+            raise ErrorException(RunTimeError(node.position_start, node.position_end, f"'{name}' is not defined",
+                                              context))
+        return value
+
+    @staticmethod
+    def value_SlotAccessNode(node, context):
+        value = context.symbol_table.slots[node.slot]
+        if value is None:
+            return StackEvaluator.value_AccessNode(node, context)
+        return value
+
+    @staticmethod
+    def value_FunctionDefinitionNode(node, context):
+        function_name = node.token_name.value if node.token_name else None
+        arg_names = [arg_name.value for arg_name in node.arg_name]
+        function_value = Function(function_name, arg_names, node.body, node.should_auto_return)
+        if function_name:
+            context.symbol_table.add(function_name, function_value)
+        return function_value
+
+    @staticmethod
+    def value_LambdaNode(node, context):
+        lambda_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        lambda_value = Lambda(lambda_name, arg_names, node.body_node)
+        if lambda_name:
+            context.symbol_table.add(lambda_name, lambda_value)
+        return lambda_value
+
+    @staticmethod
+    def value_ContinueNode(node, context):
+        return CONTINUE
+
+    @staticmethod
+    def value_BreakNode(node, context):
+        return BREAK
+
+    # Like the Interpreter, a 'return' reached while evaluating a child (a while loop used as an expression) ends the
+    # enclosing expression: every generator passes a ReturnValue it gets back up unchanged
+    @staticmethod
+    def eval_BinaryOperationNode(node, context):
+        left = yield node.left, context
+        if left.__class__ is ReturnValue:
+            return left
+        if node.operator.type == Tokens.AND:
+            if left.value == 0:
+                return left
+        elif node.operator.type == Tokens.OR:
+            if left.value == 1:
+                return left
+        right = yield node.right, context
+        if right.__class__ is ReturnValue:
+            return right
+        value, error = left.binary_opr(node.operator, right, context, node.right.position_start,
+                                       node.right.position_end)
+        if error:
+            raise ErrorException(error)
+        return value
+
+    @staticmethod
+    def eval_UnaryOperationNode(node, context):
+        operand = yield node.operand, context
+        if operand.__class__ is ReturnValue:
+            return operand
+        handler, error = operand.unary_opr(node.operator, context)
+        if error:
+            raise ErrorException(error)
+        value, error = handler(operand)
+        if error:
+            raise ErrorException(error)
+        return value
+
+    @staticmethod
+    def eval_WhileNode(node, context):
+        while True:
+            condition = yield node.condition, context
+            if condition.__class__ is ReturnValue:
+                return condition
+            if not condition.value:
+                return None
+            for statement in node.body:
+                value = yield statement, context
+                if value.__class__ is ReturnValue:
+                    return value
+                if value is CONTINUE:
+                    break
+                if value is BREAK:
+                    return None
+
+    @staticmethod
+    def eval_ReturnNode(node, context):
+        if node.node_to_return:
+            value = yield node.node_to_return, context
+            if value.__class__ is ReturnValue:
+                return value
+        else:
+            value = Number.null
+        return ReturnValue(value)
+
+    # A Function or Lambda body is evaluated on the same stack of generators, one level of max_depth per call, after a
+    # lookup in Function.memo when it is set; built-in functions are executed as usual
+    def eval_FunctionCallNode(self, node, context):
+        position_start, position_end = node.position_start, node.position_end
+        value_call = yield node.node_call, context
+        if value_call.__class__ is ReturnValue:
+            return value_call
+        args = []
+        for arg_node in node.arg_node:
+            arg = yield arg_node, context
+            if arg.__class__ is ReturnValue:
+                return arg
+            args.append(arg)
+
+        if value_call.__class__ is Function or value_call.__class__ is Lambda:
+            if self.depth >= self.max_depth:
+                raise ErrorException(RunTimeError(position_start, position_end,
+                                                  f"Maximum recursion depth of {self.max_depth} exceeded", context))
+            memo = Function.memo
+            key = None
+            if memo is not None:
+                key, value = memo.lookup(value_call, args, context)
+                if value is not None:
+                    return value
+                start = time.perf_counter()
+            exec_ctx = VirtualMachine.enter(value_call, args, context, position_start, position_end)
+            self.depth += 1
+            body = value_call.body_node
+            value = Number.null
+            for statement in body if isinstance(body, list) else [body]:
+                value = yield statement, exec_ctx
+                if value.__class__ is ReturnValue:
+                    value = value.value
+                    break
+                # 'continue' and 'break' outside a loop are statements whose value is None
+                if value is CONTINUE or value is BREAK:
+                    value = None
+            self.depth -= 1
+            Function.interpreter.leave(exec_ctx)
+            if key is not None:
+                memo.record(key, value, start)
+        else:
+            value = value_call.execute(args, context, position_start, position_end)
+        return value
+
+    # Views over a FlatAST (see Parser.flatast) evaluate like the node classes they stand for
+    value_FlatNumberNode = value_NumberNode
+    value_FlatBooleanNode = value_BooleanNode
+    value_FlatAccessNode = value_AccessNode
+    value_FlatFunctionDefinitionNode = value_FunctionDefinitionNode
+    value_FlatLambdaNode = value_LambdaNode
+    value_FlatContinueNode = value_ContinueNode
+    value_FlatBreakNode = value_BreakNode
+    eval_FlatUnaryOperationNode = eval_UnaryOperationNode
+    eval_FlatBinaryOperationNode = eval_BinaryOperationNode
+    eval_FlatWhileNode = eval_WhileNode
+    eval_FlatFunctionCallNode = eval_FunctionCallNode
+    eval_FlatReturnNode = eval_ReturnNode
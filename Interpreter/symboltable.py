@@ -1,17 +1,68 @@
+# Slot of each parameter name in the argument list of a frame; with a repeated name the last argument wins, as it
+# did when arguments were added one by one
+def make_layout(arg_names):
+    return {name: slot for slot, name in enumerate(arg_names)}
+
 
 class SymbolTable:
+    __slots__ = ('symbols', 'parent', 'found', 'layout', 'slots')
+
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
+        self.found = None
+        self.layout = None
+        self.slots = None
+
+    # Empty the table of a frame that is reused for another call (see Interpreter.enter)
+    def reset(self, parent):
+        if self.symbols:
+            self.symbols.clear()
+        self.parent = parent
+        self.found = None
 
     def add(self, name, value):
         self.symbols[name] = value
 
+    # Bind the arguments of a call: slots is the argument list itself, read by index by code that resolved a
+    # parameter to its slot (Interpreter.resolver) and through layout by name lookups. Names added later (local
+    # function definitions) go to symbols and come first
+    def bind(self, layout, slots):
+        self.layout = layout
+        self.slots = slots
+
+    # Look a name up in this table, then in its parents, without recursion. A name found in a parent is remembered
+    # in found: only the innermost running context gains bindings, so a parent cannot change what it binds while
+    # a table below it is still in use, and deep call chains do not walk to the global table for every lookup
     def get(self, name):
         value = self.symbols.get(name, None)
-        if value is None and self.parent:
-            return self.parent.get(name)
-        return value
+        if value is None and self.layout is not None:
+            slot = self.layout.get(name)
+            if slot is not None:
+                value = self.slots[slot]
+        if value is not None or self.parent is None:
+            return value
+        found = self.found
+        if found is not None:
+            value = found.get(name)
+            if value is not None:
+                return value
+        table = self.parent
+        while table is not None:
+            value = table.symbols.get(name, None)
+            if value is None and table.layout is not None:
+                slot = table.layout.get(name)
+                if slot is not None:
+                    value = table.slots[slot]
+            if value is None and table.found is not None:
+                value = table.found.get(name)
+            if value is not None:
+                if found is None:
+                    self.found = found = {}
+                found[name] = value
+                return value
+            table = table.parent
+        return None
 
     def remove(self, name):
         del self.symbols[name]
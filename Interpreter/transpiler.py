@@ -0,0 +1,420 @@
+import hashlib
+import linecache
+import time
+from collections import OrderedDict
+
+from Interpreter.boolean import Boolean
+from Interpreter.interpreter import Interpreter
+from Interpreter.myfunction import Function, execute_tail_calls
+from Interpreter.mylambda import Lambda
+from Interpreter.number import Number
+from Interpreter.runtimeresult import TailCall
+from Interpreter.vm import VirtualMachine
+from Lexer.mytoken import Tokens
+from error import ErrorException, RunTimeError
+
+# Operators computed inline when both operands are Numbers: (result class, Python expression, extra guard). The
+# guard sends a zero divisor to Number.binary_opr, which reports the "Division by zero" RunTimeError. A comparison
+# gives one of the two shared Booleans
+NUMBER_OPERATORS = {
+    Tokens.ADD: ('Number', '{} + {}', ''),
+    Tokens.SUB: ('Number', '{} - {}', ''),
+    Tokens.MUL: ('Number', '{} * {}', ''),
+    Tokens.DIV: ('Number', '{} / {}', ' and {}.value != 0'),
+    Tokens.INTEGER_DIV: ('Number', '{} // {}', ' and {}.value != 0'),
+    Tokens.MOD: ('Number', '{} % {}', ''),
+    Tokens.EQUAL: ('Boolean', '{} == {}', ''),
+    Tokens.NOT_EQUAL: ('Boolean', '{} != {}', ''),
+    Tokens.LESS: ('Boolean', '{} < {}', ''),
+    Tokens.LESS_EQUAL: ('Boolean', '{} <= {}', ''),
+    Tokens.GREATER: ('Boolean', '{} > {}', ''),
+    Tokens.GREATER_EQUAL: ('Boolean', '{} >= {}', ''),
+}
+# Transpile methods that take a tail flag, like the Interpreter's TAIL_VISITORS
+TAIL_TRANSPILERS = {'transpile_FunctionCallNode', 'transpile_BinaryOperationNode', 'transpile_FlatFunctionCallNode',
+                    'transpile_FlatBinaryOperationNode'}
+# Code objects kept by Transpiler.code_cache; the least recently used one (and its linecache source) is dropped first
+CODE_CACHE_SIZE = 1024
+
+
+# A statement or function body translated to Python: evaluate(context) returns the value or raises ErrorException.
+# The Interpreter visits it like a node (visit_TranspiledNode), so Function/Lambda.execute still run it
+class TranspiledNode:
+    __slots__ = ('evaluate', 'node', 'position_start', 'position_end')
+
+    def __init__(self, evaluate, node):
+        self.evaluate = evaluate
+        self.node = node
+        nodes = node if isinstance(node, list) else [node]
+        self.position_start = nodes[0].position_start if nodes else None
+        self.position_end = nodes[-1].position_end if nodes else None
+
+
+# The Python function being generated: its lines, the .lambda position of each line and the temporaries in use
+class PythonFunction:
+    __slots__ = ('name', 'lines', 'positions', 'indent', 'temps', 'loops')
+
+    def __init__(self, name):
+        self.name = name
+        self.lines = []
+        self.positions = []
+        self.indent = 1
+        self.temps = 0
+        self.loops = 0
+
+    def emit(self, line, node=None):
+        self.lines.append('    ' * self.indent + line)
+        self.positions.append(node.position_start if node is not None else None)
+
+    def temp(self):
+        self.temps += 1
+        return f"t{self.temps - 1}"
+
+
+# Call a function value from transpiled code. A Function or Lambda whose body was transpiled too is entered
+# directly, skipping Function.execute and the Interpreter, after a lookup in Function.memo when it is set; a call its
+# body returns as a TailCall is made by execute_tail_calls, in one loop with the calls that one returns in turn
+def call(function, args, position_start, position_end, context):
+    body = function.body_node if function.__class__ is Function or function.__class__ is Lambda else None
+    if body.__class__ is TranspiledNode:
+        memo = Function.memo
+        key = None
+        if memo is not None:
+            key, value = memo.lookup(function, args, context)
+            if value is not None:
+                return value
+            start = time.perf_counter()
+        exec_ctx = VirtualMachine.enter(function, args, context, position_start, position_end)
+        value = body.evaluate(exec_ctx)
+        if value.__class__ is TailCall:
+            value = execute_tail_calls(value.function, value.args, value.context, value.position_start,
+                                       value.position_end)
+        Function.interpreter.leave(exec_ctx)
+        if key is not None:
+            memo.record(key, value, start)
+        return value
+    return function.execute(args, context, position_start, position_end)
+
+
+# Make a call in tail position of a transpiled body: a Function or Lambda is returned as a TailCall for the caller of
+# the body to make, any other function value is called
+def tail_call(function, args, position_start, position_end, context):
+    if function.__class__ is Function or function.__class__ is Lambda:
+        return TailCall(function, args, context, position_start, position_end)
+    return function.execute(args, context, position_start, position_end)
+
+
+# Evaluate a node the Transpiler has no translation for with the tree-walking Interpreter
+def interpret(node, context):
+    return Interpreter().visit(node, context)
+
+
+# Point a Python exception raised inside generated code back at the .lambda line the failing code came from
+def annotate(exception):
+    traceback = exception.__traceback__
+    position = None
+    while traceback is not None:
+        positions = traceback.tb_frame.f_globals.get('__positions__')
+        if positions is not None and positions.get(traceback.tb_lineno) is not None:
+            position = positions[traceback.tb_lineno]
+        traceback = traceback.tb_next
+    if position is not None:
+        exception.add_note(f"  File {position.file_name}, line {position.line + 1} (transpiled to Python)")
+
+
+# Translates the Parser AST into Python source, compiles it with compile() and runs it as Python functions. Every
+# node becomes a few lines on temporaries that make the values and errors the matching Interpreter.visit_* method
+# makes. Code objects are cached by the hash of the generated source, which holds no
+# positions, tokens or names of the .lambda file (those are globals of the module), so a repeated statement is
+# compiled once. Translating still runs for every statement, since it makes those globals
+class Transpiler:
+    code_cache = OrderedDict()
+
+    def __init__(self):
+        self.function = None
+        self.functions = []
+        self.constants = {}
+        self.bodies = []
+
+    # Translate a top-level statement into a node for Interpreter.visit; statements Python cannot compile (too
+    # deeply nested) are left to the Interpreter
+    def transpile_statement(self, node):
+        try:
+            self.function = PythonFunction('statement')
+            self.functions.append(self.function)
+            self.function.emit(f"return {self.transpile(node)}")
+            namespace = self.load()
+        except (SyntaxError, RecursionError, MemoryError):
+            return node
+        for name, function_name, body in self.bodies:
+            namespace[name] = TranspiledNode(namespace[function_name], body)
+        return TranspiledNode(namespace['statement'], node)
+
+    # Compile the generated functions, or take them from code_cache, and execute them in a fresh module namespace
+    def load(self):
+        lines = []
+        positions = {}
+        for function in self.functions:
+            lines.append(f"def {function.name}(context):")
+            for line, position in zip(function.lines, function.positions):
+                lines.append(line)
+                positions[len(lines)] = position
+            lines.append('')
+        source = '\n'.join(lines)
+        key = hashlib.sha256(source.encode()).hexdigest()
+        code = self.code_cache.get(key)
+        if code is None:
+            file_name = f"<transpiled {key[:12]}>"
+            code = compile(source, file_name, 'exec')
+            linecache.cache[file_name] = (len(source), None, source.splitlines(True), file_name)
+            self.code_cache[key] = code
+            if len(self.code_cache) > CODE_CACHE_SIZE:
+                evicted, _ = self.code_cache.popitem(last=False)
+                linecache.cache.pop(f"<transpiled {evicted[:12]}>", None)
+        else:
+            self.code_cache.move_to_end(key)
+        namespace = dict(self.constants, __positions__=positions, Number=Number, Boolean=Boolean,
+                         Function=Function, Lambda=Lambda, ErrorException=ErrorException, RunTimeError=RunTimeError,
+                         TailCall=TailCall, call=call, tail_call=tail_call, interpret=interpret)
+        exec(code, namespace)
+        return namespace
+
+    def constant(self, value):
+        name = f"k{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def positions(self, node):
+        return f"{self.constant(node.position_start)}, {self.constant(node.position_end)}"
+
+    # Dynamically find and call the appropriate transpile method for the given node; it returns the Python
+    # expression (a temporary or a literal) holding the node's value
+    def transpile(self, node):
+        method_name = f'transpile_{type(node).__name__}'
+        transpiler = getattr(self, method_name, self.no_transpile_method)
+        return transpiler(node)
+
+    # Translate a node whose value is the value of the enclosing function: the body of a '->' function or a lambda,
+    # the last statement of a body or the value of a return. tail is the Python expression telling whether the node
+    # is in tail position when it runs ('True', or a temporary under the right side of '||'); a call there, or on the
+    # right side of '||', evaluates to a TailCall
+    def transpile_tail(self, node, tail='True'):
+        method_name = f'transpile_{type(node).__name__}'
+        if method_name in TAIL_TRANSPILERS:
+            return getattr(self, method_name)(node, tail)
+        return self.transpile(node)
+
+    def no_transpile_method(self, node):
+        value = self.function.temp()
+        self.function.emit(f"{value} = interpret({self.constant(node)}, context)", node)
+        return value
+
+    # A literal's value is made once, when it is translated, and every evaluation reads the global holding it
+    def transpile_NumberNode(self, node):
+        return self.constant(Number.of(node.token_value.value))
+
+    def transpile_BooleanNode(self, node):
+        return self.constant(Boolean.of(node.value))
+
+    def transpile_ConstantNode(self, node):
+        return self.constant(node.value_class.of(node.value))
+
+    # Names are looked up through the context chain (the language is dynamically scoped)
+    def transpile_AccessNode(self, node):
+        function = self.function
+        name = node.token_name.value
+        value = function.temp()
+        positions = self.positions(node)
+        function.emit(f"{value} = context.symbol_table.get({name!r})", node)
+        function.emit(f"if {value} is None:", node)
+        function.emit(f"    raise ErrorException(RunTimeError({positions}, {repr(f'{name!r} is not defined')}, "
+                      f"context))", node)
+        return value
+
+    # Parameters resolved by Interpreter.resolver are read from their slot in the frame of the function; a slot holding
+    # None is looked up by name like an AccessNode
+    def transpile_SlotAccessNode(self, node):
+        function = self.function
+        name = node.token_name.value
+        value = function.temp()
+        function.emit(f"{value} = context.symbol_table.slots[{node.slot}]", node)
+        function.emit(f"if {value} is None:", node)
+        function.emit(f"    {value} = context.symbol_table.get({name!r})", node)
+        function.emit(f"    if {value} is None:", node)
+        function.emit(f"        raise ErrorException(RunTimeError({self.positions(node)}, "
+                      f"{repr(f'{name!r} is not defined')}, context))", node)
+        return value
+
+    def binary_operation(self, value, left, operator, right, node):
+        function = self.function
+        function.emit(f"{value}, error = {left}.binary_opr({operator}, {right}, context, "
+                      f"{self.positions(node.right)})", node)
+        function.emit("if error:", node)
+        function.emit("    raise ErrorException(error)", node)
+
+    def transpile_BinaryOperationNode(self, node, tail=None):
+        function = self.function
+        operator = self.constant(node.operator)
+        left = self.transpile(node.left)
+        value = function.temp()
+
+        # '&&' and '||' skip the right operand when the left one decides the result. A false left side makes the
+        # right side the result of '||', so in tail position the right side is one too
+        if node.operator.type == Tokens.AND or node.operator.type == Tokens.OR:
+            function.emit(f"if {left}.value == {0 if node.operator.type == Tokens.AND else 1}:", node)
+            function.emit(f"    {value} = {left}", node)
+            function.emit("else:", node)
+            function.indent += 1
+            if tail is None or node.operator.type == Tokens.AND:
+                right = self.transpile(node.right)
+                self.binary_operation(value, left, operator, right, node)
+            else:
+                right_tail = function.temp()
+                function.emit(f"{right_tail} = {'' if tail == 'True' else f'{tail} and '}not {left}.value", node)
+                right = self.transpile_tail(node.right, right_tail)
+                function.emit(f"if {right}.__class__ is TailCall:", node)
+                function.emit(f"    {value} = {right}", node)
+                function.emit("else:", node)
+                function.indent += 1
+                self.binary_operation(value, left, operator, right, node)
+                function.indent -= 1
+            function.indent -= 1
+            return value
+
+        right = self.transpile(node.right)
+        inline = NUMBER_OPERATORS.get(node.operator.type)
+        if inline is None:
+            self.binary_operation(value, left, operator, right, node)
+            return value
+        result_class, expression, guard = inline
+        function.emit(f"if {left}.__class__ is Number and {right}.__class__ is Number{guard.format(right)}:", node)
+        expression = expression.format(left + '.value', right + '.value')
+        if result_class == 'Boolean':
+            function.emit(f"    {value} = Boolean.true if {expression} else Boolean.false", node)
+        else:
+            function.emit(f"    {value} = Number.of({expression})", node)
+        function.emit("else:", node)
+        function.indent += 1
+        self.binary_operation(value, left, operator, right, node)
+        function.indent -= 1
+        return value
+
+    def transpile_UnaryOperationNode(self, node):
+        function = self.function
+        operand = self.transpile(node.operand)
+        value = function.temp()
+        function.emit(f"handler, error = {operand}.unary_opr({self.constant(node.operator)}, context)", node)
+        function.emit("if error:", node)
+        function.emit("    raise ErrorException(error)", node)
+        function.emit(f"{value}, error = handler({operand})", node)
+        function.emit("if error:", node)
+        function.emit("    raise ErrorException(error)", node)
+        return value
+
+    # while: a Python loop that tests the condition first, so 'continue' and 'break' become their Python
+    # counterparts; the loop's value is None
+    def transpile_WhileNode(self, node):
+        function = self.function
+        function.emit("while True:", node)
+        function.indent += 1
+        condition = self.transpile(node.condition)
+        function.emit(f"if not {condition}.value:", node)
+        function.emit("    break", node)
+        function.loops += 1
+        for statement in node.body:
+            self.transpile(statement)
+        function.loops -= 1
+        function.indent -= 1
+        value = function.temp()
+        function.emit(f"{value} = None", node)
+        return value
+
+    # Generate a Python function for a function or lambda body; a multi-line body yields the value of its last
+    # statement, and a call in tail position is returned as a TailCall. Returns the name of the global that will hold
+    # its TranspiledNode
+    def transpile_body(self, body):
+        outer = self.function
+        self.function = PythonFunction(f"function_{len(self.functions)}")
+        self.functions.append(self.function)
+        statements = body if isinstance(body, list) else [body]
+        value = 'Number.null'
+        for index, statement in enumerate(statements):
+            value = self.transpile_tail(statement) if index == len(statements) - 1 else self.transpile(statement)
+        self.function.emit(f"return {value}")
+        name = self.constant(None)
+        self.bodies.append((name, self.function.name, body))
+        self.function = outer
+        return name
+
+    def transpile_FunctionDefinitionNode(self, node):
+        function_name = node.token_name.value if node.token_name else None
+        arg_names = [arg_name.value for arg_name in node.arg_name]
+        body = self.transpile_body(node.body)
+        value = self.function.temp()
+        self.function.emit(f"{value} = Function({function_name!r}, {self.constant(arg_names)}, {body}, "
+                           f"{node.should_auto_return!r})", node)
+        if function_name:
+            self.function.emit(f"context.symbol_table.add({function_name!r}, {value})", node)
+        return value
+
+    def transpile_LambdaNode(self, node):
+        lambda_name = node.var_name_tok.value if node.var_name_tok else None
+        arg_names = [arg_name.value for arg_name in node.arg_name_toks]
+        body = self.transpile_body(node.body_node)
+        value = self.function.temp()
+        self.function.emit(f"{value} = Lambda({lambda_name!r}, {self.constant(arg_names)}, {body})", node)
+        if lambda_name:
+            self.function.emit(f"context.symbol_table.add({lambda_name!r}, {value})", node)
+        return value
+
+    def transpile_FunctionCallNode(self, node, tail=None):
+        function = self.function
+        callee = self.transpile(node.node_call)
+        args = [self.transpile(arg_node) for arg_node in node.arg_node]
+        value = function.temp()
+        if tail is None:
+            make = 'call'
+        elif tail == 'True':
+            make = 'tail_call'
+        else:
+            make = f"(tail_call if {tail} else call)"
+        function.emit(f"{value} = {make}({callee}, [{', '.join(args)}], {self.positions(node)}, context)", node)
+        return value
+
+    # 'continue' and 'break' outside a loop of the same function are the no-op statement the tree-walker makes of
+    # them, whose value is None
+    def transpile_ContinueNode(self, node):
+        if self.function.loops:
+            self.function.emit("continue", node)
+        return 'None'
+
+    def transpile_BreakNode(self, node):
+        if self.function.loops:
+            self.function.emit("break", node)
+        return 'None'
+
+    # The value of a return in a function body is in tail position; a statement's own function has no caller to
+    # make a TailCall
+    def transpile_ReturnNode(self, node):
+        if not node.node_to_return:
+            value = 'Number.null'
+        elif self.function is self.functions[0]:
+            value = self.transpile(node.node_to_return)
+        else:
+            value = self.transpile_tail(node.node_to_return)
+        self.function.emit(f"return {value}", node)
+        return 'None'
+
+    # Views over a FlatAST (see Parser.flatast) translate like the node classes they stand for
+    transpile_FlatNumberNode = transpile_NumberNode
+    transpile_FlatBooleanNode = transpile_BooleanNode
+    transpile_FlatAccessNode = transpile_AccessNode
+    transpile_FlatUnaryOperationNode = transpile_UnaryOperationNode
+    transpile_FlatBinaryOperationNode = transpile_BinaryOperationNode
+    transpile_FlatWhileNode = transpile_WhileNode
+    transpile_FlatFunctionDefinitionNode = transpile_FunctionDefinitionNode
+    transpile_FlatFunctionCallNode = transpile_FunctionCallNode
+    transpile_FlatLambdaNode = transpile_LambdaNode
+    transpile_FlatContinueNode = transpile_ContinueNode
+    transpile_FlatBreakNode = transpile_BreakNode
+    transpile_FlatReturnNode = transpile_ReturnNode
@@ -0,0 +1,282 @@
+import operator
+
+from Interpreter.boolean import Boolean
+from Interpreter.compiler import Compiler, CompiledNode
+from Interpreter.myfunction import Function
+from Interpreter.mylambda import Lambda
+from Interpreter.number import Number
+from Interpreter.runtimeresult import TailCall, ContinueSignal, BreakSignal
+from Lexer.mytoken import Tokens
+from error import ErrorException
+
+# Operators computed on two raw ints: (Python function, whether the result is an int or bool that stays raw). True
+# division gives a float, which is boxed into a Number. A zero divisor takes the boxed path, which reports the
+# "Division by zero" RunTimeError (or fails with ZeroDivisionError for '%', as Number.mod_to does)
+INT_OPERATORS = {
+    Tokens.ADD: (operator.add, True),
+    Tokens.SUB: (operator.sub, True),
+    Tokens.MUL: (operator.mul, True),
+    Tokens.DIV: (operator.truediv, False),
+    Tokens.INTEGER_DIV: (operator.floordiv, True),
+    Tokens.MOD: (operator.mod, True),
+    Tokens.EQUAL: (operator.eq, True),
+    Tokens.NOT_EQUAL: (operator.ne, True),
+    Tokens.LESS: (operator.lt, True),
+    Tokens.LESS_EQUAL: (operator.le, True),
+    Tokens.GREATER: (operator.gt, True),
+    Tokens.GREATER_EQUAL: (operator.ge, True),
+}
+DIVISIONS = {Tokens.DIV, Tokens.INTEGER_DIV, Tokens.MOD}
+
+
+# The Number or Boolean a raw int or bool stands for; any other value is already boxed
+def box(value):
+    if value.__class__ is int:
+        return Number.of(value)
+    if value.__class__ is bool:
+        return Boolean.true if value else Boolean.false
+    return value
+
+
+# The raw int of a Number holding an int and the raw bool of the shared true and false Booleans; any other value
+# stays boxed
+def unbox(value):
+    if value.__class__ is Number:
+        raw = value.value
+        return raw if raw.__class__ is int else value
+    if value is Boolean.true:
+        return True
+    if value is Boolean.false:
+        return False
+    return value
+
+
+# The value '&&', '||' and 'while' test: the raw value itself, or the payload of a boxed one
+def truth(value):
+    if value.__class__ is int or value.__class__ is bool:
+        return value
+    return value.value
+
+
+# Apply a binary operator the way Type.binary_opr does, on the boxed operands; the result is unboxed again
+def boxed_operation(left, operator_token, right, context, position_start, position_end):
+    value, error = box(left).binary_opr(operator_token, box(right), context, position_start, position_end)
+    if error:
+        raise ErrorException(error)
+    return unbox(value)
+
+
+# Compiles an AST into closures like Interpreter.compiler, but the closures of an expression pass ints and
+# booleans between each other as raw Python int and bool instead of Number and Boolean. An operator on two raw
+# ints is one Python operation; any other operands are boxed and go through Type.binary_opr, so values and errors are
+# the ones the other engines give. Values are boxed where they leave an expression: the value of a statement or of a
+# function body, the arguments of a call (and so what print gets) and the operands of an operation that may report an
+# error. Reads and call results are unboxed again
+class UnboxedCompiler(Compiler):
+    # Compile a top-level statement into a node for Interpreter.visit
+    def compile_statement(self, node):
+        evaluate = self.compile(node)
+        return CompiledNode(lambda context: box(evaluate(context)), node)
+
+    @staticmethod
+    def compile_NumberNode(node):
+        value = unbox(Number.of(node.token_value.value))
+
+        def evaluate(context):
+            return value
+        return evaluate
+
+    @staticmethod
+    def compile_BooleanNode(node):
+        value = unbox(Boolean.of(node.value))
+
+        def evaluate(context):
+            return value
+        return evaluate
+
+    @staticmethod
+    def compile_ConstantNode(node):
+        value = unbox(node.value_class.of(node.value))
+
+        def evaluate(context):
+            return value
+        return evaluate
+
+    @staticmethod
+    def compile_AccessNode(node):
+        read = Compiler.compile_AccessNode(node)
+
+        def evaluate(context):
+            return unbox(read(context))
+        return evaluate
+
+    @staticmethod
+    def compile_SlotAccessNode(node):
+        slot = node.slot
+        read = Compiler.compile_AccessNode(node)
+
+        def evaluate(context):
+            value = context.symbol_table.slots[slot]
+            if value.__class__ is Number:
+                raw = value.value
+                if raw.__class__ is int:
+                    return raw
+            elif value is None:
+                value = read(context)
+            return unbox(value)
+        return evaluate
+
+    def compile_BinaryOperationNode(self, node, tail=False):
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        operator_token = node.operator
+        right_start, right_end = node.right.position_start, node.right.position_end
+
+        # '&&' and '||' skip the right operand when the left one decides the result. Only two Booleans make a value
+        # for '&&' (a true left side gives the right one); '||' gives the left side when it is true, else the right,
+        # which in tail position may be a TailCall
+        if operator_token.type == Tokens.AND:
+            def evaluate(context):
+                left_value = left(context)
+                if truth(left_value) == 0:
+                    return left_value
+                right_value = right(context)
+                if left_value.__class__ is bool and right_value.__class__ is bool:
+                    return right_value
+                return boxed_operation(left_value, operator_token, right_value, context, right_start, right_end)
+            return evaluate
+        if operator_token.type == Tokens.OR and tail:
+            tail_right = self.compile_tail(node.right)
+
+            def evaluate(context):
+                left_value = left(context)
+                left_truth = truth(left_value)
+                if left_truth == 1:
+                    return left_value
+                if left_truth:
+                    right(context)
+                    return left_value
+                return tail_right(context)
+            return evaluate
+        if operator_token.type == Tokens.OR:
+            def evaluate(context):
+                left_value = left(context)
+                left_truth = truth(left_value)
+                if left_truth == 1:
+                    return left_value
+                right_value = right(context)
+                return left_value if left_truth else right_value
+            return evaluate
+
+        entry = INT_OPERATORS.get(operator_token.type)
+        if entry is None:
+            def evaluate(context):
+                return boxed_operation(left(context), operator_token, right(context), context, right_start,
+                                       right_end)
+            return evaluate
+        function, raw = entry
+        if operator_token.type in DIVISIONS:
+            def evaluate(context):
+                left_value = left(context)
+                right_value = right(context)
+                if left_value.__class__ is int and right_value.__class__ is int and right_value:
+                    value = function(left_value, right_value)
+                    return value if raw else Number.of(value)
+                return boxed_operation(left_value, operator_token, right_value, context, right_start, right_end)
+        elif operator_token.type == Tokens.MUL:
+            # Number.mul_to takes a Boolean right operand as 1 or 0
+            def evaluate(context):
+                left_value = left(context)
+                right_value = right(context)
+                if left_value.__class__ is int and (right_value.__class__ is int or right_value.__class__ is bool):
+                    return left_value * int(right_value)
+                return boxed_operation(left_value, operator_token, right_value, context, right_start, right_end)
+        elif operator_token.type in (Tokens.EQUAL, Tokens.NOT_EQUAL):
+            # Two Booleans compare too
+            def evaluate(context):
+                left_value = left(context)
+                right_value = right(context)
+                if left_value.__class__ is right_value.__class__ and \
+                        (left_value.__class__ is int or left_value.__class__ is bool):
+                    return function(left_value, right_value)
+                return boxed_operation(left_value, operator_token, right_value, context, right_start, right_end)
+        else:
+            def evaluate(context):
+                left_value = left(context)
+                right_value = right(context)
+                if left_value.__class__ is int and right_value.__class__ is int:
+                    return function(left_value, right_value)
+                return boxed_operation(left_value, operator_token, right_value, context, right_start, right_end)
+        return evaluate
+
+    # Unary operators are rare in arithmetic loops and go through Type.unary_opr on the boxed operand
+    def compile_UnaryOperationNode(self, node):
+        operand = self.compile(node.operand)
+        operator_token = node.operator
+
+        def evaluate(context):
+            value = box(operand(context))
+            handler, error = value.unary_opr(operator_token, context)
+            if error:
+                raise ErrorException(error)
+            value, error = handler(value)
+            if error:
+                raise ErrorException(error)
+            return unbox(value)
+        return evaluate
+
+    def compile_WhileNode(self, node):
+        condition = self.compile(node.condition)
+        body = [self.compile(statement) for statement in node.body]
+
+        def evaluate(context):
+            while truth(condition(context)):
+                try:
+                    for statement in body:
+                        statement(context)
+                except ContinueSignal:
+                    continue
+                except BreakSignal:
+                    break
+            return None
+        return evaluate
+
+    # A function body gives its caller a boxed value, whether it is the value of its last statement or of a return.
+    # The statements run as in Compiler.compile_body, so a 'continue' or 'break' outside a loop is a None statement
+    def compile_body(self, body):
+        compiled = super().compile_body(body)
+        evaluate = compiled.evaluate
+
+        def boxed(context):
+            return box(evaluate(context))
+        compiled.evaluate = boxed
+        return compiled
+
+    def compile_FunctionCallNode(self, node, tail=False):
+        callee = self.compile(node.node_call)
+        arguments = [self.compile(arg_node) for arg_node in node.arg_node]
+        position_start, position_end = node.position_start, node.position_end
+
+        if tail:
+            def evaluate(context):
+                value_call = box(callee(context))
+                args = [box(argument(context)) for argument in arguments]
+                if value_call.__class__ is Function or value_call.__class__ is Lambda:
+                    return TailCall(value_call, args, context, position_start, position_end)
+                return unbox(value_call.execute(args, context, position_start, position_end))
+            return evaluate
+
+        def evaluate(context):
+            value_call = box(callee(context))
+            args = [box(argument(context)) for argument in arguments]
+            return unbox(value_call.execute(args, context, position_start, position_end))
+        return evaluate
+
+    # Views over a FlatAST (see Parser.flatast) compile like the node classes they stand for
+    compile_FlatNumberNode = compile_NumberNode
+    compile_FlatBooleanNode = compile_BooleanNode
+    compile_FlatAccessNode = compile_AccessNode
+    compile_FlatUnaryOperationNode = compile_UnaryOperationNode
+    compile_FlatBinaryOperationNode = compile_BinaryOperationNode
+    compile_FlatWhileNode = compile_WhileNode
+    compile_FlatFunctionCallNode = compile_FunctionCallNode
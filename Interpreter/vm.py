@@ -0,0 +1,142 @@
+import time
+
+from Interpreter.bytecode import LOAD_CONSTANT, LOAD_LOCAL, LOAD_NAME, BINARY, UNARY, AND_JUMP, OR_JUMP, JUMP, \
+    JUMP_IF_FALSE, POP, MAKE_FUNCTION, MAKE_LAMBDA, CALL, RETURN_VALUE, Code
+from Interpreter.myfunction import Function
+from Interpreter.mylambda import Lambda
+from error import ErrorException, RunTimeError
+
+
+# Stack machine for Interpreter.bytecode. Calls to functions and lambdas with a Code body push a frame instead of
+# recursing, so deep recursion in the program does not grow the Python stack. With Function.memo set, such a call is
+# looked up in the memo table first and its value recorded there when it returns. Values, contexts and errors are the
+# ones the tree-walking Interpreter makes; an error is raised as ErrorException.
+class VirtualMachine:
+    # Run code in context and return the value of its RETURN_VALUE
+    @staticmethod
+    def run(code, context):
+        interpreter = Function.interpreter
+        memo = Function.memo
+        key = start = None
+        frames = []
+        instructions = code.instructions
+        constants = code.constants
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+
+        while True:
+            opcode = instructions[pc]
+            argument = instructions[pc + 1]
+            pc += 2
+
+            if opcode == LOAD_LOCAL:
+                local = constants[argument]
+                value = context.symbol_table.slots[local[0]]
+                if value is None:
+                    slot, name, position_start, position_end = local
+                    value = context.symbol_table.get(name)
+                    if value is None:
+                        raise ErrorException(RunTimeError(position_start, position_end, f"'{name}' is not defined",
+                                                          context))
+                push(value)
+            elif opcode == LOAD_CONSTANT:
+                push(constants[argument])
+            elif opcode == BINARY:
+                operator, position_start, position_end = constants[argument]
+                right = pop()
+                value, error = pop().binary_opr(operator, right, context, position_start, position_end)
+                if error:
+                    raise ErrorException(error)
+                push(value)
+            elif opcode == AND_JUMP:
+                if stack[-1].value == 0:
+                    pc = argument
+            elif opcode == OR_JUMP:
+                if stack[-1].value == 1:
+                    pc = argument
+            elif opcode == LOAD_NAME:
+                name, position_start, position_end = constants[argument]
+                value = context.symbol_table.get(name)
+                if value is None:
+                    raise ErrorException(RunTimeError(position_start, position_end, f"'{name}' is not defined",
+                                                      context))
+                push(value)
+            elif opcode == CALL:
+                count, position_start, position_end = constants[argument]
+                if count:
+                    args = stack[-count:]
+                    del stack[-count:]
+                else:
+                    args = []
+                value_call = pop()
+                body = getattr(value_call, 'body_node', None)
+                if isinstance(body, Code) and type(value_call) in (Function, Lambda):
+                    if memo is not None:
+                        key, value = memo.lookup(value_call, args, context)
+                        if value is not None:
+                            push(value)
+                            continue
+                        start = time.perf_counter()
+                    exec_ctx = VirtualMachine.enter(value_call, args, context, position_start, position_end)
+                    frames.append((instructions, constants, stack, pc, context, key, start))
+                    instructions = body.instructions
+                    constants = body.constants
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                    pc = 0
+                    context = exec_ctx
+                else:
+                    push(value_call.execute(args, context, position_start, position_end))
+            elif opcode == RETURN_VALUE:
+                value = pop()
+                if not frames:
+                    return value
+                interpreter.leave(context)
+                instructions, constants, stack, pc, context, key, start = frames.pop()
+                if key is not None:
+                    memo.record(key, value, start)
+                push = stack.append
+                pop = stack.pop
+                push(value)
+            elif opcode == JUMP_IF_FALSE:
+                if not pop().value:
+                    pc = argument
+            elif opcode == JUMP:
+                pc = argument
+            elif opcode == POP:
+                pop()
+            elif opcode == UNARY:
+                value = pop()
+                handler, error = value.unary_opr(constants[argument], context)
+                if error:
+                    raise ErrorException(error)
+                value, error = handler(value)
+                if error:
+                    raise ErrorException(error)
+                push(value)
+            elif opcode == MAKE_FUNCTION:
+                function_name, arg_names, body, should_auto_return = constants[argument]
+                function_value = Function(function_name, arg_names, body, should_auto_return)
+                if function_name:
+                    context.symbol_table.add(function_name, function_value)
+                push(function_value)
+            elif opcode == MAKE_LAMBDA:
+                lambda_name, arg_names, body = constants[argument]
+                lambda_value = Lambda(lambda_name, arg_names, body)
+                if lambda_name:
+                    context.symbol_table.add(lambda_name, lambda_value)
+                push(lambda_value)
+            else:
+                raise ValueError(f"unknown opcode {opcode}")
+
+    # Check the arguments of a call made in context at position_start..position_end and bind them in a new frame,
+    # as Function.execute and Lambda.execute do
+    @staticmethod
+    def enter(function, args, context, position_start, position_end):
+        exec_ctx, error = Function.interpreter.enter(function, args, context, position_start, position_end)
+        if error:
+            raise ErrorException(error)
+        return exec_ctx
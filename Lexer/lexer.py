@@ -1,138 +1,151 @@
+from sys import intern
 
 from Lexer.mytoken import Token, Tokens
-from error import IllegalCharError, Position
+from error import ErrorException, IllegalCharError, Position, Source
 
 
 class Lexer:
     def __init__(self, file_name, text):
         self.text = text
         self.fn = file_name
+        self.source = Source(file_name, text)
         self.current_char = None
-        self.position = Position(-1, 0, -1, self.fn, self.text)
+        self.index = -1
         self.advance()
 
     # Move to the next character in the input text
     def advance(self):
-        self.position.advance()
-        if self.position.index < len(self.text):
-            self.current_char = self.text[self.position.index]
+        self.index += 1
+        if self.index < len(self.text):
+            self.current_char = self.text[self.index]
         else:
             self.current_char = None
 
     # Move back to the previous character in the input text
     def comeback(self):
-        self.position.comeback()
-        if self.position.index < len(self.text):
-            self.current_char = self.text[self.position.index]
+        self.index -= 1
+        if self.index < len(self.text):
+            self.current_char = self.text[self.index]
         else:
             self.current_char = None
 
+    # Create a token spanning [start, end); single-char tokens default to end = start + 1
+    def make_token(self, token_type, value, start, end=None):
+        return Token(token_type, value, start, start + 1 if end is None else end, self.source)
+
+    # Create an error spanning [start, end)
+    def make_error(self, start, end, details):
+        return IllegalCharError(Position(start, self.source), Position(end, self.source), details)
+
     # Tokenizes the input source code into a list of tokens
     def tokenize(self):
-        # Tokenizes the input source code into a list of tokens
-        tokens = []
+        try:
+            return list(self.generate_tokens()), None
+        except ErrorException as exception:
+            return [], exception.error
 
+    # Lazily yield the tokens of the input source code; an illegal char raises ErrorException
+    def generate_tokens(self):
         while self.current_char is not None:
             if self.current_char in Tokens.WHITESPACE:
                 self.advance()
             elif self.current_char in ';\n':
-                tokens.append(Token(Tokens.NEWLINE, position_start=self.position))
+                yield self.make_token(Tokens.NEWLINE, None, self.index)
                 self.advance()
             elif self.current_char in Tokens.LETTERS:
                 token, error = self.identifier_keyword()
                 if error:
-                    return [], error
-                tokens.append(token)
+                    raise ErrorException(error)
+                yield token
             elif self.current_char in Tokens.DIGITS:
-                tokens.append(self.identifier_number())
+                yield self.identifier_number()
             elif self.current_char == '+':
-                tokens.append(Token(Tokens.ADD, position_start=self.position))
+                yield self.make_token(Tokens.ADD, None, self.index)
                 self.advance()
             elif self.current_char == '-':
-                tokens.append(self.identifier_minus_or_arrow())
+                yield self.identifier_minus_or_arrow()
                 # self.advance()
             elif self.current_char == '*':
-                tokens.append(Token(Tokens.MUL, position_start=self.position))
+                yield self.make_token(Tokens.MUL, None, self.index)
                 self.advance()
             elif self.current_char == '%':
-                tokens.append(Token(Tokens.MOD, position_start=self.position))
+                yield self.make_token(Tokens.MOD, None, self.index)
                 self.advance()
             elif self.current_char == '/':
-                tokens.append(self.identifier_div())
+                yield self.identifier_div()
                 self.advance()
             elif self.current_char == '=':
-                tokens.append(self.identifier_equal(Tokens.EQUAL, Tokens.ASSIGN))
+                yield self.identifier_equal(Tokens.EQUAL, Tokens.ASSIGN)
                 self.advance()
             elif self.current_char == '!':
-                tokens.append(self.identifier_equal(Tokens.NOT_EQUAL, Tokens.NOT))
+                yield self.identifier_equal(Tokens.NOT_EQUAL, Tokens.NOT)
                 self.advance()
             elif self.current_char == '<':
-                tokens.append(self.identifier_equal(Tokens.LESS_EQUAL, Tokens.LESS))
+                yield self.identifier_equal(Tokens.LESS_EQUAL, Tokens.LESS)
                 self.advance()
             elif self.current_char == '>':
-                tokens.append(self.identifier_equal(Tokens.GREATER_EQUAL, Tokens.GREATER))
+                yield self.identifier_equal(Tokens.GREATER_EQUAL, Tokens.GREATER)
                 self.advance()
             elif self.current_char == 'false' or self.current_char == 'true':
                 token, error = self.identifier_boolean()
                 if error:
-                    return [], error
-                tokens.append(token)
+                    raise ErrorException(error)
+                yield token
                 self.advance()
             elif self.current_char == '(':
-                tokens.append(Token(Tokens.LEFT_PAREN, position_start=self.position))
+                yield self.make_token(Tokens.LEFT_PAREN, None, self.index)
                 self.advance()
             elif self.current_char == ')':
-                tokens.append(Token(Tokens.RIGHT_PAREN, position_start=self.position))
+                yield self.make_token(Tokens.RIGHT_PAREN, None, self.index)
                 self.advance()
             elif self.current_char == '{':
-                tokens.append(Token(Tokens.LEFT_BRACE, position_start=self.position))
+                yield self.make_token(Tokens.LEFT_BRACE, None, self.index)
                 self.advance()
             elif self.current_char == '}':
-                tokens.append(Token(Tokens.RIGHT_BRACE, position_start=self.position))
+                yield self.make_token(Tokens.RIGHT_BRACE, None, self.index)
                 self.advance()
             elif self.current_char == '|':
                 token, error = self.identifier_or()
                 if error:
-                    return [], error
-                tokens.append(token)
+                    raise ErrorException(error)
+                yield token
                 self.advance()
             elif self.current_char == '&':
                 token, error = self.identifier_and()
                 if error:
-                    return [], error
-                tokens.append(token)
+                    raise ErrorException(error)
+                yield token
                 self.advance()
             elif self.current_char == '#':
                 self.skip_comment()
 
             elif self.current_char == ',':
-                tokens.append(Token(Tokens.COMMA, position_start=self.position))
+                yield self.make_token(Tokens.COMMA, None, self.index)
                 self.advance()
             elif self.current_char == ':':
-                tokens.append(Token(Tokens.COLON, position_start=self.position))
+                yield self.make_token(Tokens.COLON, None, self.index)
                 self.advance()
             else:
                 # Raise an exception for any illegal character
-                position_start = self.position.copy()
+                position_start = self.index
                 char = self.current_char
                 self.advance()
-                return [], IllegalCharError(position_start, self.position, "'" + char + "'")
-        tokens.append(Token(Tokens.EOF, position_start=self.position))
-        return tokens, None
+                raise ErrorException(self.make_error(position_start, self.index, "'" + char + "'"))
+        yield self.make_token(Tokens.EOF, None, self.index)
 
     # Create a token representing a number
     def identifier_number(self):
         # Creates a token representing a number
         number_str = ''
-        position_start = self.position.copy()
+        position_start = self.index
         while self.current_char is not None and self.current_char in Tokens.DIGITS:
             number_str += self.current_char
             self.advance()
-        return Token(Tokens.INT, int(number_str), position_start=position_start, position_end=self.position)
+        return self.make_token(Tokens.INT, int(number_str), position_start, self.index)
 
     # Create a token representing a boolean value (true/false)
     def identifier_boolean(self):
-        position_start = self.position.copy()
+        position_start = self.index
         string_boolean = ''
 
         if self.current_char == 'true':
@@ -143,7 +156,7 @@ class Lexer:
                     break
             if string_boolean == 'true':
                 self.comeback()
-                return Token(Tokens.BOOL, True, position_start=position_start, position_end=self.position), None
+                return self.make_token(Tokens.BOOL, True, position_start, self.index), None
 
         elif self.current_char == 'false':
             for i in range(5):
@@ -153,75 +166,76 @@ class Lexer:
                     break
             if string_boolean == 'false':
                 self.comeback()
-                return Token(Tokens.BOOL, False, position_start=position_start, position_end=self.position), None
-        return None, IllegalCharError(position_start, self.position, "Invalid boolean")
+                return self.make_token(Tokens.BOOL, False, position_start, self.index), None
+        return None, self.make_error(position_start, self.index, "Invalid boolean")
 
     def identifier_or(self):
-        position_start = self.position.copy()
+        position_start = self.index
         self.advance()
 
         if self.current_char == '|':
-            return Token(Tokens.OR, position_start=position_start), None
-        return None, IllegalCharError(position_start, self.position, "Invalid |")
+            return self.make_token(Tokens.OR, None, position_start), None
+        return None, self.make_error(position_start, self.index, "Invalid |")
 
     def identifier_equal(self, token_type, token_type2):
-        position_start = self.position.copy()
+        position_start = self.index
         self.advance()
         if self.current_char == '=':
-            return Token(token_type, position_start=position_start)
+            return self.make_token(token_type, None, position_start)
         self.comeback()
-        return Token(token_type2, position_start=position_start)
+        return self.make_token(token_type2, None, position_start)
 
     def identifier_div(self):
-        position_start = self.position.copy()
+        position_start = self.index
         self.advance()
 
         if self.current_char == '/':
-            return Token(Tokens.INTEGER_DIV, position_start=position_start, position_end=self.position)
+            return self.make_token(Tokens.INTEGER_DIV, None, position_start, self.index)
         self.comeback()
-        return Token(Tokens.DIV, position_start=position_start)
+        return self.make_token(Tokens.DIV, None, position_start)
 
     def identifier_and(self):
-        position_start = self.position.copy()
+        position_start = self.index
         self.advance()
 
         if self.current_char == '&':
-            return Token(Tokens.AND, position_start=position_start), None
-        return None, IllegalCharError(position_start, self.position, "Invalid &")
+            return self.make_token(Tokens.AND, None, position_start), None
+        return None, self.make_error(position_start, self.index, "Invalid &")
 
     # Handle keywords and identifiers
     def identifier_keyword(self):
-        position_start = self.position.copy()
+        position_start = self.index
         id_str = ''
         while self.current_char is not None and self.current_char in Tokens.LETTERS_DIGITS + '_':
             id_str += self.current_char
             self.advance()
-        id_str = id_str.lower()
+        id_str = intern(id_str.lower())
         if id_str == 'function':
-            return Token(Tokens.FUNCTION, position_start=position_start), None
+            return self.make_token(Tokens.FUNCTION, None, position_start), None
         if id_str in Tokens.KEYWORDS:
-            return Token(Tokens.KEYWORD, id_str, position_start=position_start, position_end=self.position), None
+            return self.make_token(Tokens.KEYWORD, id_str, position_start, self.index), None
         elif id_str in Tokens.BOOL:
             if id_str == 'true':
-                return Token(Tokens.BOOL, True, position_start=position_start, position_end=self.position), None
+                return self.make_token(Tokens.BOOL, True, position_start, self.index), None
             elif id_str == 'false':
-                return Token(Tokens.BOOL, False, position_start=position_start, position_end=self.position), None
+                return self.make_token(Tokens.BOOL, False, position_start, self.index), None
         elif id_str in Tokens.IDENTIFIER:
-            return Token(Tokens.IDENTIFIER, id_str, position_start=position_start, position_end=self.position), None
-        return Token(Tokens.IDENTIFIER, id_str, position_start=position_start, position_end=self.position), None
+            return self.make_token(Tokens.IDENTIFIER, id_str, position_start, self.index), None
+        return self.make_token(Tokens.IDENTIFIER, id_str, position_start, self.index), None
 
     # Handle '-' (subtraction) or '->' (arrow) token
     def identifier_minus_or_arrow(self):
         token_type = Tokens.SUB
-        position_start = self.position.copy()
+        position_start = self.index
         self.advance()
         if self.current_char == '>':
             self.advance()
             token_type = Tokens.ARROW
-        return Token(token_type, position_start=position_start, position_end=self.position)
+        return self.make_token(token_type, None, position_start, self.index)
 
     def skip_comment(self):
         self.advance()
-        while self.current_char != '\n':
+        while self.current_char is not None and self.current_char != '\n':
             self.advance()
-        self.advance()
\ No newline at end of file
+        if self.current_char is not None:
+            self.advance()
\ No newline at end of file
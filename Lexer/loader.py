@@ -0,0 +1,15 @@
+import mmap
+import os
+from contextlib import contextmanager
+
+
+# Map a script into memory read-only so RegexLexer can scan its bytes without decoding or copying the file; the
+# mapping is closed when the with block ends. An empty file, which cannot be mapped, is b''
+@contextmanager
+def map_file(file_name):
+    with open(file_name, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
@@ -1,5 +1,7 @@
 import string
 
+from error import Position
+
 
 class Tokens:
     INT = 'INT'
@@ -47,16 +49,28 @@ class Tokens:
     KEYWORDS = [WHILE, FUNCTION, RETURN, BREAK, CONTINUE, LAMBDA]
 
 
+# A token holds only its type, value and [start, end) character offsets into a shared Source
 class Token:
-    def __init__(self, type, value=None, position_start=None, position_end=None):
+    __slots__ = ('type', 'value', 'start', 'end', 'source')
+
+    def __init__(self, type, value, start, end, source):
         self.type = type
         self.value = value
-        if position_start:
-            self.position_start = position_start.copy()
-            self.position_end = position_start.copy()
-            self.position_end.advance()
-        if position_end:
-            self.position_end = position_end.copy()
+        self.start = start
+        self.end = end
+        self.source = source
+
+    @property
+    def position_start(self):
+        return Position(self.start, self.source)
+
+    @property
+    def position_end(self):
+        return Position(self.end, self.source)
+
+    # Pickle as a constructor call (see Parser.astcache) instead of the generic per-slot state dict
+    def __reduce__(self):
+        return Token, (self.type, self.value, self.start, self.end, self.source)
 
     def matches(self, type_, value):
         return self.type == type_ and self.value == value
@@ -0,0 +1,82 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from Lexer.mytoken import Token, Tokens
+from Lexer.regexlexer import RegexLexer, gc_paused
+from error import ErrorException, IllegalCharError, Position, Source
+
+# Inputs smaller than this are not worth the process start-up and pickling cost
+MIN_PARALLEL_SIZE = 1 << 20
+
+
+# Split text into about `count` [start, end) ranges that each end right after a '\n'.
+# A newline always terminates the token or comment before it, so every range starts in a clean lexer state.
+def split_chunks(text, count):
+    size = len(text)
+    step = max(1, size // count)
+    newline = '\n' if isinstance(text, str) else b'\n'
+    chunks = []
+    start = 0
+    while start < size:
+        cut = text.find(newline, min(start + step, size) - 1)
+        end = size if cut < 0 else cut + 1
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+# Worker: lex the chunk found at offset base and return its tokens as columns (types, values, starts, ends)
+# with offsets already relative to the whole text and without the chunk's own EOF, or the error of the chunk
+def lex_chunk(chunk, base):
+    lexer = RegexLexer('<chunk>', chunk)
+    try:
+        with gc_paused():
+            tokens = list(lexer.generate_tokens())
+    except ErrorException as exception:
+        error = exception.error
+        return None, (base + error.pos_start.index, base + error.pos_end.index, error.details)
+    tokens.pop()
+    return ([token.type for token in tokens], [token.value for token in tokens],
+            [base + token.start for token in tokens], [base + token.end for token in tokens]), None
+
+
+# Tokenizer that lexes newline-aligned chunks in a process pool and stitches the results back together.
+# Produces the same tokens and errors as RegexLexer.tokenize.
+class ParallelLexer:
+    def __init__(self, file_name, text, workers=None):
+        self.text = text
+        self.fn = file_name
+        self.source = Source(file_name, text)
+        self.workers = workers or os.cpu_count() or 1
+
+    # Tokenizes the input source code into a list of tokens
+    def tokenize(self):
+        try:
+            with gc_paused():
+                return list(self.generate_tokens()), None
+        except ErrorException as exception:
+            return [], exception.error
+
+    # Yield the stitched tokens chunk by chunk; an illegal char raises ErrorException
+    def generate_tokens(self):
+        if self.workers == 1 or len(self.text) < MIN_PARALLEL_SIZE:
+            lexer = RegexLexer(self.fn, self.text)
+            lexer.source = self.source
+            yield from lexer.generate_tokens()
+            return
+
+        source = self.source
+        chunks = split_chunks(self.text, self.workers * 4)
+        with ProcessPoolExecutor(self.workers) as executor:
+            results = executor.map(lex_chunk, [self.text[start:end] for start, end in chunks],
+                                   [start for start, end in chunks])
+            for columns, error in results:
+                if error:
+                    start, end, details = error
+                    raise ErrorException(IllegalCharError(Position(start, source), Position(end, source), details))
+                types, values, starts, ends = columns
+                yield from map(Token, types, values, starts, ends, repeat(source))
+
+        end = len(self.text)
+        yield Token(Tokens.EOF, None, end, end + 1, source)
@@ -0,0 +1,129 @@
+import gc
+import re
+from contextlib import contextmanager
+from sys import intern
+
+from Lexer.mytoken import Token, Tokens
+from error import ErrorException, IllegalCharError, Position, Source
+
+# One alternation for the whole language; the order of the groups matters, two-char operators come first
+MASTER_PATTERN = re.compile(r"""
+    (?P<WHITESPACE>[ \t]+)
+  | (?P<NEWLINE>[;\n])
+  | (?P<IDENTIFIER>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<INT>[0-9]+)
+  | (?P<COMMENT>\#[^\n]*\n?)
+  | (?P<OPERATOR>->|//|==|!=|<=|>=|&&|\|\||[-+*/%=!<>(){},:])
+  | (?P<ILLEGAL>[|&])
+  | (?P<ERROR>[\s\S])
+""", re.VERBOSE)
+
+# The same pattern over raw ASCII bytes, used for memory-mapped scripts (see Lexer.loader)
+BYTES_PATTERN = re.compile(MASTER_PATTERN.pattern.encode('ascii'), re.VERBOSE)
+
+# Token type of every operator matched by the OPERATOR group
+OPERATORS = {
+    '->': Tokens.ARROW,
+    '//': Tokens.INTEGER_DIV,
+    '==': Tokens.EQUAL,
+    '!=': Tokens.NOT_EQUAL,
+    '<=': Tokens.LESS_EQUAL,
+    '>=': Tokens.GREATER_EQUAL,
+    '&&': Tokens.AND,
+    '||': Tokens.OR,
+    '+': Tokens.ADD,
+    '-': Tokens.SUB,
+    '*': Tokens.MUL,
+    '/': Tokens.DIV,
+    '%': Tokens.MOD,
+    '=': Tokens.ASSIGN,
+    '!': Tokens.NOT,
+    '<': Tokens.LESS,
+    '>': Tokens.GREATER,
+    '(': Tokens.LEFT_PAREN,
+    ')': Tokens.RIGHT_PAREN,
+    '{': Tokens.LEFT_BRACE,
+    '}': Tokens.RIGHT_BRACE,
+    ',': Tokens.COMMA,
+    ':': Tokens.COLON,
+}
+BYTES_OPERATORS = {operator.encode('ascii'): token_type for operator, token_type in OPERATORS.items()}
+
+
+# Building a list of millions of tokens triggers a cyclic GC pass every few hundred allocations,
+# each rescanning the objects that survived so far; tokens never form cycles, so pause the collector
+@contextmanager
+def gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+# Tokenizer driven by MASTER_PATTERN: same tokens and errors as Lexer.tokenize, without the per-char advance().
+# text may also be a bytes-like buffer such as an mmap, in which case only identifier slices are decoded.
+class RegexLexer:
+    def __init__(self, file_name, text):
+        self.text = text
+        self.fn = file_name
+        self.source = Source(file_name, text)
+        self.binary = not isinstance(text, str)
+
+    # The (possibly multi-byte) character starting at index, for error messages
+    def char_at(self, index):
+        if not self.binary:
+            return self.text[index]
+        return bytes(self.text[index:index + 4]).decode('utf-8', errors='replace')[0]
+
+    # Tokenizes the input source code into a list of tokens
+    def tokenize(self):
+        try:
+            with gc_paused():
+                return list(self.generate_tokens()), None
+        except ErrorException as exception:
+            return [], exception.error
+
+    # Lazily yield the tokens of the input source code; an illegal char raises ErrorException
+    def generate_tokens(self):
+        source = self.source
+        binary = self.binary
+        pattern, operators = (BYTES_PATTERN, BYTES_OPERATORS) if binary else (MASTER_PATTERN, OPERATORS)
+
+        for match in pattern.finditer(self.text):
+            kind = match.lastgroup
+            start = match.start()
+            if kind == 'WHITESPACE' or kind == 'COMMENT':
+                continue
+            if kind == 'NEWLINE':
+                yield Token(Tokens.NEWLINE, None, start, start + 1, source)
+            elif kind == 'IDENTIFIER':
+                id_str = match.group().lower()
+                if binary:
+                    id_str = id_str.decode('ascii')
+                id_str = intern(id_str)
+                if id_str == Tokens.FUNCTION:
+                    yield Token(Tokens.FUNCTION, None, start, start + 1, source)
+                elif id_str in Tokens.KEYWORDS:
+                    yield Token(Tokens.KEYWORD, id_str, start, match.end(), source)
+                else:
+                    yield Token(Tokens.IDENTIFIER, id_str, start, match.end(), source)
+            elif kind == 'INT':
+                yield Token(Tokens.INT, int(match.group()), start, match.end(), source)
+            elif kind == 'OPERATOR':
+                token_type = operators[match.group()]
+                if token_type == Tokens.ARROW:
+                    yield Token(token_type, None, start, start + 2, source)
+                else:
+                    yield Token(token_type, None, start, start + 1, source)
+            elif kind == 'ILLEGAL':
+                raise ErrorException(IllegalCharError(Position(start, source), Position(start + 1, source),
+                                                      "Invalid " + self.char_at(start)))
+            else:
+                raise ErrorException(IllegalCharError(Position(start, source), Position(start + 1, source),
+                                                      "'" + self.char_at(start) + "'"))
+
+        end = len(self.text)
+        yield Token(Tokens.EOF, None, end, end + 1, source)
@@ -74,13 +74,15 @@ class FunctionDefinitionNode:
         self.arg_name = arg_name
         self.body = body
         self.should_auto_return = should_auto_return
+        # A '->' body is one expression, a multi-line body is the list of its statements
+        body_nodes = self.body if isinstance(self.body, list) else [self.body]
         if self.token_name:
             self.position_start = self.token_name.position_start
         elif len(self.arg_name) > 0:
             self.position_start = self.arg_name[0].position_start
         else:
-            self.position_start = self.body.position_start
-        self.position_end = self.body.position_end
+            self.position_start = body_nodes[0].position_start
+        self.position_end = body_nodes[-1].position_end
 
 
 # Represents a function call in the AST
@@ -126,9 +128,9 @@ class LambdaNode:
 
 # Represents a continue statement in the AST (used in loops)
 class ContinueNode:
-    def __init__(self):
-        self.position_start = None
-        self.position_end = None
+    def __init__(self, position_start=None, position_end=None):
+        self.position_start = position_start
+        self.position_end = position_end
 
     def __repr__(self):
         return f'continue '
@@ -136,9 +138,9 @@ class ContinueNode:
 
 # Represents a break statement in the AST (used in loops)
 class BreakNode:
-    def __init__(self):
-        self.position_start = None
-        self.position_end = None
+    def __init__(self, position_start=None, position_end=None):
+        self.position_start = position_start
+        self.position_end = position_end
 
     def __repr__(self):
         return f'break '
@@ -146,10 +148,38 @@ class BreakNode:
 
 # Represents a return statement in the AST (used in functions)
 class ReturnNode:
-    def __init__(self, node_to_return):
+    def __init__(self, node_to_return, position_start=None, position_end=None):
         self.node_to_return = node_to_return
-        self.position_start = node_to_return.position_start
-        self.position_end = node_to_return.position_end
+        # A bare 'return' has no value node and takes the position of the keyword
+        self.position_start = node_to_return.position_start if node_to_return else position_start
+        self.position_end = node_to_return.position_end if node_to_return else position_end
 
     def __repr__(self):
         return f'return {self.node_to_return}'
+
+
+# Represents a value computed before evaluation by Interpreter.optimizer: evaluates to value_class(value) with the
+# positions the folded subtree would have given its value
+class ConstantNode:
+    def __init__(self, value_class, value, position_start, position_end):
+        self.value_class = value_class
+        self.value = value
+        self.position_start = position_start
+        self.position_end = position_end
+
+    def __repr__(self):
+        return f"ConstantNode({self.value!r})"
+
+
+# Represents a read of a parameter of the enclosing function, resolved by Interpreter.resolver to the parameter's
+# slot in the argument list of the function's frame
+class SlotAccessNode:
+    def __init__(self, token_name, slot):
+        self.token_name = token_name
+        self.name = token_name.value
+        self.slot = slot
+        self.position_start = token_name.position_start
+        self.position_end = token_name.position_end
+
+    def __repr__(self):
+        return f"SlotAccessNode({self.name}@{self.slot})"
@@ -0,0 +1,87 @@
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import time
+
+from Lexer.regexlexer import gc_paused
+from error import Source
+
+# Bump whenever the AST node classes, Token or Position change shape, so that stale cache files are never loaded
+FORMAT_VERSION = 1
+
+
+# Pickler that leaves the Source out of the file: every token and position points at it, and it holds the whole text
+class ASTPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        if isinstance(obj, Source):
+            return 'source'
+        return None
+
+
+# Unpickler that points the loaded tokens and positions at the Source of the text being run
+class ASTUnpickler(pickle.Unpickler):
+    def __init__(self, file, source):
+        super().__init__(file)
+        self.source = source
+
+    def persistent_load(self, pid):
+        if pid != 'source':
+            raise pickle.UnpicklingError(f"unknown persistent id {pid!r}")
+        return self.source
+
+
+# Directory of parsed programs (the node list of Parser.parse) keyed by a hash of the source text and FORMAT_VERSION.
+# Files are written to a temporary name and renamed into place, so processes sharing the directory never read a
+# partial file; a file that cannot be loaded counts as a miss and is overwritten.
+class ASTCache:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+
+    # Cache file name for a source text; str and bytes-like texts are kept apart since their offsets differ
+    def key(self, text):
+        digest = hashlib.sha256(f"lambda-ast-{FORMAT_VERSION}-{type(text).__name__}\0".encode('ascii'))
+        digest.update(text.encode('utf-8') if isinstance(text, str) else text)
+        return digest.hexdigest()
+
+    def path(self, text):
+        return os.path.join(self.directory, self.key(text) + '.ast')
+
+    # Return the cached nodes of text with their positions in a new Source(file_name, text), or None on a miss
+    def load(self, file_name, text):
+        start = time.perf_counter()
+        try:
+            with open(self.path(text), 'rb') as file, gc_paused():
+                nodes = ASTUnpickler(file, Source(file_name, text)).load()
+        # A truncated or foreign file can fail to unpickle in almost any way; treat all of them as a miss
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.load_time += time.perf_counter() - start
+        return nodes
+
+    # Atomically write the nodes parsed from text
+    def store(self, text, nodes):
+        buffer = io.BytesIO()
+        try:
+            ASTPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(nodes)
+        except RecursionError:
+            return
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(buffer.getvalue())
+            os.replace(temporary, self.path(text))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    # One-line summary of the hit/miss counters and the time spent loading hits
+    def stats(self):
+        return f"ast cache: {self.hits} hits, {self.misses} misses, {self.load_time * 1000:.1f}ms loading"
@@ -0,0 +1,366 @@
+import struct
+from array import array
+
+from Lexer.mytoken import Token, Tokens
+from Parser.astNode import NumberNode, BinaryOperationNode, UnaryOperationNode, BooleanNode, WhileNode, AccessNode, \
+    FunctionDefinitionNode, FunctionCallNode, LambdaNode, ContinueNode, BreakNode, ReturnNode
+from error import Position
+
+# Node kinds of the flat form; TOKEN is a bare token such as a function name or a parameter
+NUMBER, BIG_NUMBER, BOOLEAN, ACCESS, TOKEN, UNARY, BINARY, WHILE, FUNCTION, CALL, LAMBDA, CONTINUE, BREAK, RETURN = \
+    range(14)
+
+# Token types a flat node can carry, stored as their index in this list
+TOKEN_TYPES = [Tokens.INT, Tokens.BOOL, Tokens.IDENTIFIER, Tokens.KEYWORD, Tokens.ADD, Tokens.SUB, Tokens.MUL,
+               Tokens.DIV, Tokens.INTEGER_DIV, Tokens.MOD, Tokens.OR, Tokens.AND, Tokens.NOT, Tokens.EQUAL,
+               Tokens.NOT_EQUAL, Tokens.LESS, Tokens.LESS_EQUAL, Tokens.GREATER, Tokens.GREATER_EQUAL]
+TOKEN_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+# One column per attribute: (name, array typecode). Child columns hold node indices, or an offset into `lists`
+# where a list is stored as its length followed by its node indices; -1 stands for None
+COLUMNS = (
+    ('kind', 'B'),
+    ('token_type', 'B'),
+    ('token_value', 'q'),
+    ('token_start', 'i'),
+    ('token_end', 'i'),
+    ('start', 'i'),
+    ('end', 'i'),
+    ('first', 'i'),
+    ('second', 'i'),
+    ('third', 'i'),
+)
+MAGIC = b'LAST'
+FORMAT_VERSION = 1
+# magic, version, node count, lists length, string count, string bytes length, root list offset
+HEADER = struct.Struct('<4sIqqqqq')
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+# Round a byte offset up so every column of the serialized form starts aligned for memoryview.cast
+def aligned(offset):
+    return (offset + 7) & ~7
+
+
+# A program stored as typed columns instead of a graph of node objects. Built from Parser.parse().node with
+# from_nodes, written with tobytes and reopened with frombuffer, which casts the columns in place, so a memory-mapped
+# file is walked without deserializing it. statements() returns views the Interpreter evaluates like the nodes.
+class FlatAST:
+    def __init__(self, source):
+        self.source = source
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+        self.lists = array('i')
+        self.string_offsets = array('q', [0])
+        self.string_data = bytearray()
+        self.string_codes = {}
+        self.string_cache = {}
+        self.root = -1
+
+    @classmethod
+    def from_nodes(cls, nodes, source):
+        tree = cls(source)
+        tree.root = tree.add_list(nodes)
+        return tree
+
+    # Number of nodes
+    def __len__(self):
+        return len(self.kind)
+
+    # Intern an identifier in the string table and return its code
+    def add_string(self, text):
+        code = self.string_codes.get(text)
+        if code is None:
+            code = self.string_codes[text] = len(self.string_offsets) - 1
+            self.string_data += text.encode('utf-8')
+            self.string_offsets.append(len(self.string_data))
+        return code
+
+    # The identifier with the given code, decoded once
+    def string(self, code):
+        text = self.string_cache.get(code)
+        if text is None:
+            text = bytes(self.string_data[self.string_offsets[code]:self.string_offsets[code + 1]]).decode('utf-8')
+            self.string_cache[code] = text
+        return text
+
+    # Store nodes (or tokens) as a list and return its offset in `lists`
+    def add_list(self, items):
+        indices = [self.add(item) for item in items]
+        offset = len(self.lists)
+        self.lists.append(len(indices))
+        self.lists.extend(indices)
+        return offset
+
+    # Append one row for a node of the given kind and return its index
+    def add_row(self, kind, token=None, node=None, first=-1, second=-1, third=-1, value=0):
+        self.kind.append(kind)
+        if token is not None:
+            self.token_type.append(TOKEN_CODES[token.type])
+            self.token_start.append(token.start)
+            self.token_end.append(token.end)
+        else:
+            self.token_type.append(0)
+            self.token_start.append(-1)
+            self.token_end.append(-1)
+        self.token_value.append(value)
+        position_start = node.position_start if node is not None else None
+        position_end = node.position_end if node is not None else None
+        self.start.append(position_start.index if position_start is not None else -1)
+        self.end.append(position_end.index if position_end is not None else -1)
+        self.first.append(first)
+        self.second.append(second)
+        self.third.append(third)
+        return len(self.kind) - 1
+
+    # Append a node, its children first, and return its index
+    def add(self, node):
+        if node is None:
+            return -1
+        if isinstance(node, Token):
+            return self.add_row(TOKEN, node, node, value=self.add_string(node.value))
+        if isinstance(node, NumberNode):
+            value = node.token_value.value
+            if INT64_MIN <= value <= INT64_MAX:
+                return self.add_row(NUMBER, node.token_value, node, value=value)
+            return self.add_row(BIG_NUMBER, node.token_value, node, value=self.add_string(str(value)))
+        if isinstance(node, BooleanNode):
+            return self.add_row(BOOLEAN, node.value, node, value=int(bool(node.value.value)))
+        if isinstance(node, AccessNode):
+            return self.add_row(ACCESS, node.token_name, node, value=self.add_string(node.token_name.value))
+        if isinstance(node, UnaryOperationNode):
+            return self.add_row(UNARY, node.operator, node, self.add(node.operand))
+        if isinstance(node, BinaryOperationNode):
+            left = self.add(node.left)
+            right = self.add(node.right)
+            return self.add_row(BINARY, node.operator, node, left, right)
+        if isinstance(node, WhileNode):
+            condition = self.add(node.condition)
+            return self.add_row(WHILE, None, node, condition, self.add_list(node.body))
+        if isinstance(node, FunctionDefinitionNode):
+            name = self.add(node.token_name)
+            arguments = self.add_list(node.arg_name)
+            body = self.add(node.body) if node.should_auto_return else self.add_list(node.body)
+            return self.add_row(FUNCTION, None, node, name, arguments, body, int(node.should_auto_return))
+        if isinstance(node, FunctionCallNode):
+            callee = self.add(node.node_call)
+            return self.add_row(CALL, None, node, callee, self.add_list(node.arg_node))
+        if isinstance(node, LambdaNode):
+            name = self.add(node.var_name_tok)
+            arguments = self.add_list(node.arg_name_toks)
+            return self.add_row(LAMBDA, None, node, name, arguments, self.add(node.body_node))
+        if isinstance(node, ContinueNode):
+            return self.add_row(CONTINUE, None, node)
+        if isinstance(node, BreakNode):
+            return self.add_row(BREAK, None, node)
+        if isinstance(node, ReturnNode):
+            return self.add_row(RETURN, None, node, self.add(node.node_to_return))
+        raise TypeError(f"cannot flatten {type(node).__name__}")
+
+    # The serialized form: HEADER, then every column, `lists`, the string offsets and the string bytes, 8-byte aligned
+    def tobytes(self):
+        count = len(self.kind)
+        parts = [HEADER.pack(MAGIC, FORMAT_VERSION, count, len(self.lists), len(self.string_offsets) - 1,
+                             len(self.string_data), self.root)]
+        offset = HEADER.size
+        for column in [getattr(self, name) for name, _ in COLUMNS] + [self.lists, self.string_offsets]:
+            data = column.tobytes()
+            parts.append(bytes(aligned(offset) - offset))
+            parts.append(data)
+            offset = aligned(offset) + len(data)
+        parts.append(bytes(self.string_data))
+        return b''.join(parts)
+
+    # Reopen a serialized form from any buffer (bytes, mmap) without copying: columns become memoryview casts
+    @classmethod
+    def frombuffer(cls, buffer, source):
+        magic, version, count, lists_length, string_count, string_length, root = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("not a flat AST of this format version")
+        tree = cls(source)
+        view = memoryview(buffer)
+        offset = HEADER.size
+        columns = [(name, typecode, count) for name, typecode in COLUMNS]
+        columns += [('lists', 'i', lists_length), ('string_offsets', 'q', string_count + 1)]
+        for name, typecode, length in columns:
+            offset = aligned(offset)
+            size = array(typecode).itemsize * length
+            setattr(tree, name, view[offset:offset + size].cast(typecode))
+            offset += size
+        tree.string_data = view[offset:offset + string_length]
+        tree.root = root
+        return tree
+
+    # Views of the top-level statements
+    def statements(self):
+        return self.node_list(self.root)
+
+    # View of node index (a Token for TOKEN nodes), or None for -1
+    def node(self, index):
+        if index < 0:
+            return None
+        kind = self.kind[index]
+        if kind == TOKEN:
+            return self.token(index)
+        return VIEWS[kind](self, index)
+
+    # Views of the list stored at offset in `lists`
+    def node_list(self, offset):
+        lists = self.lists
+        return [self.node(lists[item]) for item in range(offset + 1, offset + 1 + lists[offset])]
+
+    # Rebuild the token of a node; identifiers come back from the string table, literals from token_value
+    def token(self, index):
+        kind = self.kind[index]
+        token_type = TOKEN_TYPES[self.token_type[index]]
+        value = self.token_value[index]
+        if kind in (TOKEN, ACCESS):
+            value = self.string(value)
+        elif kind == BIG_NUMBER:
+            value = int(self.string(value))
+        elif kind == BOOLEAN:
+            value = bool(value)
+        elif kind != NUMBER:
+            value = None
+        return Token(token_type, value, self.token_start[index], self.token_end[index], self.source)
+
+    def position(self, offset):
+        return Position(offset, self.source) if offset >= 0 else None
+
+
+# Read-only view of one node of a FlatAST, with the attributes of the Parser.astNode class it stands for
+class FlatNode:
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def position_start(self):
+        return self.tree.position(self.tree.start[self.index])
+
+    @property
+    def position_end(self):
+        return self.tree.position(self.tree.end[self.index])
+
+    @property
+    def token(self):
+        return self.tree.token(self.index)
+
+    @property
+    def first(self):
+        return self.tree.node(self.tree.first[self.index])
+
+    @property
+    def second(self):
+        return self.tree.node(self.tree.second[self.index])
+
+    @property
+    def third(self):
+        return self.tree.node(self.tree.third[self.index])
+
+    @property
+    def second_list(self):
+        return self.tree.node_list(self.tree.second[self.index])
+
+    def __repr__(self):
+        return f"{type(self).__name__}#{self.index}"
+
+
+class FlatNumberNode(FlatNode):
+    __slots__ = ()
+    token_value = FlatNode.token
+
+
+class FlatBooleanNode(FlatNode):
+    __slots__ = ()
+    value = FlatNode.token
+
+
+class FlatAccessNode(FlatNode):
+    __slots__ = ()
+    token_name = FlatNode.token
+
+    @property
+    def name(self):
+        return self.tree.string(self.tree.token_value[self.index])
+
+
+class FlatUnaryOperationNode(FlatNode):
+    __slots__ = ()
+    operator = FlatNode.token
+    operand = FlatNode.first
+
+
+class FlatBinaryOperationNode(FlatNode):
+    __slots__ = ()
+    operator = FlatNode.token
+    left = FlatNode.first
+    right = FlatNode.second
+
+
+class FlatWhileNode(FlatNode):
+    __slots__ = ()
+    condition = FlatNode.first
+    body = FlatNode.second_list
+
+
+class FlatFunctionDefinitionNode(FlatNode):
+    __slots__ = ()
+    token_name = FlatNode.first
+    arg_name = FlatNode.second_list
+
+    @property
+    def should_auto_return(self):
+        return bool(self.tree.token_value[self.index])
+
+    @property
+    def body(self):
+        if self.should_auto_return:
+            return self.third
+        return self.tree.node_list(self.tree.third[self.index])
+
+
+class FlatFunctionCallNode(FlatNode):
+    __slots__ = ()
+    node_call = FlatNode.first
+    arg_node = FlatNode.second_list
+
+
+class FlatLambdaNode(FlatNode):
+    __slots__ = ()
+    var_name_tok = FlatNode.first
+    arg_name_toks = FlatNode.second_list
+    body_node = FlatNode.third
+
+
+class FlatContinueNode(FlatNode):
+    __slots__ = ()
+
+
+class FlatBreakNode(FlatNode):
+    __slots__ = ()
+
+
+class FlatReturnNode(FlatNode):
+    __slots__ = ()
+    node_to_return = FlatNode.first
+
+
+# View class of each node kind (TOKEN nodes are handed out as Token objects)
+VIEWS = {
+    NUMBER: FlatNumberNode,
+    BIG_NUMBER: FlatNumberNode,
+    BOOLEAN: FlatBooleanNode,
+    ACCESS: FlatAccessNode,
+    UNARY: FlatUnaryOperationNode,
+    BINARY: FlatBinaryOperationNode,
+    WHILE: FlatWhileNode,
+    FUNCTION: FlatFunctionDefinitionNode,
+    CALL: FlatFunctionCallNode,
+    LAMBDA: FlatLambdaNode,
+    CONTINUE: FlatContinueNode,
+    BREAK: FlatBreakNode,
+    RETURN: FlatReturnNode,
+}
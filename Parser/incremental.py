@@ -0,0 +1,191 @@
+from bisect import bisect_right
+
+from Lexer.mytoken import Tokens
+from Lexer.regexlexer import RegexLexer
+from Parser.parser import Parser, ParseResult
+from error import ErrorException, Source
+
+
+# Source of one segment: offsets are local to the segment, lines are shifted by the lines of the segments before it.
+# The text is set once the segment has been cut from its region (see IncrementalDocument.split_region)
+class SegmentSource(Source):
+    __slots__ = ('document', 'segment')
+
+    def __init__(self, file_name, document):
+        super().__init__(file_name, '')
+        self.document = document
+        self.segment = None
+
+    def set_text(self, text):
+        self.data = self.decoded = text
+        self.line_starts = None
+
+    # Error rendering may show lines past the end of the segment, so hand out the text up to the end of the document
+    @property
+    def text(self):
+        return self.document.text_from(self.segment)
+
+    def line_column(self, index):
+        line, column = super().line_column(index)
+        return self.document.first_line(self.segment) + line, column
+
+
+# A run of whole lines holding one or more complete top-level statements (or the first syntax error). continued
+# tells whether statements come before it, which decides how a leading '}' is reported
+class Segment:
+    __slots__ = ('text', 'nodes', 'error', 'line_count', 'continued')
+
+    def __init__(self, text, nodes, error, continued):
+        self.text = text
+        self.nodes = nodes
+        self.error = error
+        self.line_count = text.count('\n')
+        self.continued = continued
+
+
+# Keeps a program split into per-statement segments with their ASTs, so that an edit only re-lexes and
+# re-parses the segments it touches instead of running Lexer and Parser over the whole text again
+class IncrementalDocument:
+    def __init__(self, file_name, text):
+        self.file_name = file_name
+        self.segments = []
+        self.starts = []
+        self.reparsed = 0
+        self.edit(0, 0, text)
+
+    @property
+    def text(self):
+        return ''.join(segment.text for segment in self.segments)
+
+    # Replace text[start:end] with new_text and re-parse only the affected segments
+    def edit(self, start, end, new_text):
+        if self.segments:
+            first = max(bisect_right(self.starts, start) - 1, 0)
+            last = max(bisect_right(self.starts, end) - 1, first)
+        else:
+            first, last = 0, -1
+        region_start = self.starts[first] if self.segments else 0
+        old_text = ''.join(segment.text for segment in self.segments[first:last + 1])
+        region = old_text[:start - region_start] + new_text + old_text[end - region_start:]
+        old_length = len(old_text)
+        continued = self.segments[first].continued if self.segments else False
+
+        # Grow the region while its last statement would swallow the following segments in a full parse, or while
+        # the next segment was parsed with or without statements before it and no longer is
+        while True:
+            pieces, is_open = self.split_region(region, continued)
+            if last + 1 >= len(self.segments):
+                break
+            if not is_open:
+                if self.segments[last + 1].continued == (pieces[-1].continued or bool(pieces[-1].nodes)):
+                    break
+                is_open = 'one'
+            if is_open == 'all':
+                following = self.segments[last + 1:]
+                last = len(self.segments) - 1
+            else:
+                following = [self.segments[last + 1]]
+                last += 1
+            extra = ''.join(segment.text for segment in following)
+            region += extra
+            old_length += len(extra)
+
+        new_starts = []
+        offset = region_start
+        for segment in pieces:
+            new_starts.append(offset)
+            offset += len(segment.text)
+        delta = len(region) - old_length
+        self.segments[first:last + 1] = pieces
+        self.starts[first:] = new_starts + [offset_start + delta for offset_start in self.starts[last + 1:]]
+        self.reparsed = len(region)
+        return self.parse()
+
+    # Whole-program result in the shape of Parser.parse: every statement, or the first syntax error. A blank document
+    # is a single segment holding the error parse() gives at EOF (see Parser.parse_stream)
+    def parse(self):
+        result = ParseResult()
+        nodes = []
+        for segment in self.segments:
+            if segment.error:
+                return result.failure(segment.error)
+            nodes.extend(segment.nodes)
+        return result.success(nodes)
+
+    # Number of lines before segment, used to report absolute line numbers in errors
+    def first_line(self, segment):
+        lines = 0
+        for other in self.segments:
+            if other is segment:
+                return lines
+            lines += other.line_count
+        return 0
+
+    # Text from the start of segment to the end of the document
+    def text_from(self, segment):
+        for index, other in enumerate(self.segments):
+            if other is segment:
+                return ''.join(following.text for following in self.segments[index:])
+        return segment.text
+
+    # Lex and parse a region once and cut it after every '\n' that ends a top-level statement; continued tells that
+    # statements come before the region. Returns the segments and whether the region is left open: 'one' if it ends
+    # inside a construct that the next segment may close, 'all' if its last statement is a multi-line function body,
+    # which takes every following statement
+    def split_region(self, text, continued=False):
+        cut = RegionCut(self.file_name, self)
+        parser = Parser(cut.tokens(RegexLexer(self.file_name, text)))
+        pieces, nodes = [], []
+        is_open = None
+        for result in parser.parse_stream(continued):
+            at_end = parser.current_token is not None and parser.current_token.type == Tokens.EOF
+            if result.error:
+                pieces.append(cut.segment(text, len(text), nodes, result.error, continued))
+                return pieces, 'one' if at_end else None
+            nodes.append(result.node)
+            token = parser.current_token
+            if token.type == Tokens.NEWLINE and text[cut.base + token.start] == '\n':
+                pieces.append(cut.segment(text, cut.base + token.end, nodes, None, continued))
+                nodes = []
+                continued = True
+            # Only a multi-line function body reads past the newline ending its statement, and it reads to EOF
+            is_open = 'all' if at_end else None
+        if not pieces or cut.base != len(text):
+            pieces.append(cut.segment(text, len(text), nodes, None, continued))
+        return pieces, is_open
+
+
+# Hands the tokens of a region to the parser as if each statement's segment had been lexed on its own: offsets are
+# made local to the segment being parsed and point at its SegmentSource. The parser buffers one token, so the
+# tokens that follow a cut belong to the next segment
+class RegionCut:
+    __slots__ = ('file_name', 'document', 'base', 'source')
+
+    def __init__(self, file_name, document):
+        self.file_name = file_name
+        self.document = document
+        self.base = 0
+        self.source = SegmentSource(file_name, document)
+
+    def tokens(self, lexer):
+        try:
+            for token in lexer.generate_tokens():
+                token.start -= self.base
+                token.end -= self.base
+                token.source = self.source
+                yield token
+        except ErrorException as exception:
+            for position in (exception.error.pos_start, exception.error.pos_end):
+                position.index -= self.base
+                position.source = self.source
+            raise
+
+    # End the current segment at offset end of the region text and start the next one there
+    def segment(self, text, end, nodes, error, continued):
+        source = self.source
+        source.set_text(text[self.base:end])
+        segment = Segment(source.data, nodes, error, continued)
+        source.segment = segment
+        self.base = end
+        self.source = SegmentSource(self.file_name, self.document)
+        return segment
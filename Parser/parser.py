@@ -1,34 +1,76 @@
 from Parser.astNode import NumberNode, BinaryOperationNode, UnaryOperationNode, BooleanNode, WhileNode, AccessNode, \
     FunctionDefinitionNode, FunctionCallNode, LambdaNode, ContinueNode, BreakNode, ReturnNode
-from error import InvalidSyntaxError
+from error import ErrorException, InvalidSyntaxError, InvalidSyntaxException
 from Lexer.mytoken import Tokens
 
 
+# Grammar methods return AST nodes directly and raise InvalidSyntaxException on the first syntax error;
+# only parse() and parse_stream() wrap their outcome in a ParseResult
 class Parser:
 
+    # tokens may be a list or a lazy generator (Lexer.generate_tokens); only current_token is buffered
     def __init__(self, tokens):
-        self.tokens = tokens
+        self.tokens = iter(tokens)
         self.tokens_pos = -1
         self.current_token = None
-        self.advance()
+        self.lexer_error = None
+        try:
+            self.advance()
+        except ErrorException as exception:
+            self.lexer_error = exception.error
         self.tempFunc = False
         self.tempLoop = False
 
-    # Move to the next token and update current_token
+    # Move to the next token and update current_token, staying on the last token (EOF) once the stream is drained
     def advance(self):
         self.tokens_pos += 1
-        if self.tokens_pos < len(self.tokens):
-            self.current_token = self.tokens[self.tokens_pos]
-        else:
-            return self.current_token
+        self.current_token = next(self.tokens, self.current_token)
+        return self.current_token
+
+    # Build the exception for a syntax error between two positions, to be raised by the caller
+    @staticmethod
+    def syntax_error(position_start, position_end, details):
+        return InvalidSyntaxException(InvalidSyntaxError(position_start, position_end, details))
 
     # Main parsing function - attempts to parse multiple statements
     def parse(self):
-        result = self.statements()
-        if not result.error and self.current_token.type != Tokens.EOF:
-            return result.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-                                                     "Unexpected token"))
-        return result
+        if self.lexer_error:
+            return ParseResult().failure(self.lexer_error)
+        try:
+            statements = self.statements()
+            if self.current_token.type != Tokens.EOF:
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        "Unexpected token")
+        except ErrorException as exception:
+            return ParseResult().failure(exception.error)
+        return ParseResult().success(statements)
+
+    # Parse the program one top-level statement at a time, yielding each ParseResult as soon as it is complete.
+    # continued tells that the tokens carry on a program whose first statements were parsed already; otherwise a
+    # program without any statement fails at EOF, as in parse()
+    def parse_stream(self, continued=False):
+        if self.lexer_error:
+            yield ParseResult().failure(self.lexer_error)
+            return
+        try:
+            while self.current_token.type == Tokens.NEWLINE:
+                self.advance()
+            while self.current_token.type != Tokens.EOF or not continued:
+                # A '}' ends the statement list in statements(), after which parse() rejects it; before the first
+                # statement of the program it goes to statement() and fails there, as in parse()
+                if continued and self.current_token.type == Tokens.RIGHT_BRACE:
+                    raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                            "Unexpected token")
+                statement = self.statement()
+                if self.current_token.type not in (Tokens.NEWLINE, Tokens.EOF):
+                    raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                            "Unexpected token")
+                yield ParseResult().success(statement)
+                continued = True
+                while self.current_token.type == Tokens.NEWLINE:
+                    self.advance()
+        except ErrorException as exception:
+            yield ParseResult().failure(exception.error)
 
     # Parse a standard expression that can include addition or subtraction
     def parse_expression(self):
@@ -48,58 +90,35 @@ class Parser:
 
     # Parse a boolean factor, which can be TRUE/FALSE or a logical operation like NOT
     def parse_boolean_factor(self):
-        result = ParseResult()
         token = self.current_token
         if token.type == Tokens.BOOL:
-            result.register_advancement()
             self.advance()
-            return result.success(BooleanNode(token))
+            return BooleanNode(token)
         elif token.type == Tokens.NOT:
-            result.register_advancement()
             self.advance()
-            factor = result.register(self.parse_boolean_factor())
-            if result.error:
-                return result
-            return result.success(UnaryOperationNode(token, factor))
+            return UnaryOperationNode(token, self.parse_boolean_factor())
         else:
-            compare = result.register(self.compare_expression())
-            if result.error:
-                return result
-            return result.success(compare)
+            return self.compare_expression()
 
     # Parse a factor in an expression, which can be a number or an expression within parentheses
     def parse_factor(self):
-        result = ParseResult()
         token = self.current_token
 
         if token.type in (Tokens.ADD, Tokens.SUB):
-            result.register_advancement()
             self.advance()
-            factor = result.register(self.parse_factor())
-            if result.error:
-                return result
-            return result.success(UnaryOperationNode(token, factor))
+            return UnaryOperationNode(token, self.parse_factor())
         else:
-            call = result.register(self.call_expression())
-            if result.error:
-                return result
-            return result.success(call)
+            return self.call_expression()
 
     # Generic function to parse binary operations like addition, subtraction, AND, OR
     def binary_operation(self, function, options):
-        result = ParseResult()
-        left = result.register(function())
-        if result.error:
-            return result
+        left = function()
         while self.current_token.type in options:
             operand = self.current_token
-            result.register_advancement()
             self.advance()
-            right = result.register(function())
-            if result.error:
-                return result
+            right = function()
             left = BinaryOperationNode(left, operand, right)
-        return result.success(left)
+        return left
 
     # Parse comparison expressions like less than, greater than, etc.
     def compare_expression(self):
@@ -109,313 +128,216 @@ class Parser:
 
     # Parse an expression within parentheses
     def parented_expr(self):
-        result = ParseResult()
         token = self.current_token
-        result.register_advancement()
         self.advance()
-        expression = result.register(self.parse_boolean_expression())
-        if result.error:
-            return result
-        if self.current_token.type == Tokens.RIGHT_PAREN:
-            result.register_advancement()
-            self.advance()
-            return result.success(expression)
-        else:
-            return result.failure(InvalidSyntaxError(token.position_start_,
-                                                     self.current_token.position_end, "Expected ')'"))
+        expression = self.parse_boolean_expression()
+        if self.current_token.type != Tokens.RIGHT_PAREN:
+            raise self.syntax_error(token.position_start, self.current_token.position_end, "Expected ')'")
+        self.advance()
+        return expression
 
     # Parse a WHILE loop expression
     def while_expression(self):
-        result = ParseResult()
         token = self.current_token
-        result.register_advancement()
         self.advance()
-        condition = None
-        if self.current_token.type == Tokens.LEFT_PAREN:
-            result.register_advancement()
-            self.advance()
-            condition = result.register(self.parse_boolean_expression())
-            if result.error:
-                return result
-            if self.current_token.type == Tokens.RIGHT_PAREN:
-                result.register_advancement()
-                self.advance()
-            else:
-                return result.failure(InvalidSyntaxError(token.position_start, self.current_token.position_end,
-                                                         "Expected ')'"))
-        if self.current_token.type == Tokens.LEFT_BRACE:
-            token = self.current_token
-            result.register_advancement()
+        if self.current_token.type != Tokens.LEFT_PAREN:
+            raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                    "Expected '('")
+        self.advance()
+        condition = self.parse_boolean_expression()
+        if self.current_token.type != Tokens.RIGHT_PAREN:
+            raise self.syntax_error(token.position_start, self.current_token.position_end, "Expected ')'")
+        self.advance()
+        if self.current_token.type != Tokens.LEFT_BRACE:
+            raise self.syntax_error(token.position_start, self.current_token.position_end, "Expected '{'")
+        token = self.current_token
+        self.advance()
+        self.tempLoop = True
+        if self.current_token.type == Tokens.NEWLINE:
             self.advance()
-            self.tempLoop = True
-            body = []
-            if self.current_token.type == Tokens.NEWLINE:
-                result.register_advancement()
-                self.advance()
-                body = result.register(self.statements())
-                if result.error:
-                    return result
-            else:
-                expression = result.register(self.statement())
-                if result.error:
-                    return result
-                body.append(expression)
-
-            if self.current_token.type == Tokens.RIGHT_BRACE:
-                result.register_advancement()
-                self.advance()
-                self.tempLoop = False
-                return result.success(WhileNode(condition, body, self.current_token.position_end))
-            else:
-                return result.failure(InvalidSyntaxError(token.position_start, self.current_token.position_end,
-                                                         "Expected '}'"))
+            body = self.statements()
         else:
-            return result.failure(InvalidSyntaxError(token.position_start, self.current_token.position_end,
-                                                     "Expected '{'"))
+            body = [self.statement()]
+
+        if self.current_token.type != Tokens.RIGHT_BRACE:
+            raise self.syntax_error(token.position_start, self.current_token.position_end, "Expected '}'")
+        self.advance()
+        self.tempLoop = False
+        return WhileNode(condition, body, self.current_token.position_end)
 
     # Parse an atom, which is the most basic unit like a number, identifier, or expression within parentheses
     def atom(self):
-        result = ParseResult()
         token = self.current_token
         if token.type in Tokens.INT:
-            result.register_advancement()
             self.advance()
-            return result.success(NumberNode(token))
+            return NumberNode(token)
         elif token.type in Tokens.IDENTIFIER:
-            ID_name = result.register(self.make_identifier(token))
-            if result.error:
-                return result
-            return result.success(ID_name)
+            return self.make_identifier(token)
         elif token.matches(Tokens.KEYWORD, Tokens.WHILE):
-            expression = result.register(self.while_expression())
-            if result.error:
-                return result
-            return result.success(expression)
+            return self.while_expression()
         elif token.type == Tokens.LEFT_PAREN:
             return self.parented_expr()
         elif token.type == 'function':
-            fun_def = result.register(self.function_definition())
-            if result.error:
-                return result
-            return result.success(fun_def)
+            return self.function_definition()
         elif token.type == Tokens.KEYWORD and token.value == 'lambda':
-            def_lambda = result.register(self.def_lambda())
-            if result.error:
-                return result
-            return result.success(def_lambda)
-        return result.failure(InvalidSyntaxError(token.position_start, token.position_end,
-                                                 "Expected '(,int,while', 'IDENTIFIER', 'FUNCTION' or 'KEYWORD',"
-                                                 "'+','-','!','true','false'"))
+            return self.def_lambda()
+        raise self.syntax_error(token.position_start, token.position_end,
+                                "Expected '(,int,while', 'IDENTIFIER', 'FUNCTION' or 'KEYWORD',"
+                                "'+','-','!','true','false'")
 
     # Parse a function definition
     def function_definition(self):
-        result = ParseResult()
-
         if self.current_token == Tokens.FUNCTION:
-            return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                     self.current_token.position_end, "Expected 'function'"))
+            raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                    "Expected 'function'")
 
-        result.register_advancement()
         self.advance()
         if self.current_token.type == Tokens.IDENTIFIER:
             token_name = self.current_token
-            result.register_advancement()
             self.advance()
             if self.current_token.type != Tokens.LEFT_PAREN:
-                return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                         self.current_token.position_end, "Expected '('"))
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        "Expected '('")
         else:
             token_name = None
             if self.current_token.type != Tokens.LEFT_PAREN:
-                return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                         self.current_token.position_end,
-                                                         "Expected IDENTIFIER or '('"))
-        result.register_advancement()
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        "Expected IDENTIFIER or '('")
         self.advance()
         arg_name = []
         if self.current_token.type == Tokens.IDENTIFIER:
             arg_name.append(self.current_token)
-            result.register_advancement()
             self.advance()
             while self.current_token.type == Tokens.COMMA:
-                result.register_advancement()
                 self.advance()
                 if self.current_token.type != Tokens.IDENTIFIER:
-                    return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                             self.current_token.position_end,
-                                                             "Expected IDENTIFIER"))
+                    raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                            "Expected IDENTIFIER")
                 arg_name.append(self.current_token)
-                result.register_advancement()
                 self.advance()
             if self.current_token.type != Tokens.RIGHT_PAREN:
-                return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                         self.current_token.position_end,
-                                                         "Expected ',' or ')'"))
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        "Expected ',' or ')'")
         else:
             if self.current_token.type != Tokens.RIGHT_PAREN:
-                return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                         self.current_token.position_end,
-                                                         "Expected IDENTIFIER or ')'"))
-        result.register_advancement()
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        "Expected IDENTIFIER or ')'")
         self.advance()
         if self.current_token.type == Tokens.ARROW:
-            result.register_advancement()
             self.advance()
-            body = result.register(self.parse_boolean_expression())
-            if result.error:
-                return result
-            return result.success(FunctionDefinitionNode(token_name, arg_name, body, True))
+            body = self.parse_boolean_expression()
+            return FunctionDefinitionNode(token_name, arg_name, body, True)
         if self.current_token.type != Tokens.NEWLINE:
-            return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                     self.current_token.position_end, "Expected '->' or NEWLINE"))
-        result.register_advancement()
+            raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                    "Expected '->' or NEWLINE")
         self.advance()
-        body = result.register(self.statements())
-        if result.error:
-            return result
-        return result.success(FunctionDefinitionNode(token_name, arg_name, body, False))
+        # 'return' is only accepted in the statements of a multi-line body
+        in_function = self.tempFunc
+        self.tempFunc = True
+        body = self.statements()
+        self.tempFunc = in_function
+        return FunctionDefinitionNode(token_name, arg_name, body, False)
 
     # Parse a function call expression
     def call_expression(self):
-        result = ParseResult()
-        atom = result.register(self.atom())
-        if result.error:
-            return result
+        atom = self.atom()
         if self.current_token.type == Tokens.LEFT_PAREN:
-            result.register_advancement()
+            return self.call_arguments(atom)
+        return atom
+
+    # Parse the parenthesized argument list that follows a callee
+    def call_arguments(self, atom):
+        self.advance()
+        arg_nodes = []
+        if self.current_token.type == Tokens.RIGHT_PAREN:
             self.advance()
-            arg_nodes = []
-            if self.current_token.type == Tokens.RIGHT_PAREN:
-                result.register_advancement()
-                self.advance()
-            else:
-                arg_nodes.append(result.register(self.parse_boolean_expression()))
-                if result.error:
-                    return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                             self.current_token.position_end,
-                                                             "Expected ')', 'int',"
-                                                             "'IDENTIFIER','FUNCTION','WHILE'"))
-                while self.current_token.type == Tokens.COMMA:
-                    result.register_advancement()
-                    self.advance()
-                    arg_nodes.append(result.register(self.parse_boolean_expression()))
-                    if result.error:
-                        return result
-                if self.current_token.type != Tokens.RIGHT_PAREN:
-                    return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                             self.current_token.position_end,
-                                                             "Expected ',' or ')'"))
-                result.register_advancement()
+        else:
+            arg_nodes.append(self.parse_boolean_expression())
+            while self.current_token.type == Tokens.COMMA:
                 self.advance()
-            return result.success(FunctionCallNode(atom, arg_nodes))
-        return result.success(atom)
+                arg_nodes.append(self.parse_boolean_expression())
+            if self.current_token.type != Tokens.RIGHT_PAREN:
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        "Expected ',' or ')'")
+            self.advance()
+        return FunctionCallNode(atom, arg_nodes)
 
     # Parse an identifier, typically used to access variables
     def make_identifier(self, token):
-        result = ParseResult()
-        if token.type == Tokens.IDENTIFIER:
-            result.register_advancement()
-            self.advance()
-            return result.success(AccessNode(token))
-        else:
-            return result.failure(InvalidSyntaxError(token.position_start, token.position_end, "Expected 'IDENTIFIER'"))
+        if token.type != Tokens.IDENTIFIER:
+            raise self.syntax_error(token.position_start, token.position_end, "Expected 'IDENTIFIER'")
+        self.advance()
+        return AccessNode(token)
 
     # Parse a lambda function definition
     def def_lambda(self):
-        result = ParseResult()
         if not self.current_token.matches(Tokens.KEYWORD, 'lambda'):
-            return result.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-                                                     f"Expected lambda"))
-        result.register_advancement()
+            raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                    f"Expected lambda")
         self.advance()
         if self.current_token.type in Tokens.IDENTIFIER:
             var_name_tok = self.current_token
-            result.register_advancement()
             self.advance()
             if self.current_token.type != Tokens.LEFT_PAREN:
-                return result.failure(
-                    InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-                                       f"Expected '('"))
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        f"Expected '('")
         else:
             var_name_tok = None
             if self.current_token.type != Tokens.LEFT_PAREN:
-                return result.failure(InvalidSyntaxError(
-                    self.current_token.position_start, self.current_token.position_end, f"Expected identifier or '('"))
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        f"Expected identifier or '('")
 
-        result.register_advancement()
         self.advance()
         arg_name_toks = []
 
         if self.current_token.type == Tokens.IDENTIFIER:
             arg_name_toks.append(self.current_token)
-            result.register_advancement()
             self.advance()
 
             while self.current_token.type == Tokens.COMMA:
-                result.register_advancement()
                 self.advance()
 
                 if self.current_token.type != Tokens.IDENTIFIER:
-                    return result.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.
-                                                             position_end, f"Expected identifier"))
+                    raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                            f"Expected identifier")
 
                 arg_name_toks.append(self.current_token)
-                result.register_advancement()
                 self.advance()
 
             if self.current_token.type != Tokens.RIGHT_PAREN:
-                return result.failure(
-                    InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-                                       f"Expected ',' or ')'"))
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        f"Expected ',' or ')'")
         else:
             if self.current_token.type != Tokens.RIGHT_PAREN:
-                return result.failure(InvalidSyntaxError(self.current_token.position_start,
-                                                         self.current_token.position_end, f"Expected "
-                                                                                          f"identifier or ')'"))
+                raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                        f"Expected identifier or ')'")
 
-        result.register_advancement()
         self.advance()
 
         if self.current_token.type != Tokens.COLON:
-            return result.failure(
-                InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end, f"Expected ':'"))
+            raise self.syntax_error(self.current_token.position_start, self.current_token.position_end,
+                                    f"Expected ':'")
 
-        result.register_advancement()
         self.advance()
-        node_to_return = result.register(self.parse_boolean_expression())
-        if result.error:
-            return result
-
-        return result.success(LambdaNode(arg_name_toks, var_name_tok, node_to_return))
+        node_to_return = self.parse_boolean_expression()
+        return LambdaNode(arg_name_toks, var_name_tok, node_to_return)
 
     # Parse multiple statements, handling newlines and grouping them together
     def statements(self):
-        result = ParseResult()
-        statements = []
         while self.current_token.type == Tokens.NEWLINE:
-            result.register_advancement()
             self.advance()
-        statement = result.register(self.statement())
-        if result.error:
-            return result
-        statements.append(statement)
+        statements = [self.statement()]
         while self.current_token.type == Tokens.NEWLINE:
-            result.register_advancement()
             self.advance()
             while self.current_token.type == Tokens.NEWLINE:
-                result.register_advancement()
                 self.advance()
-            if self.current_token.type == Tokens.RIGHT_BRACE:
+            if self.current_token.type in (Tokens.RIGHT_BRACE, Tokens.EOF):
                 break
-            statement = result.register(self.statement())
-            if result.error:
-                return result
-            statements.append(statement)
+            statements.append(self.statement())
 
         while self.current_token.type == Tokens.NEWLINE:
-            result.register_advancement()
             self.advance()
-        return result.success(statements)
+        return statements
 
     # Parse a single statement, which could be a continue, break, return, or an expression
     def statement(self):
@@ -430,78 +352,43 @@ class Parser:
 
     # Parse a 'continue' statement, only valid within a loop
     def continue_statement(self):
-        result = ParseResult()
         token = self.current_token
-        if token.matches(Tokens.KEYWORD, Tokens.CONTINUE):
-            result.register_advancement()
-            self.advance()
-            if self.tempLoop:
-                return result.success(ContinueNode(token.position_start, token.position_end))
-            else:
-                return result.failure(InvalidSyntaxError(token.position_start, token.position_end,
-                                                         "Continue outside of loop"))
-        else:
-            return result.failure(InvalidSyntaxError(token.position_start, token.position_end, "Expected 'continue'"))
+        if not token.matches(Tokens.KEYWORD, Tokens.CONTINUE):
+            raise self.syntax_error(token.position_start, token.position_end, "Expected 'continue'")
+        self.advance()
+        if not self.tempLoop:
+            raise self.syntax_error(token.position_start, token.position_end, "Continue outside of loop")
+        return ContinueNode(token.position_start, token.position_end)
 
     # Parse a 'break' statement, only valid within a loop
     def break_statement(self):
-        result = ParseResult()
         token = self.current_token
-        if token.matches(Tokens.KEYWORD, Tokens.BREAK):
-            result.register_advancement()
-            self.advance()
-            if self.tempLoop:
-                return result.success(BreakNode(token.position_start, token.position_end))
-            else:
-                return result.failure(InvalidSyntaxError(token.position_start, token.position_end,
-                                                         "Break outside of loop"))
-        else:
-            return result.failure(InvalidSyntaxError(token.position_start, token.position_end, "Expected 'break'"))
+        if not token.matches(Tokens.KEYWORD, Tokens.BREAK):
+            raise self.syntax_error(token.position_start, token.position_end, "Expected 'break'")
+        self.advance()
+        if not self.tempLoop:
+            raise self.syntax_error(token.position_start, token.position_end, "Break outside of loop")
+        return BreakNode(token.position_start, token.position_end)
 
     # Parse a 'return' statement, only valid within a function
     def return_statement(self):
-        result = ParseResult()
         token = self.current_token
-        if token.matches(Tokens.KEYWORD, Tokens.RETURN):
-            result.register_advancement()
-            self.advance()
-            if self.current_token.type == Tokens.NEWLINE:
-                if self.tempFunc:
-                    return result.success(ReturnNode(None, token.position_start, token.position_end))
-                else:
-                    return result.failure(InvalidSyntaxError(token.position_start, token.position_end,
-                                                             "Return outside of function"))
-            else:
-                body = result.register(self.parse_boolean_expression())
-                if result.error:
-                    return result
-                if self.tempFunc:
-                    return result.success(ReturnNode(body, token.position_start, token.position_end))
-                else:
-                    return result.failure(InvalidSyntaxError(token.position_start, token.position_end,
-                                                             "Return outside of function"))
-        else:
-            return result.failure(InvalidSyntaxError(token.position_start, token.position_end,
-                                                     "Expected 'return'"))
+        if not token.matches(Tokens.KEYWORD, Tokens.RETURN):
+            raise self.syntax_error(token.position_start, token.position_end, "Expected 'return'")
+        self.advance()
+        body = None
+        if self.current_token.type != Tokens.NEWLINE:
+            body = self.parse_boolean_expression()
+        if not self.tempFunc:
+            raise self.syntax_error(token.position_start, token.position_end, "Return outside of function")
+        return ReturnNode(body, token.position_start, token.position_end)
 
 
+# Outcome of a whole parse: the statements, or the first syntax (or lexer) error
 class ParseResult:
     def __init__(self):
         self.error = None
         self.node = None
-        self.advance_count = 0
-
-    # Register the result of a parsing operation
-    def register(self, result):
-        self.advance_count += result.advance_count
-        if result.error:
-            self.error = result.error
-        return result.node
-
-    # Track the advancement of a single token
-    def register_advancement(self):
-        self.advance_count += 1
-        return self
 
     # Mark the parse as successful and store the resulting node
     def success(self, node):
@@ -510,6 +397,5 @@ class ParseResult:
 
     # Mark the parse as failed and store the error
     def failure(self, error):
-        if not self.error or self.advance_count == 0:
-            self.error = error
+        self.error = error
         return self
@@ -0,0 +1,80 @@
+from Lexer.mytoken import Tokens
+from Parser.astNode import AccessNode, BinaryOperationNode, BooleanNode, NumberNode, UnaryOperationNode
+from Parser.parser import Parser
+
+# Binding power of each binary operator, one per level of the recursive-descent grammar:
+# parse_boolean_expression (1), parse_boolean_term (2), compare_expression (3), parse_expression (4), parse_term (5)
+BOOLEAN_EXPRESSION_POWER = 1
+BOOLEAN_TERM_POWER = 2
+COMPARE_POWER = 3
+PREFIX_POWER = 6
+MAX_POWER = PREFIX_POWER
+BINARY_POWERS = {
+    Tokens.OR: 1,
+    Tokens.AND: 1,
+    Tokens.EQUAL: 3,
+    Tokens.NOT_EQUAL: 3,
+    Tokens.LESS: 3,
+    Tokens.LESS_EQUAL: 3,
+    Tokens.GREATER: 3,
+    Tokens.GREATER_EQUAL: 3,
+    Tokens.ADD: 4,
+    Tokens.SUB: 4,
+    Tokens.MUL: 5,
+    Tokens.DIV: 5,
+    Tokens.INTEGER_DIV: 5,
+    Tokens.MOD: 5,
+}
+
+
+# Parser whose expressions are parsed by precedence climbing over BINARY_POWERS instead of one method per level.
+# Builds the same trees and reports the same errors as Parser.
+class PrattParser(Parser):
+    def parse_boolean_expression(self):
+        return self.parse_precedence(BOOLEAN_EXPRESSION_POWER)
+
+    # Parse an expression whose binary operators all bind at least as tightly as min_power
+    def parse_precedence(self, min_power):
+        token = self.current_token
+        token_type = token.type
+        # No operator may bind tighter than the last one applied at this level: the recursive-descent level that
+        # would have applied it has already returned. '!' and boolean literals are parse_boolean_factor, so they
+        # may only start an operand of '&&', '||', '==' or '!=' and are never an operand of a tighter operator.
+        ceiling = MAX_POWER
+
+        if token_type == Tokens.INT or token_type == Tokens.IDENTIFIER:
+            self.advance()
+            left = NumberNode(token) if token_type == Tokens.INT else AccessNode(token)
+            if self.current_token.type == Tokens.LEFT_PAREN:
+                left = self.call_arguments(left)
+        elif token_type in (Tokens.ADD, Tokens.SUB):
+            self.advance()
+            operand = self.parse_precedence(PREFIX_POWER)
+            left = UnaryOperationNode(token, operand)
+        elif token_type == Tokens.BOOL and min_power <= COMPARE_POWER:
+            self.advance()
+            left = BooleanNode(token)
+            ceiling = BOOLEAN_TERM_POWER
+        elif token_type == Tokens.NOT and min_power <= COMPARE_POWER:
+            self.advance()
+            operand = self.parse_precedence(COMPARE_POWER)
+            left = UnaryOperationNode(token, operand)
+            ceiling = BOOLEAN_TERM_POWER
+        else:
+            left = self.call_expression()
+
+        while True:
+            operator = self.current_token
+            power = BINARY_POWERS.get(operator.type)
+            if power is None:
+                break
+            # Outside compare_expression, '==' and '!=' are the operators of parse_boolean_term
+            if ceiling < COMPARE_POWER and (operator.type == Tokens.EQUAL or operator.type == Tokens.NOT_EQUAL):
+                power = BOOLEAN_TERM_POWER
+            if power < min_power or power > ceiling:
+                break
+            self.advance()
+            right = self.parse_precedence(power + 1)
+            left = BinaryOperationNode(left, operator, right)
+            ceiling = power
+        return left
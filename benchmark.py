@@ -0,0 +1,682 @@
+import argparse
+import contextlib
+import io
+import mmap
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import shell
+from Interpreter.boolean import Boolean
+from Interpreter.interpreter import Interpreter
+from Interpreter.memo import MemoTable
+from Interpreter.memostore import MemoStore
+from Interpreter.myfunction import Function
+from Interpreter.mylambda import Lambda
+from Interpreter.number import Number
+from Lexer.lexer import Lexer
+from Lexer.loader import map_file
+from Lexer.parallel import ParallelLexer
+from Lexer.regexlexer import RegexLexer
+from Parser.astcache import ASTCache
+from Parser.flatast import FlatAST
+from Parser.incremental import IncrementalDocument
+from Parser.parser import Parser
+from Parser.pratt import PrattParser
+
+SAMPLE_FILE = 'test.lambda'
+
+# Programs whose printed output, value and error every execution engine must give the same as the tree-walking
+# Interpreter
+EQUIVALENCE_PROGRAMS = {
+    'break in a body': "while (1) {\nprint((function g(a)\nbreak\na + 1)(5))\nprint(8)\nbreak\n}\nprint(7)\n",
+    'unbound parameter': "function f0(a) -> a\nprint(f0(while (0) { 1 }))\n",
+    'parameter bound by the caller': "function f0(b) -> b\nfunction f1(b) -> f0(while (0) { 1 }) + 1\nprint(f1(3))\n",
+    'return in a call argument': "print((function f()\nprint(while (1) { return 6 })\n7)())\n",
+    'return in an operand': "print((function f()\n1 + while (1) { return 5 }\n7)())\n",
+    'return in a loop condition': "print((function f()\nwhile (while (1) { return 9 }) { 1 }\n7)())\n",
+}
+
+
+# Build a synthetic program of roughly `size` bytes by repeating the sample script
+def generate_source(size):
+    with open(SAMPLE_FILE, 'r') as file:
+        sample = file.read().rstrip('\n') + '\n'
+    return sample * max(1, size // len(sample))
+
+
+# Run `function` `repeat` times and return the best wall-clock time
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+# Compare the character-stepping Lexer with the single-regex RegexLexer on the same input
+def bench_lexer(arguments):
+    text = generate_source(arguments.size)
+    results = {}
+    for name, lexer_class in (('char', Lexer), ('regex', RegexLexer)):
+        results[name] = lexer_class('<bench>', text).tokenize()
+        elapsed = best_time(lambda: lexer_class('<bench>', text).tokenize(), arguments.repeat)
+        print(f"{name:>6}: {elapsed:.3f}s  {len(text) / elapsed / 1e6:.2f} MB/s  {len(results[name][0])} tokens")
+    same = [repr(token) for token in results['char'][0]] == [repr(token) for token in results['regex'][0]]
+    print(f"identical token streams: {same}")
+
+
+# Compare RegexLexer with ParallelLexer at increasing worker counts
+def bench_parallel(arguments):
+    text = generate_source(arguments.size)
+    expected = [(token.type, token.value, token.start, token.end) for token in RegexLexer('<bench>', text).tokenize()[0]]
+    elapsed = best_time(lambda: RegexLexer('<bench>', text).tokenize(), arguments.repeat)
+    print(f"sequential: {elapsed:.3f}s")
+    for workers in arguments.workers:
+        tokens = ParallelLexer('<bench>', text, workers).tokenize()[0]
+        same = [(token.type, token.value, token.start, token.end) for token in tokens] == expected
+        elapsed = best_time(lambda: ParallelLexer('<bench>', text, workers).tokenize(), arguments.repeat)
+        print(f"{workers:>2} workers: {elapsed:.3f}s  identical: {same}")
+
+
+# Latency of a one-character edit in the middle of growing programs: full re-parse vs IncrementalDocument
+def bench_incremental(arguments):
+    line = "function add(x, y) -> x + y * (3 - y) == 7 || x < 2\n"
+    for lines in arguments.lines:
+        text = line * lines
+        middle = len(line) * (lines // 2) + line.index('3')
+        document = IncrementalDocument('<bench>', text)
+        digits = iter('0123456789' * (arguments.repeat + 1))
+        full = best_time(lambda: Parser(RegexLexer('<bench>', text).tokenize()[0]).parse(), arguments.repeat)
+        edit = best_time(lambda: document.edit(middle, middle + 1, next(digits)), arguments.repeat)
+        print(f"{lines:>7} lines: full parse {full * 1000:8.2f}ms  incremental edit {edit * 1000:6.2f}ms  "
+              f"(re-parsed {document.reparsed} chars)")
+
+
+# Parse throughput and peak traced memory of Parser on one MB of source
+def bench_parser(arguments):
+    tokens = RegexLexer('<bench>', generate_source(arguments.size)).tokenize()[0]
+    elapsed = best_time(lambda: Parser(tokens).parse(), arguments.repeat)
+    tracemalloc.start()
+    result = Parser(tokens).parse()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{elapsed:.3f}s  {len(tokens) / elapsed / 1e6:.2f} M tokens/s  peak {peak / 1e6:.1f} MB  "
+          f"{len(result.node)} statements")
+
+
+# Time to get the statements of a program by lexing and parsing it against loading them from a warm ASTCache
+def bench_cache(arguments):
+    text = generate_source(arguments.size)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ASTCache(directory)
+        cache.store(text, Parser(RegexLexer('<bench>', text).tokenize()[0]).parse().node)
+        size = os.path.getsize(cache.path(text))
+        parse = best_time(lambda: Parser(RegexLexer('<bench>', text).tokenize()[0]).parse(), arguments.repeat)
+        load = best_time(lambda: cache.load('<bench>', text), arguments.repeat)
+        print(f"lex + parse: {parse:.3f}s")
+        print(f" cache load: {load:.3f}s  ({size / len(text):.1f} bytes of cache per byte of source)")
+        print(cache.stats())
+
+
+# Memory and (de)serialization cost of the object AST against FlatAST, and evaluation through its views
+def bench_flat(arguments):
+    text = generate_source(arguments.size)
+    lexer = RegexLexer('<bench>', text)
+    tokens = lexer.tokenize()[0]
+    tracemalloc.start()
+    nodes = Parser(tokens).parse().node
+    objects = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    flat = FlatAST.from_nodes(nodes, lexer.source)
+    columns = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    pickled = pickle.dumps(nodes, pickle.HIGHEST_PROTOCOL)
+    data = flat.tobytes()
+    print(f"  node objects: {objects / 1e6:6.1f} MB   pickled {len(pickled) / 1e6:6.1f} MB  "
+          f"unpickle {best_time(lambda: pickle.loads(pickled), arguments.repeat):.3f}s")
+    print(f"      flat AST: {columns / 1e6:6.1f} MB   serialized {len(data) / 1e6:3.1f} MB  "
+          f"frombuffer {best_time(lambda: FlatAST.frombuffer(data, lexer.source), arguments.repeat):.6f}s")
+
+    with tempfile.NamedTemporaryFile(suffix='.ast', delete=False) as file:
+        file.write(data)
+    try:
+        with open(file.name, 'rb') as mapped_file:
+            mapped = mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+        statements = FlatAST.frombuffer(mapped, lexer.source).statements()
+        program = "function add(x, y) -> x + y * (3 - y)\n" + "add(3, 4) < 2 || 7 // 2 == 3\n" * (arguments.size // 30)
+        program_lexer = RegexLexer('<bench>', program)
+        program_nodes = Parser(program_lexer.tokenize()[0]).parse().node
+        program_flat = FlatAST.from_nodes(program_nodes, program_lexer.source)
+        for name, get_nodes in (('objects', lambda: program_nodes), ('flat views', program_flat.statements)):
+            elapsed = best_time(lambda: shell.evaluate_statements(get_nodes()), arguments.repeat)
+            print(f"evaluate {name:>10}: {elapsed:.3f}s")
+        print(f"{len(statements)} statements walked from the memory-mapped file")
+        del statements
+        mapped.close()
+    finally:
+        os.remove(file.name)
+
+
+# Run recursive programs with every execution engine of the shell: the tree-walking Interpreter, Interpreter.compiler
+# closures and the Interpreter.vm bytecode machine
+def bench_engine(arguments):
+    programs = {
+        'factorial': "function factorial(n) -> (n == 0) || (n * factorial(n - 1))\n" +
+                     f"factorial({arguments.depth})\n" * arguments.calls,
+        'countdown': "function count(n, total) -> (n == 0) || count(n - 1, total + n % 7 * 2 // 3)\n" +
+                     f"count({arguments.depth}, 0)\n" * arguments.calls,
+    }
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.depth * 40))
+    for name, text in programs.items():
+        results = {}
+        for engine in shell.execution_engines:
+            shell.execution_engine = engine
+            results[engine] = str(shell.run('<bench>', text))
+            results[engine + ' time'] = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        shell.execution_engine = 'tree'
+        for engine in shell.execution_engines:
+            speedup = results['tree time'] / results[engine + ' time']
+            print(f"{name:>9}: {engine:>7} {results[engine + ' time']:.3f}s  speedup {speedup:.2f}x  "
+                  f"same result: {results[engine] == results['tree']}")
+
+
+# Run each of EQUIVALENCE_PROGRAMS with every engine, and with and without the resolver, and report whether the
+# printed output, the value and the error are the ones the tree-walking Interpreter gives
+def bench_equivalence(arguments):
+    for name, text in EQUIVALENCE_PROGRAMS.items():
+        results = {}
+        for resolve in (True, False):
+            shell.resolve = resolve
+            for engine in shell.execution_engines:
+                shell.execution_engine = engine
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    value, error = shell.run('<equivalence>', text)
+                results[engine, resolve] = output.getvalue(), str(value), str(error) if error else None
+        expected = results['tree', True]
+        different = [f"{engine}{'' if resolve else ' --no-resolve'}" for (engine, resolve), result in results.items()
+                     if result != expected]
+        print(f"{name}: {'same on every engine' if not different else 'different on ' + ', '.join(different)}")
+    shell.execution_engine = 'tree'
+    shell.resolve = True
+
+
+# Tail-recursive loops with the tree-walking Interpreter: the time per iteration stays flat and no depth overflows
+# the Python stack
+def bench_tail(arguments):
+    shell.execution_engine = 'tree'
+    for depth in arguments.depths:
+        text = ("function count(n, total) -> (n == 0) || count(n - 1, total + n % 7)\n"
+                f"count({depth}, 0)\n")
+        value, error = shell.run('<bench>', text)
+        elapsed = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        print(f"{depth:>8} iterations: {elapsed:.3f}s  {elapsed / depth * 1e6:.2f}us per iteration  "
+              f"error: {error.details if error else None}")
+
+
+# Calls per second of a deep non-tail recursion, whose calls all return through the calls below them, and of a
+# tail-recursive loop with every execution engine: the fixed cost of entering and leaving a Function
+def bench_calls(arguments):
+    programs = {
+        'recursion': "function down(n) -> (n == 0) || (1 * down(n - 1))\n" +
+                     f"down({arguments.depth})\n" * arguments.calls,
+        'tail': "function loop(n) -> (n == 0) || loop(n - 1)\n" + f"loop({arguments.depth})\n" * arguments.calls,
+    }
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.depth * 40))
+    for name, text in programs.items():
+        for engine in shell.execution_engines:
+            shell.execution_engine = engine
+            value, error = shell.run('<bench>', text)
+            elapsed = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+            calls = (arguments.depth + 1) * arguments.calls
+            print(f"{name:>9}: {engine:>7} {calls / elapsed:>10,.0f} calls/s  {elapsed / calls * 1e6:.2f}us per call  "
+                  f"error: {error.details if error else None}")
+    shell.execution_engine = 'tree'
+
+
+# Reads, literals and comparisons: a tail loop whose every call reads its parameters eleven times and compares them
+# five times, in every engine. A read gives back the bound value and a comparison one of the two shared Booleans,
+# so neither allocates; the tracemalloc peak of a run shows what the loop still allocates
+def bench_values(arguments):
+    text = "function scan(n, a, b) -> (n == 0) || (a >= b) || (b <= a) || (a == b) || (a > 10) || " \
+           "scan(n - 1, a, b)\n" + f"scan({arguments.depth}, 3, 7)\n" * arguments.calls
+    calls = (arguments.depth + 1) * arguments.calls
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.depth * 40))
+    for engine in shell.execution_engines:
+        shell.execution_engine = engine
+        value, error = shell.run('<bench>', text)
+        elapsed = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        tracemalloc.start()
+        shell.run('<bench>', text)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{engine:>7}: {calls / elapsed:>10,.0f} calls/s  {elapsed / calls * 1e6:.2f}us per call  "
+              f"peak {peak / 1024:,.0f} KiB  value: {value!r}  error: {error.details if error else None}")
+    shell.execution_engine = 'tree'
+
+
+# Node-evaluation throughput of the tree-walking Interpreter: an expression-heavy tail loop, and a multi-line body
+# that loops through 'while' and 'return'. The nodes a run visits are counted once by wrapping Interpreter.visit and
+# visit_tail, then the run is timed unwrapped
+def bench_nodes(arguments):
+    programs = {
+        'expression': ("function expr(n, a, b) -> (n == 0) || ((a * 3 + b - a % 5 > b * 2 - a) != (a < b)) || "
+                       "expr(n - 1, a, b)\n", f"expr({arguments.depth}, 3, 7)\n" * arguments.calls),
+        'statements': ("function body(n)\n(n + 1) * 2\nwhile (n > 0) {\nreturn body(n - 1)\n}\nreturn n\n",
+                       f"body({arguments.depth})\n" * arguments.calls),
+    }
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.depth * 40))
+    shell.execution_engine = 'tree'
+    visit, visit_tail = Interpreter.visit, Interpreter.visit_tail
+    for name, (definition, text) in programs.items():
+        shell.run('<bench>', definition)
+        counter = [0]
+
+        def counted(method):
+            def wrapper(self, node, context):
+                counter[0] += 1
+                return method(self, node, context)
+            return wrapper
+        Interpreter.visit, Interpreter.visit_tail = counted(visit), counted(visit_tail)
+        value, error = shell.run('<bench>', text)
+        Interpreter.visit, Interpreter.visit_tail = visit, visit_tail
+        elapsed = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        print(f"{name:>10}: {counter[0] / elapsed:>10,.0f} nodes/s  {elapsed / counter[0] * 1e9:.0f}ns per node  "
+              f"({counter[0]:,} nodes)  value: {value!r}  error: {error.details if error else None}")
+
+
+# Arithmetic-heavy recursion with boxed values (the tree-walking Interpreter and the closure compiler) against the
+# unboxed closures of Interpreter.unboxed, which keep ints and booleans raw inside each expression
+def bench_unboxed(arguments):
+    programs = {
+        'recursion': "function arith(n, x) -> (n == 0) || (arith(n - 1, (x * x + 3 * x - 7) % 1009 + n // 3 - x % 7) "
+                     "&& (x * 2 + n > x - n))\n" + f"arith({arguments.depth}, 5)\n" * arguments.calls,
+        'tail': "function loop(n, x) -> (n == 0) || loop(n - 1, (x * 31 + n * 7 - x // 3) % 10007 + 2 * (x > n))\n" +
+                f"loop({arguments.depth}, 5)\n" * arguments.calls,
+    }
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.depth * 40))
+    for name, text in programs.items():
+        results = {}
+        for engine in ('tree', 'closure', 'unboxed'):
+            shell.execution_engine = engine
+            results[engine] = str(shell.run('<bench>', text))
+            results[engine + ' time'] = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        for engine in ('tree', 'closure', 'unboxed'):
+            speedup = results['closure time'] / results[engine + ' time']
+            print(f"{name:>9}: {engine:>7} {results[engine + ' time']:.3f}s  {speedup:.2f}x closure  "
+                  f"same result: {results[engine] == results['closure']}")
+    shell.execution_engine = 'tree'
+
+
+# Memory of values: the bytes a live Number, Boolean, Function and Lambda takes, then the peak RSS of a separate
+# process that recurses to --depth on the explicit-stack evaluator, each frame holding its own Number
+def bench_value_memory(arguments):
+    arg_names = ['n']
+    kinds = {
+        'Number': lambda: Number(7),
+        'Boolean': lambda: Boolean(1),
+        'Function': lambda: Function('f', arg_names, None, True),
+        'Lambda': lambda: Lambda('f', arg_names, None),
+    }
+    for name, make in kinds.items():
+        values = [None] * arguments.count
+        tracemalloc.start()
+        for index in range(arguments.count):
+            values[index] = make()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:>8}: {size / arguments.count:.0f} bytes per value")
+    text = f"function depth(n) -> (n == 0) || (depth(n - 1) == (0 == 0))\ndepth({arguments.depth})\n"
+    script = "import resource, shell\n" \
+             "shell.execution_engine = 'stack'\n" \
+             f"value, error = shell.run('<bench>', {text!r})\n" \
+             "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, value, error)\n"
+    output = subprocess.run([sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    peak, result = output.split(' ', 1)
+    print(f"stack at depth {arguments.depth}: peak RSS {int(peak) / 1024:.1f} MB  result: {result.strip()}")
+
+
+# Non-tail recursion: the cost per call of the tree-walking Interpreter and of the explicit-stack evaluator at a depth
+# both can reach, then the stack evaluator alone at depths past the Python recursion limit
+def bench_depth(arguments):
+    function = "function depth(n) -> (n == 0) || (depth(n - 1) == (0 == 0))\n"
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.shallow * 40))
+    text = function + f"depth({arguments.shallow})\n" * arguments.calls
+    for engine in ('tree', 'stack'):
+        shell.execution_engine = engine
+        elapsed = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        per_call = elapsed / (arguments.shallow * arguments.calls)
+        print(f"{engine:>5} at depth {arguments.shallow}: {per_call * 1e6:.2f}us per call")
+    shell.execution_engine = 'stack'
+    for depth in arguments.depths:
+        start = time.perf_counter()
+        value, error = shell.run('<bench>', function + f"depth({depth})\n")
+        elapsed = time.perf_counter() - start
+        print(f"stack at depth {depth}: {elapsed:.3f}s  {elapsed / depth * 1e6:.2f}us per call  "
+              f"result: {getattr(error, 'details', value)}")
+    shell.execution_engine = 'tree'
+
+
+# A recursive function full of constant subexpressions, evaluated as parsed and after Interpreter.optimizer
+def bench_fold(arguments):
+    text = ("function poly(n) -> (n == 0) || "
+            "((2 * 3 - 5) * poly(n - 1) + n * ((3 + 5) * (5 - 2)) + ((n - 1) * 1) + (n % 7 - 0))\n" +
+            f"poly({arguments.depth})\n" * arguments.calls)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.depth * 40))
+    for engine in ('tree', 'closure', 'vm'):
+        shell.execution_engine = engine
+        times, results = {}, {}
+        for optimize in (False, True):
+            shell.optimize = optimize
+            results[optimize] = str(shell.run('<bench>', text)[0])
+            times[optimize] = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        print(f"{engine:>7}: as parsed {times[False]:.3f}s  optimized {times[True]:.3f}s  "
+              f"speedup {times[False] / times[True]:.2f}x  same result: {results[False] == results[True]}")
+    shell.execution_engine = 'tree'
+    shell.optimize = True
+
+
+# A recursion whose body mostly reads its parameters, with the reads looked up by name and resolved to frame slots
+def bench_resolve(arguments):
+    text = ("function walk(a, b, c, n) -> (n == 0) || "
+            "(1 * walk(a, b, c, n - 1) + a * b - c + n * a - b * c + a * n)\n" +
+            f"walk(3, 4, 5, {arguments.depth})\n" * arguments.calls)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.depth * 40))
+    for engine in shell.execution_engines:
+        shell.execution_engine = engine
+        times, results = {}, {}
+        for resolve in (False, True):
+            shell.resolve = resolve
+            results[resolve] = str(shell.run('<bench>', text)[0])
+            times[resolve] = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        print(f"{engine:>7}: by name {times[False]:.3f}s  by slot {times[True]:.3f}s  "
+              f"speedup {times[False] / times[True]:.2f}x  same result: {results[False] == results[True]}")
+    shell.execution_engine = 'tree'
+    shell.resolve = True
+
+
+# Naive recursive Fibonacci with and without a MemoTable: exponential calls without it, one miss per argument with it
+def bench_memo(arguments):
+    text = "function fib(n) -> (n < 2) || (1 * fib(n - 1) + 1 * fib(n - 2))\n" + f"fib({arguments.n})\n"
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), arguments.n * 100))
+    shell.execution_engine = 'tree'
+    for size in [None] + arguments.sizes:
+        Function.memo = MemoTable(size) if size else None
+        value = shell.run('<bench>', text)[0]
+        elapsed = best_time(lambda: shell.run('<bench>', text), arguments.repeat)
+        label = f"memo {size}" if size else "no memo"
+        print(f"fib({arguments.n}) {label:>10}: {elapsed:.4f}s  result {value}"
+              f"{'  ' + Function.memo.stats() if size else ''}")
+    Function.memo = None
+
+
+# A slow pure call run twice, each time with a new MemoTable over the same MemoStore file: the first run computes
+# and saves it, the second loads it as a later process would
+def bench_memo_store(arguments):
+    text = ("function count(n, total) -> (n == 0) || count(n - 1, total + n % 7)\n"
+            f"count({arguments.n}, 0)\n")
+    shell.execution_engine = 'tree'
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'memo.sqlite')
+        for run in ('cold', 'warm'):
+            store = MemoStore(path)
+            Function.memo = MemoTable(store=store)
+            start = time.perf_counter()
+            value, error = shell.run('<bench>', text)
+            elapsed = time.perf_counter() - start
+            print(f"{run}: {elapsed:.4f}s  result {value}  {Function.memo.stats()}")
+            store.close()
+    Function.memo = None
+
+
+# Parse time of deeply nested and of long flat expressions with the recursive-descent Parser and PrattParser
+def bench_pratt(arguments):
+    shapes = {
+        'deep': '(' * arguments.depth + '1' + ' + 1)' * arguments.depth + '\n',
+        'wide': ' + '.join(['x * 2 - 1 < 3 == true || 4'] * arguments.width) + '\n',
+    }
+    for shape, line in shapes.items():
+        text = line * arguments.lines
+        tokens = RegexLexer('<bench>', text).tokenize()[0]
+        results = {}
+        for name, parser_class in (('descent', Parser), ('pratt', PrattParser)):
+            results[name] = repr(parser_class(tokens).parse().node)
+            elapsed = best_time(lambda: parser_class(tokens).parse(), arguments.repeat)
+            print(f"{shape:>4} {name:>7}: {elapsed:.3f}s  {len(tokens) / elapsed / 1e6:.2f} M tokens/s")
+        print(f"{shape:>4} identical trees: {results['descent'] == results['pratt']}")
+
+
+# Position and Token as they were before tokens held integer offsets: a dict-backed object with two Positions that each
+# carry the line, column, file name and text. Only what the lexers used to build tokens is kept
+class BaselinePosition:
+    def __init__(self, index, line, column, file_name, file_text):
+        self.index = index
+        self.line = line
+        self.column = column
+        self.file_name = file_name
+        self.file_text = file_text
+
+    def advance(self, current_char=None):
+        self.index += 1
+        self.column += 1
+        if current_char == '\n':
+            self.line += 1
+            self.column = 0
+        return self
+
+    def copy(self):
+        return BaselinePosition(self.index, self.line, self.column, self.file_name, self.file_text)
+
+
+class BaselineToken:
+    def __init__(self, type, value=None, position_start=None, position_end=None):
+        self.type = type
+        self.value = value
+        if position_start:
+            self.position_start = position_start.copy()
+            self.position_end = position_start.copy()
+            self.position_end.advance()
+        if position_end:
+            self.position_end = position_end.copy()
+
+
+# The tokens of text in the baseline representation, built the way RegexLexer used to: positions are (index, line 0,
+# column index) and identifiers are not interned
+def baseline_tokens(file_name, text):
+    tokens = []
+    for token in RegexLexer(file_name, text).generate_tokens():
+        value = token.value
+        if isinstance(value, str):
+            value = ''.join(value)
+        tokens.append(BaselineToken(token.type, value, BaselinePosition(token.start, 0, token.start, file_name, text),
+                                    BaselinePosition(token.end, 0, token.end, file_name, text)))
+    return tokens, None
+
+
+# Memory held by the token list of one MB of source, in the baseline representation and in Token's
+def bench_token_memory(arguments):
+    text = generate_source(arguments.size)
+    megabytes = len(text) / 1e6
+    for name, tokenize in (('baseline', baseline_tokens), ('Token', lambda *source: RegexLexer(*source).tokenize())):
+        tracemalloc.start()
+        tokens, error = tokenize('<bench>', text)
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:>8}: {len(tokens) / megabytes:.0f} tokens per MB of source, {held / len(tokens):.1f} bytes per "
+              f"token, {held / megabytes / 1e6:.1f} MB of tokens per MB of source")
+
+
+# Peak traced memory of shell.run (whole token list and AST) against shell.run_stream (one statement at a time)
+def bench_stream(arguments):
+    text = "function add(x, y) -> x + y\n" + "add(3 * 4, (5 - 2) * 7) == 33 && 1 < 2\n" * (arguments.size // 40)
+    for name, run in (('run', shell.run), ('run_stream', shell.run_stream)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        value, error = run('<bench>', text)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:>10}: {elapsed:.3f}s  peak {peak / 1e6:.1f} MB  result {value} {error or ''}")
+
+
+# Peak traced memory of streaming the tokens of a script read as str against the same script memory-mapped
+def bench_mmap(arguments):
+    with tempfile.NamedTemporaryFile('w', suffix='.lambda', delete=False) as file:
+        file.write(generate_source(arguments.size))
+    try:
+        for name, load in (('read', lambda: contextlib.nullcontext(shell.read_text(file.name))),
+                           ('mmap', lambda: map_file(file.name))):
+            tracemalloc.start()
+            start = time.perf_counter()
+            with load() as text:
+                count = sum(1 for _ in RegexLexer(file.name, text).generate_tokens())
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:>5}: {elapsed:.3f}s  peak {peak / 1e6:.1f} MB  {count} tokens")
+    finally:
+        os.remove(file.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro benchmarks for the interpreter pipeline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    lexer_parser = subparsers.add_parser('lexer', help="char-by-char Lexer vs RegexLexer")
+    lexer_parser.add_argument('--size', type=int, default=1_000_000, help="source size in bytes")
+    lexer_parser.add_argument('--repeat', type=int, default=3)
+    lexer_parser.set_defaults(function=bench_lexer)
+
+    parallel_parser = subparsers.add_parser('parallel', help="RegexLexer vs ParallelLexer")
+    parallel_parser.add_argument('--size', type=int, default=8_000_000, help="source size in bytes")
+    parallel_parser.add_argument('--repeat', type=int, default=1)
+    parallel_parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1])
+    parallel_parser.set_defaults(function=bench_parallel)
+
+    incremental_parser = subparsers.add_parser('incremental', help="full re-parse vs incremental edit")
+    incremental_parser.add_argument('--lines', type=int, nargs='+', default=[100, 1_000, 10_000, 100_000])
+    incremental_parser.add_argument('--repeat', type=int, default=3)
+    incremental_parser.set_defaults(function=bench_incremental)
+
+    parse_parser = subparsers.add_parser('parser', help="Parser throughput and memory")
+    parse_parser.add_argument('--size', type=int, default=1_000_000, help="source size in bytes")
+    parse_parser.add_argument('--repeat', type=int, default=3)
+    parse_parser.set_defaults(function=bench_parser)
+
+    cache_parser = subparsers.add_parser('cache', help="lex + parse vs loading from ASTCache")
+    cache_parser.add_argument('--size', type=int, default=1_000_000, help="source size in bytes")
+    cache_parser.add_argument('--repeat', type=int, default=3)
+    cache_parser.set_defaults(function=bench_cache)
+
+    flat_parser = subparsers.add_parser('flat', help="object AST vs FlatAST columns")
+    flat_parser.add_argument('--size', type=int, default=1_000_000, help="source size in bytes")
+    flat_parser.add_argument('--repeat', type=int, default=3)
+    flat_parser.set_defaults(function=bench_flat)
+
+    equivalence_parser = subparsers.add_parser('equivalence', help="the same output on every execution engine")
+    equivalence_parser.set_defaults(function=bench_equivalence)
+
+    engine_parser = subparsers.add_parser('engine', help="tree-walking Interpreter vs closure compiler vs bytecode VM")
+    engine_parser.add_argument('--depth', type=int, default=20, help="recursion depth of each call")
+    engine_parser.add_argument('--calls', type=int, default=1000)
+    engine_parser.add_argument('--repeat', type=int, default=3)
+    engine_parser.set_defaults(function=bench_engine)
+
+    pratt_parser = subparsers.add_parser('pratt', help="recursive-descent Parser vs PrattParser")
+    pratt_parser.add_argument('--depth', type=int, default=40, help="nesting depth of the deep expression")
+    pratt_parser.add_argument('--width', type=int, default=50, help="terms of the wide expression")
+    pratt_parser.add_argument('--lines', type=int, default=200)
+    pratt_parser.add_argument('--repeat', type=int, default=3)
+    pratt_parser.set_defaults(function=bench_pratt)
+
+    tail_parser = subparsers.add_parser('tail', help="tail-recursive loops in constant stack depth")
+    tail_parser.add_argument('--depths', type=int, nargs='+', default=[1000, 10000, 100000])
+    tail_parser.add_argument('--repeat', type=int, default=3)
+    tail_parser.set_defaults(function=bench_tail)
+
+    calls_parser = subparsers.add_parser('calls', help="calls per second of deep and tail recursion")
+    calls_parser.add_argument('--depth', type=int, default=500, help="recursion depth of each call")
+    calls_parser.add_argument('--calls', type=int, default=40)
+    calls_parser.add_argument('--repeat', type=int, default=3)
+    calls_parser.set_defaults(function=bench_calls)
+
+    values_parser = subparsers.add_parser('values', help="reads and comparisons that allocate no values")
+    values_parser.add_argument('--depth', type=int, default=500, help="iterations of the loop in each call")
+    values_parser.add_argument('--calls', type=int, default=40)
+    values_parser.add_argument('--repeat', type=int, default=3)
+    values_parser.set_defaults(function=bench_values)
+
+    nodes_parser = subparsers.add_parser('nodes', help="node-evaluation throughput of the tree-walking Interpreter")
+    nodes_parser.add_argument('--depth', type=int, default=300, help="iterations of the loop in each call")
+    nodes_parser.add_argument('--calls', type=int, default=40)
+    nodes_parser.add_argument('--repeat', type=int, default=3)
+    nodes_parser.set_defaults(function=bench_nodes)
+
+    unboxed_parser = subparsers.add_parser('unboxed', help="arithmetic recursion with boxed vs raw ints")
+    unboxed_parser.add_argument('--depth', type=int, default=300, help="recursion depth of each call")
+    unboxed_parser.add_argument('--calls', type=int, default=40)
+    unboxed_parser.add_argument('--repeat', type=int, default=3)
+    unboxed_parser.set_defaults(function=bench_unboxed)
+
+    value_memory_parser = subparsers.add_parser('valuememory', help="bytes per value and peak RSS of deep recursion")
+    value_memory_parser.add_argument('--count', type=int, default=100_000, help="values of each kind to measure")
+    value_memory_parser.add_argument('--depth', type=int, default=200_000)
+    value_memory_parser.set_defaults(function=bench_value_memory)
+
+    depth_parser = subparsers.add_parser('depth', help="deep non-tail recursion on the explicit-stack evaluator")
+    depth_parser.add_argument('--shallow', type=int, default=50, help="depth both engines run at")
+    depth_parser.add_argument('--calls', type=int, default=200)
+    depth_parser.add_argument('--depths', type=int, nargs='+', default=[10000, 100000])
+    depth_parser.add_argument('--repeat', type=int, default=3)
+    depth_parser.set_defaults(function=bench_depth)
+
+    fold_parser = subparsers.add_parser('fold', help="statements as parsed vs constant-folded")
+    fold_parser.add_argument('--depth', type=int, default=20, help="recursion depth of each call")
+    fold_parser.add_argument('--calls', type=int, default=500)
+    fold_parser.add_argument('--repeat', type=int, default=3)
+    fold_parser.set_defaults(function=bench_fold)
+
+    resolve_parser = subparsers.add_parser('resolve', help="parameters looked up by name vs by frame slot")
+    resolve_parser.add_argument('--depth', type=int, default=20, help="recursion depth of each call")
+    resolve_parser.add_argument('--calls', type=int, default=500)
+    resolve_parser.add_argument('--repeat', type=int, default=3)
+    resolve_parser.set_defaults(function=bench_resolve)
+
+    memo_parser = subparsers.add_parser('memo', help="naive recursive Fibonacci with and without a MemoTable")
+    memo_parser.add_argument('-n', type=int, default=22, help="Fibonacci argument")
+    memo_parser.add_argument('--sizes', type=int, nargs='+', default=[16, 4096], help="MemoTable sizes")
+    memo_parser.add_argument('--repeat', type=int, default=3)
+    memo_parser.set_defaults(function=bench_memo)
+
+    store_parser = subparsers.add_parser('memostore', help="a slow pure call computed, then loaded from a MemoStore")
+    store_parser.add_argument('-n', type=int, default=100_000, help="iterations of the tail-recursive loop")
+    store_parser.set_defaults(function=bench_memo_store)
+
+    tokens_parser = subparsers.add_parser('tokens', help="memory held by the token list")
+    tokens_parser.add_argument('--size', type=int, default=1_000_000, help="source size in bytes")
+    tokens_parser.set_defaults(function=bench_token_memory)
+
+    stream_parser = subparsers.add_parser('stream', help="peak memory of run vs run_stream")
+    stream_parser.add_argument('--size', type=int, default=400_000, help="source size in bytes")
+    stream_parser.set_defaults(function=bench_stream)
+
+    mmap_parser = subparsers.add_parser('mmap', help="str read vs memory-mapped bytes lexing")
+    mmap_parser.add_argument('--size', type=int, default=2_000_000, help="source size in bytes")
+    mmap_parser.set_defaults(function=bench_mmap)
+
+    arguments = parser.parse_args()
+    arguments.function(arguments)
+
+
+if __name__ == '__main__':
+    main()
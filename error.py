@@ -1,5 +1,11 @@
+import re
+from bisect import bisect_right
+
 from stringcalc import string_calc
 
+# Times generate_traceback() shows a line that repeats before it counts the rest
+TRACEBACK_REPEATS = 3
+
 
 class Error:
     def __init__(self, pos_start, pos_end, error_name, details):
@@ -16,6 +22,19 @@ class Error:
         return result
 
 
+# Carries an Error out of code that yields or returns plain values instead of (value, error) pairs
+class ErrorException(Exception):
+    # Some operation handlers report their error as a plain string instead of an Error
+    def __init__(self, error):
+        super().__init__(getattr(error, 'details', error))
+        self.error = error
+
+
+# Raised by the parser for an InvalidSyntaxError; the first one raised is the furthest the parse got and is reported
+class InvalidSyntaxException(ErrorException):
+    pass
+
+
 class IllegalCharError(Error):
     def __init__(self, pos_start, pos_end, details):
         super().__init__(pos_start, pos_end, 'Unrecognized char', details)
@@ -38,49 +57,92 @@ class RunTimeError(Error):
         result += f"\nFile {self.pos_start.file_name}, line {self.pos_start.line + 1} col {self.pos_start.column + 1}"
         return result
 
-    # Generate a traceback of the error by following the context chain
+    # Generate a traceback of the error by following the context chain. As in Python, a line repeated more than
+    # TRACEBACK_REPEATS times in a row (deep recursion) is shown that many times and then counted
     def generate_traceback(self):
-        result = ""
+        lines = []
         pos = self.pos_start
         context = self.context
 
         while context:
-            result = f"  File {pos.file_name}, line {str(pos.line + 1)}\n" + result
+            lines.append(f"  File {pos.file_name}, line {str(pos.line + 1)}\n")
             pos = context.parent_entry_pos
             context = context.parent
 
-        return "Traceback (most recent call last):\n" + result
-
-
+        result = ["Traceback (most recent call last):\n"]
+        index = len(lines) - 1
+        while index >= 0:
+            line = lines[index]
+            run = index
+            while run > 0 and lines[run - 1] == line:
+                run -= 1
+            count = index - run + 1
+            result.extend([line] * min(count, TRACEBACK_REPEATS))
+            if count > TRACEBACK_REPEATS:
+                result.append(f"  [Previous line repeated {count - TRACEBACK_REPEATS} more times]\n")
+            index = run - 1
+        return ''.join(result)
+
+
+# Per-file line index, built on first use, that turns character offsets into line/column numbers
+class Source:
+    __slots__ = ('file_name', 'data', 'decoded', 'line_starts')
+
+    # data is a str, or a bytes-like buffer (bytes, mmap) when the lexer scans raw ASCII bytes
+    def __init__(self, file_name, data):
+        self.file_name = file_name
+        self.data = data
+        self.decoded = data if isinstance(data, str) else None
+        self.line_starts = None
+
+    # Source text for error rendering; latin-1 keeps byte offsets and character offsets identical
+    @property
+    def text(self):
+        if self.decoded is None:
+            self.decoded = bytes(self.data).decode('latin-1')
+        return self.decoded
+
+    # Hold a decoded copy of the source instead of its buffer, so positions still render once an mmap is closed
+    def detach(self):
+        self.data = self.text
+        self.line_starts = None
+
+    # Return the 0-based (line, column) of a character offset
+    def line_column(self, index):
+        if self.line_starts is None:
+            newline = '\n' if isinstance(self.data, str) else b'\n'
+            self.line_starts = [0] + [match.end() for match in re.finditer(newline, self.data)]
+        line = bisect_right(self.line_starts, index) - 1
+        return line, index - self.line_starts[line]
+
+
+# A character offset in a Source; line and column are only computed when an error is rendered
 class Position:
-    def __init__(self, index, line, column, file_name, file_text):
+    __slots__ = ('index', 'source')
+
+    def __init__(self, index, source):
         self.index = index
-        self.line = line
-        self.column = column
-        self.file_name = file_name
-        self.file_text = file_text
+        self.source = source
+
+    @property
+    def line(self):
+        return self.source.line_column(self.index)[0]
 
-    # Advance the position forward by one character, updating line and column numbers
-    def advance(self, current_char=None):
-        self.index += 1
-        self.column += 1
+    @property
+    def column(self):
+        return self.source.line_column(self.index)[1]
 
-        if current_char == '\n':
-            self.line += 1
-            self.column = 0
+    @property
+    def file_name(self):
+        return self.source.file_name
 
-        return self
+    @property
+    def file_text(self):
+        return self.source.text
 
     def copy(self):
-        return Position(self.index, self.line, self.column, self.file_name, self.file_text)
-
-    # Move the position backward by one character, updating column numbers
-    def comeback(self, current_char=None):
-        self.index -= 1
-        self.column -= 1
-
-        if current_char == '\n':
-            # self.line -= 1
-            # self.column = 0
-            pass
-        return self
+        return Position(self.index, self.source)
+
+    # Pickle as a constructor call (see Parser.astcache) instead of the generic per-slot state dict
+    def __reduce__(self):
+        return Position, (self.index, self.source)
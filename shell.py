@@ -1,14 +1,55 @@
+import argparse
+import atexit
 import os
 import sys
 
 from Interpreter.context import Context
+from Interpreter.bytecode import BytecodeCompiler, disassemble
+from Interpreter.compiler import Compiler
 from Interpreter.interpreter import Interpreter
+from Interpreter.stackeval import StackEvaluator, MAX_DEPTH
+from Interpreter.transpiler import Transpiler
+from Interpreter.unboxed import UnboxedCompiler
 from Lexer.lexer import Lexer
-from Interpreter.myfunction import BuiltInFunction
+from Lexer.loader import map_file
+from Lexer.parallel import ParallelLexer
+from Lexer.regexlexer import RegexLexer
+from Interpreter.memo import MemoTable
+from Interpreter.memostore import MemoStore
+from Interpreter.optimizer import Optimizer
+from Interpreter.resolver import Resolver
+from Interpreter.myfunction import BuiltInFunction, Function
 from Interpreter.number import Number
-from Parser.parser import Parser
+from Parser.astcache import ASTCache
+from Parser.parser import Parser, ParseResult
+from Parser.pratt import PrattParser
 from Interpreter.symboltable import SymbolTable
 run_line = False
+# Tokenizer used by run(): 'regex' (single compiled pattern), 'parallel' (regex lexing of newline-aligned chunks
+# in a process pool) or 'char' (the original char-by-char Lexer)
+lexer_engine = 'regex'
+lexer_engines = {'char': Lexer, 'regex': RegexLexer, 'parallel': ParallelLexer}
+# Lexers that scan the raw bytes of a memory-mapped script in run_file(); the others are given its decoded text
+mapped_lexers = ('regex', 'parallel')
+# Parser used by run(): 'descent' (one method per precedence level) or 'pratt' (precedence climbing)
+parser_engine = 'descent'
+parser_engines = {'descent': Parser, 'pratt': PrattParser}
+# Evaluator used by run(): 'tree' (Interpreter walks the AST), 'closure' (each statement is compiled into
+# nested closures by Interpreter.compiler first), 'vm' (each statement is compiled into bytecode by
+# Interpreter.bytecode and run by Interpreter.vm) or 'python' (each statement is translated to Python source by
+# Interpreter.transpiler and compiled with compile()) or 'stack' (Interpreter.stackeval evaluates the AST on a
+# heap-allocated stack, so recursion is limited by max_depth instead of the Python stack) or 'unboxed' (closures
+# like 'closure' whose expressions keep ints and booleans as raw Python values, by Interpreter.unboxed)
+execution_engine = 'tree'
+execution_engines = ('tree', 'closure', 'vm', 'python', 'stack', 'unboxed')
+# Whether prepare() folds constants and simplifies identities (Interpreter.optimizer) before a statement is evaluated
+optimize = True
+# Whether prepare() turns reads of a function's own parameters into frame slot reads (Interpreter.resolver)
+resolve = True
+# Deepest recursion the 'stack' engine allows before it reports a RunTimeError
+max_depth = MAX_DEPTH
+# ASTCache consulted by run() before lexing and parsing, e.g. ast_cache = ASTCache('.lambda_cache'); None disables it
+ast_cache = None
 global_symbol_table = SymbolTable()
 global_symbol_table.add("null", Number.null)
 global_symbol_table.add("true", Number.true)
@@ -102,15 +143,7 @@ def main():
 
 def run(file_name, txt):
     global run_line
-    # Generate tokens
-    lexer_instance = Lexer(file_name, txt)
-    tokens, error = lexer_instance.tokenize()
-    if error:
-        return None, error
-
-    # Generate AST
-    parser = Parser(tokens)
-    ast = parser.parse()
+    ast = parse_cached(file_name, txt)
     if ast.error:
         return None, ast.error
 
@@ -120,24 +153,231 @@ def run(file_name, txt):
     interpreter = Interpreter()
     context = Context('<program>')
     context.symbol_table = global_symbol_table
-    result = None
+    value, error = None, None
     if isinstance(ast.node, list):
         for node in ast.node:
             if run_line:
                 print("line: ", end="")
                 print("result: ", end="")
-            result = interpreter.visit(node, context)
-            if result.error:
+            value, error = interpreter.run_statement(prepare(node), context)
+            if error:
                 break
             if run_line:
-                if result.value:
-                    print(result.value)
+                if value:
+                    print(value)
                 sys.stdout.flush()
                 input("Press Enter to continue...")
     else:
-        result = interpreter.visit(ast.node, context)
-    return result.value, result.error
+        value, error = interpreter.run_statement(prepare(ast.node), context)
+    return value, error
+
+
+# The node Interpreter.visit evaluates for a top-level statement under the selected execution_engine, after the
+# optimizer and the resolver (which turns parameter reads into frame slot reads) have rewritten it
+def prepare(node):
+    if optimize:
+        node = Optimizer().optimize_statement(node)
+    if resolve:
+        node = Resolver().resolve_statement(node)
+    if execution_engine == 'closure':
+        return Compiler().compile_statement(node)
+    if execution_engine == 'vm':
+        return BytecodeCompiler().compile_statement(node)
+    if execution_engine == 'python':
+        return Transpiler().transpile_statement(node)
+    if execution_engine == 'stack':
+        return StackEvaluator(max_depth).prepare_statement(node)
+    if execution_engine == 'unboxed':
+        return UnboxedCompiler().compile_statement(node)
+    return node
+
+
+# Lex and parse a whole program, or load its statements from ast_cache when the same text was parsed before
+def parse_cached(file_name, txt):
+    if ast_cache is not None:
+        nodes = ast_cache.load(file_name, txt)
+        if nodes is not None:
+            return ParseResult().success(nodes)
+
+    # Generate tokens
+    lexer_instance = lexer_engines[lexer_engine](file_name, txt)
+    tokens, error = lexer_instance.tokenize()
+    if error:
+        return ParseResult().failure(error)
+
+    # Generate AST
+    parser = parser_engines[parser_engine](tokens)
+    ast = parser.parse()
+    if ast_cache is not None and not ast.error:
+        ast_cache.store(txt, ast.node)
+    return ast
+
+
+# Lex, parse and evaluate one top-level statement at a time, so large scripts run in bounded memory
+def run_stream(file_name, txt, on_result=None):
+    lexer_instance = lexer_engines[lexer_engine](file_name, txt)
+    return evaluate_stream(parser_engines[parser_engine](lexer_instance.generate_tokens()), on_result)
+
+
+# Stream a script file straight from a read-only memory map, without decoding or copying the file, when the
+# selected lexer scans bytes; the 'char' lexer streams the decoded text instead. The map is closed before returning,
+# so the source of a returned error is detached from it first
+def run_file(file_name, on_result=None):
+    if lexer_engine not in mapped_lexers:
+        return run_stream(file_name, read_text(file_name), on_result)
+    with map_file(file_name) as data:
+        lexer_instance = lexer_engines[lexer_engine](file_name, data)
+        value, error = evaluate_stream(parser_engines[parser_engine](lexer_instance.generate_tokens()), on_result)
+        if error:
+            lexer_instance.source.detach()
+    return value, error
+
+
+# Evaluate each statement of Parser.parse_stream as soon as it has been parsed
+def evaluate_stream(parser, on_result=None):
+    interpreter = Interpreter()
+    context = Context('<program>')
+    context.symbol_table = global_symbol_table
+    value = None
+    for statement in parser.parse_stream():
+        if statement.error:
+            return None, statement.error
+        value, error = interpreter.run_statement(prepare(statement.node), context)
+        if error:
+            return None, error
+        if on_result:
+            on_result(value)
+    return value, None
+
+
+# Evaluate already parsed top-level statements in one context, stopping at the first runtime error
+def evaluate_statements(nodes, on_result=None):
+    interpreter = Interpreter()
+    context = Context('<program>')
+    context.symbol_table = global_symbol_table
+    value = None
+    for node in nodes:
+        value, error = interpreter.run_statement(prepare(node), context)
+        if error:
+            return None, error
+        if on_result:
+            on_result(value)
+    return value, None
+
+
+# Print a top-level result the way the file mode of main() does, skipping null (0) results
+def print_result(result):
+    if result is not None and not (isinstance(result, Number) and result.value == 0):
+        print(f"The result is: {result}")
+
+
+# Non-interactive entry point: run a whole script from a path or stdin and return the process exit status,
+# 0 on success, 1 on a lexer, syntax or runtime error and 2 when the script cannot be read
+def batch(arguments):
+    global run_line, lexer_engine, parser_engine, execution_engine, optimize, resolve, max_depth, ast_cache
+    lexer_engine = arguments.lexer
+    parser_engine = arguments.parser
+    execution_engine = arguments.engine
+    optimize = arguments.optimize
+    resolve = arguments.resolve
+    max_depth = arguments.max_depth
+    if arguments.cache:
+        ast_cache = ASTCache(arguments.cache)
+    if arguments.memo_store:
+        store = MemoStore(arguments.memo_store)
+        atexit.register(store.close)
+        Function.memo = MemoTable(arguments.memo or 4096, store)
+    elif arguments.memo:
+        Function.memo = MemoTable(arguments.memo)
+    on_result = None if arguments.quiet else print_result
+
+    from_stdin = arguments.path in (None, '-')
+    file_name = '<stdin>' if from_stdin else arguments.path
+    try:
+        if arguments.disassemble:
+            return print_disassembly(file_name, sys.stdin.read() if from_stdin else read_text(file_name))
+        if arguments.stream and not from_stdin:
+            value, error = run_file(file_name, on_result)
+        else:
+            if from_stdin:
+                txt = sys.stdin.read()
+            else:
+                txt = read_text(file_name)
+            if arguments.line:
+                run_line = True
+                value, error = run(file_name, txt)
+            elif arguments.stream:
+                value, error = run_stream(file_name, txt, on_result)
+            else:
+                ast = parse_cached(file_name, txt)
+                value, error = (None, ast.error) if ast.error else evaluate_statements(ast.node, on_result)
+    except OSError as exception:
+        print(f"{file_name}: {exception.strerror}", file=sys.stderr)
+        return 2
+
+    if error:
+        print(error.__str__(), file=sys.stderr)
+        return 1
+    return 0
+
+
+# Read a whole script as text
+def read_text(file_name):
+    with open(file_name, 'r') as file:
+        return file.read()
+
+
+# Print the bytecode of every top-level statement of a script instead of running it
+def print_disassembly(file_name, txt):
+    ast = parse_cached(file_name, txt)
+    if ast.error:
+        print(ast.error.__str__(), file=sys.stderr)
+        return 1
+    compiler = BytecodeCompiler()
+    nodes = ast.node
+    if optimize:
+        nodes = [Optimizer().optimize_statement(node) for node in nodes]
+    if resolve:
+        nodes = [Resolver().resolve_statement(node) for node in nodes]
+    print('\n\n'.join(disassemble(compiler.compile_statement(node)) for node in nodes))
+    return 0
+
+
+# Command line: no script and an interactive terminal start the prompt of main(), anything else runs batch()
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Interpreter for the lambda language")
+    parser.add_argument('path', nargs='?', help="script to run, '-' or nothing (when piped) to read stdin")
+    parser.add_argument('-l', '--line', action='store_true', help="step through the statements one at a time")
+    parser.add_argument('-s', '--stream', action='store_true',
+                        help="parse and evaluate one statement at a time (files are memory-mapped, except with "
+                             "--lexer char)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="do not print the value of each statement")
+    parser.add_argument('--cache', metavar='DIR', help="reuse parsed programs from an ASTCache directory")
+    parser.add_argument('--lexer', choices=sorted(lexer_engines), default=lexer_engine)
+    parser.add_argument('--parser', choices=sorted(parser_engines), default=parser_engine)
+    parser.add_argument('--engine', choices=execution_engines, default=execution_engine)
+    parser.add_argument('--no-optimize', dest='optimize', action='store_false',
+                        help="evaluate statements as parsed, without folding constants")
+    parser.add_argument('--no-resolve', dest='resolve', action='store_false',
+                        help="look parameters up by name instead of by frame slot")
+    parser.add_argument('--max-depth', type=int, default=max_depth,
+                        help="deepest recursion of the 'stack' engine before a runtime error")
+    parser.add_argument('--memo', type=int, metavar='SIZE',
+                        help="reuse the results of calls to functions without side effects, keeping SIZE of them")
+    parser.add_argument('--memo-store', metavar='FILE',
+                        help="also keep the results of slow calls in an SQLite file, for the next runs")
+    parser.add_argument('-d', '--disassemble', action='store_true',
+                        help="print the bytecode of each statement instead of running the script")
+    arguments = parser.parse_args(argv)
+
+    # -l waits for Enter on stdin after each statement
+    if arguments.line and (arguments.path == '-' or not sys.stdin.isatty()):
+        parser.error("-l/--line reads Enter from stdin and needs a script path and a terminal on stdin")
+    if arguments.path is None and sys.stdin.isatty():
+        main()
+        return 0
+    return batch(arguments)
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(cli())
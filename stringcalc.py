@@ -2,8 +2,8 @@ def string_calc(text, position_start, position_end):
     result = ''
 
     # Calculate indices
-    index_start = max(text.rfind('\n', 0, position_start.index), 0)
-    index_end = text.find('\n', index_start + 1)
+    index_start = text.rfind('\n', 0, position_start.index) + 1
+    index_end = text.find('\n', index_start)
     if index_end < 0:
         index_end = len(text)
 
@@ -13,15 +13,15 @@ def string_calc(text, position_start, position_end):
         # Calculate line columns
         line = text[index_start:index_end]
         column_start = position_start.column if i == 0 else 0
-        column_end = position_end.column if i == line_count - 1 else len(line) - 1
+        column_end = position_end.column if i == line_count - 1 else len(line)
 
         # Append to result
         result += line + '\n'
         result += ' ' * column_start + '^' * (column_end - column_start)
 
         # Re-calculate indices
-        index_start = index_end
-        index_end = text.find('\n', index_start + 1)
+        index_start = index_end + 1
+        index_end = text.find('\n', index_start)
         if index_end < 0:
             index_end = len(text)
 